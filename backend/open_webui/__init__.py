@@ -99,5 +99,22 @@ def dev(
     )
 
 
+@app.command()
+def reindex_vectors():
+    """
+    Rebuild the pgvector index with the current PGVECTOR_INDEX_* settings,
+    without blocking searches and inserts.
+    """
+    from open_webui.config import VECTOR_DB
+
+    if VECTOR_DB != "pgvector":
+        typer.echo(f"Reindexing is only supported for pgvector, not {VECTOR_DB}.")
+        raise typer.Exit(code=1)
+
+    from open_webui.retrieval.vector.dbs.pgvector import PgvectorClient
+
+    PgvectorClient().reindex()
+
+
 if __name__ == "__main__":
     app()
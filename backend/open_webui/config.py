@@ -1708,6 +1708,12 @@ Ensure that the tools are effectively utilized to achieve the highest-quality an
 
 VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 
+# Persistent BM25 index for hybrid search, opt-in. Suited to the Chroma and
+# embedded stores whose data lives in DATA_DIR as well; for remote vector DBs
+# only enable it when BM25_INDEX_PATH is shared between all instances.
+ENABLE_BM25_INDEX = os.environ.get("ENABLE_BM25_INDEX", "False").lower() == "true"
+BM25_INDEX_PATH = os.environ.get("BM25_INDEX_PATH", f"{DATA_DIR}/bm25_index")
+
 # Chroma
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
@@ -1785,6 +1791,35 @@ PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH = int(
     os.environ.get("PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH", "1536")
 )
 
+# Rows per COPY / INSERT statement when inserting or upserting chunks
+PGVECTOR_INSERT_BATCH_SIZE = int(os.environ.get("PGVECTOR_INSERT_BATCH_SIZE", "1000"))
+
+# "copy": binary COPY (psycopg2 only), "values": multi-row INSERT statements
+PGVECTOR_INSERT_METHOD = os.environ.get("PGVECTOR_INSERT_METHOD", "copy").lower()
+
+# Vector index: "ivfflat", "hnsw" or "none" (ivfflat means hnsw for tables
+# partitioned by collection); changes to existing installs are applied with
+# `open-webui reindex-vectors`
+PGVECTOR_INDEX_TYPE = os.environ.get("PGVECTOR_INDEX_TYPE", "ivfflat").lower()
+# Index and compare vectors as halfvec, halving the index size
+PGVECTOR_INDEX_HALFVEC = (
+    os.environ.get("PGVECTOR_INDEX_HALFVEC", "False").lower() == "true"
+)
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+)
+# 0: max(40, number of results)
+PGVECTOR_HNSW_EF_SEARCH = int(os.environ.get("PGVECTOR_HNSW_EF_SEARCH", "0"))
+# 0: rows / 1000 up to 1M rows, sqrt(rows) above
+PGVECTOR_IVFFLAT_LISTS = int(os.environ.get("PGVECTOR_IVFFLAT_LISTS", "0"))
+# 0: sqrt(lists)
+PGVECTOR_IVFFLAT_PROBES = int(os.environ.get("PGVECTOR_IVFFLAT_PROBES", "0"))
+# Create document_chunk partitioned by collection (new installs, Postgres 14+)
+PGVECTOR_PARTITION_BY_COLLECTION = (
+    os.environ.get("PGVECTOR_PARTITION_BY_COLLECTION", "False").lower() == "true"
+)
+
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
 PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", None)
@@ -1793,6 +1828,30 @@ PINECONE_DIMENSION = int(os.getenv("PINECONE_DIMENSION", 1536))  # or 3072, 1024
 PINECONE_METRIC = os.getenv("PINECONE_METRIC", "cosine")
 PINECONE_CLOUD = os.getenv("PINECONE_CLOUD", "aws")  # or "gcp" or "azure"
 
+# Embedded: memory-mapped segments in DATA_DIR, shared by all workers
+EMBEDDED_VECTOR_DB_PATH = os.environ.get(
+    "EMBEDDED_VECTOR_DB_PATH", f"{DATA_DIR}/embedded_vector_db"
+)
+# "float32" or "float16": half the disk and page cache, but slower exact search
+# (vectors are converted to float32 to be scored) and slightly lower precision
+EMBEDDED_VECTOR_DB_DTYPE = os.environ.get("EMBEDDED_VECTOR_DB_DTYPE", "float32").lower()
+# Build an HNSW graph (needs hnswlib) for segments of at least HNSW_MIN_SIZE
+# vectors; smaller segments and installs without hnswlib use exact search
+ENABLE_EMBEDDED_VECTOR_DB_HNSW = (
+    os.environ.get("ENABLE_EMBEDDED_VECTOR_DB_HNSW", "False").lower() == "true"
+)
+EMBEDDED_VECTOR_DB_HNSW_MIN_SIZE = int(
+    os.environ.get("EMBEDDED_VECTOR_DB_HNSW_MIN_SIZE", "20000")
+)
+EMBEDDED_VECTOR_DB_HNSW_M = int(os.environ.get("EMBEDDED_VECTOR_DB_HNSW_M", "16"))
+EMBEDDED_VECTOR_DB_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("EMBEDDED_VECTOR_DB_HNSW_EF_CONSTRUCTION", "100")
+)
+# 0: max(40, number of results)
+EMBEDDED_VECTOR_DB_HNSW_EF_SEARCH = int(
+    os.environ.get("EMBEDDED_VECTOR_DB_HNSW_EF_SEARCH", "0")
+)
+
 ####################################
 # Information Retrieval (RAG)
 ####################################
@@ -2016,6 +2075,19 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Chunk embeddings are stored by content hash and embedding model so that
+# re-adding or reindexing unchanged files doesn't embed them again
+ENABLE_CHUNK_EMBEDDING_CACHE = (
+    os.environ.get("ENABLE_CHUNK_EMBEDDING_CACHE", "True").lower() == "true"
+)
+CHUNK_EMBEDDING_CACHE_PATH = os.environ.get(
+    "CHUNK_EMBEDDING_CACHE_PATH", f"{CACHE_DIR}/embeddings/chunks.db"
+)
+# Least recently used chunks are pruned past this many stored embeddings
+CHUNK_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("CHUNK_EMBEDDING_CACHE_MAX_ENTRIES", "1000000")
+)
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
@@ -318,6 +318,54 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Where real-time saves are written while a response is streaming:
+# "chat" rewrites the whole chat row, "message" writes only the streamed message
+# to the chat_message table and compacts it into the chat once the response ends.
+REALTIME_CHAT_SAVE_STORAGE = os.environ.get(
+    "REALTIME_CHAT_SAVE_STORAGE", "chat"
+).lower()
+
+if REALTIME_CHAT_SAVE_STORAGE not in ["chat", "message"]:
+    REALTIME_CHAT_SAVE_STORAGE = "chat"
+
+# Chat message updates (status events, streamed content) can be coalesced in
+# memory and written behind every CHAT_SAVE_BUFFER_FLUSH_INTERVAL seconds. Off
+# (0, every update written through) by default: buffered updates only live in
+# the worker that received them, a write to the same chat through another
+# worker in the meantime is overwritten by the next flush.
+CHAT_SAVE_BUFFER_FLUSH_INTERVAL = os.environ.get("CHAT_SAVE_BUFFER_FLUSH_INTERVAL", "0")
+
+try:
+    CHAT_SAVE_BUFFER_FLUSH_INTERVAL = max(float(CHAT_SAVE_BUFFER_FLUSH_INTERVAL), 0.0)
+except ValueError:
+    CHAT_SAVE_BUFFER_FLUSH_INTERVAL = 0.0
+
+CHAT_SAVE_BUFFER_MAX_UPDATES = os.environ.get("CHAT_SAVE_BUFFER_MAX_UPDATES", "50")
+
+try:
+    CHAT_SAVE_BUFFER_MAX_UPDATES = max(int(CHAT_SAVE_BUFFER_MAX_UPDATES), 1)
+except ValueError:
+    CHAT_SAVE_BUFFER_MAX_UPDATES = 50
+
+# Seconds a user/group lookup made while authenticating a request is reused;
+# writes through the Users/Groups tables invalidate it, 0 disables the cache.
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "5")
+
+try:
+    USER_CACHE_TTL = max(float(USER_CACHE_TTL), 0)
+except ValueError:
+    USER_CACHE_TTL = 5.0
+
+# Minimum seconds between two last_active_at updates of the same user.
+USER_LAST_ACTIVE_UPDATE_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_UPDATE_INTERVAL", "60"
+)
+
+try:
+    USER_LAST_ACTIVE_UPDATE_INTERVAL = max(float(USER_LAST_ACTIVE_UPDATE_INTERVAL), 0)
+except ValueError:
+    USER_LAST_ACTIVE_UPDATE_INTERVAL = 60.0
+
 ####################################
 # REDIS
 ####################################
@@ -326,6 +374,139 @@ REDIS_URL = os.environ.get("REDIS_URL", "")
 REDIS_SENTINEL_HOSTS = os.environ.get("REDIS_SENTINEL_HOSTS", "")
 REDIS_SENTINEL_PORT = os.environ.get("REDIS_SENTINEL_PORT", "26379")
 
+####################################
+# MODELS CACHE
+####################################
+
+# Seconds before the cached upstream model catalog is refreshed in the background
+# (stale entries keep being served meanwhile); 0 fetches on every request.
+MODELS_CACHE_TTL = os.environ.get("MODELS_CACHE_TTL", "60")
+
+try:
+    MODELS_CACHE_TTL = max(float(MODELS_CACHE_TTL), 0)
+except ValueError:
+    MODELS_CACHE_TTL = 60.0
+
+####################################
+# EMBEDDING CACHE
+####################################
+
+# Number of query embeddings kept in memory (LRU); 0 disables the cache.
+# With REDIS_URL set, embeddings are shared between workers as well.
+EMBEDDING_CACHE_SIZE = os.environ.get("EMBEDDING_CACHE_SIZE", "1000")
+
+try:
+    EMBEDDING_CACHE_SIZE = max(int(EMBEDDING_CACHE_SIZE), 0)
+except ValueError:
+    EMBEDDING_CACHE_SIZE = 1000
+
+# Seconds a cached embedding stays valid
+EMBEDDING_CACHE_TTL = os.environ.get("EMBEDDING_CACHE_TTL", "3600")
+
+try:
+    EMBEDDING_CACHE_TTL = max(int(EMBEDDING_CACHE_TTL), 1)
+except ValueError:
+    EMBEDDING_CACHE_TTL = 3600
+
+####################################
+# EMBEDDING CLIENT
+####################################
+
+# Batches sent in parallel to one remote (Ollama/OpenAI) embedding endpoint
+EMBEDDING_MAX_CONCURRENT_REQUESTS = os.environ.get(
+    "EMBEDDING_MAX_CONCURRENT_REQUESTS", "4"
+)
+
+try:
+    EMBEDDING_MAX_CONCURRENT_REQUESTS = max(int(EMBEDDING_MAX_CONCURRENT_REQUESTS), 1)
+except ValueError:
+    EMBEDDING_MAX_CONCURRENT_REQUESTS = 4
+
+# Retries of a batch on rate limiting (429), 5xx and connection errors
+EMBEDDING_MAX_RETRIES = os.environ.get("EMBEDDING_MAX_RETRIES", "5")
+
+try:
+    EMBEDDING_MAX_RETRIES = max(int(EMBEDDING_MAX_RETRIES), 0)
+except ValueError:
+    EMBEDDING_MAX_RETRIES = 5
+
+EMBEDDING_REQUEST_TIMEOUT = os.environ.get("EMBEDDING_REQUEST_TIMEOUT", "300")
+
+try:
+    EMBEDDING_REQUEST_TIMEOUT = max(int(EMBEDDING_REQUEST_TIMEOUT), 1)
+except ValueError:
+    EMBEDDING_REQUEST_TIMEOUT = 300
+
+####################################
+# JOB QUEUE
+####################################
+
+# Worker threads per process running background ingestion jobs
+# (file processing, knowledge base reindexing); 0 disables the workers
+JOB_QUEUE_WORKERS = os.environ.get("JOB_QUEUE_WORKERS", "2")
+
+try:
+    JOB_QUEUE_WORKERS = max(int(JOB_QUEUE_WORKERS), 0)
+except ValueError:
+    JOB_QUEUE_WORKERS = 2
+
+# Seconds without a heartbeat after which a running job is considered
+# abandoned (e.g. its process was restarted) and queued again
+JOB_QUEUE_STALE_TIMEOUT = os.environ.get("JOB_QUEUE_STALE_TIMEOUT", "300")
+
+try:
+    JOB_QUEUE_STALE_TIMEOUT = max(int(JOB_QUEUE_STALE_TIMEOUT), 30)
+except ValueError:
+    JOB_QUEUE_STALE_TIMEOUT = 300
+
+####################################
+# FILE PROCESSING PIPELINE
+####################################
+
+# Processes parsing and splitting files of batch uploads with the local
+# content extraction engine; 0 (default) parses them in threads of the server
+# process. Opt-in: every uvicorn worker spawns its own pool on the first batch,
+# and each of its processes holds a full copy of the document loaders.
+FILE_PROCESSING_WORKERS = os.environ.get("FILE_PROCESSING_WORKERS", "0")
+
+try:
+    FILE_PROCESSING_WORKERS = max(int(FILE_PROCESSING_WORKERS), 0)
+except ValueError:
+    FILE_PROCESSING_WORKERS = 0
+
+# Files of a batch fetched, extracted (remote engines) and embedded at a time
+FILE_PROCESSING_CONCURRENCY = os.environ.get("FILE_PROCESSING_CONCURRENCY", "4")
+
+try:
+    FILE_PROCESSING_CONCURRENCY = max(int(FILE_PROCESSING_CONCURRENCY), 1)
+except ValueError:
+    FILE_PROCESSING_CONCURRENCY = 4
+
+# Files larger than this (bytes) are loaded, split, embedded and inserted as
+# a stream of bounded windows; only this much of their text is stored as the
+# file content
+FILE_STREAMING_THRESHOLD = os.environ.get(
+    "FILE_STREAMING_THRESHOLD", str(16 * 1024 * 1024)
+)
+
+try:
+    FILE_STREAMING_THRESHOLD = max(int(FILE_STREAMING_THRESHOLD), 1024 * 1024)
+except ValueError:
+    FILE_STREAMING_THRESHOLD = 16 * 1024 * 1024
+
+####################################
+# VECTOR SEARCH
+####################################
+
+# Threads shared by all requests for searching several collections in parallel
+# on vector DBs without a native multi-collection search
+VECTOR_SEARCH_WORKERS = os.environ.get("VECTOR_SEARCH_WORKERS", "16")
+
+try:
+    VECTOR_SEARCH_WORKERS = max(int(VECTOR_SEARCH_WORKERS), 1)
+except ValueError:
+    VECTOR_SEARCH_WORKERS = 16
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -452,6 +633,70 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
 )
 
 
+# Pooled client sessions shared by the Ollama/OpenAI proxies, one per upstream
+AIOHTTP_CLIENT_POOL_LIMIT = os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "100")
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT = int(AIOHTTP_CLIENT_POOL_LIMIT)
+except Exception:
+    AIOHTTP_CLIENT_POOL_LIMIT = 100
+
+AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST", "0"
+)
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = int(AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST)
+except Exception:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = 0
+
+AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT", "30"
+)
+
+try:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT)
+except Exception:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = 30.0
+
+AIOHTTP_CLIENT_DNS_CACHE_TTL = os.environ.get("AIOHTTP_CLIENT_DNS_CACHE_TTL", "300")
+
+if AIOHTTP_CLIENT_DNS_CACHE_TTL == "":
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = None
+else:
+    try:
+        AIOHTTP_CLIENT_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_DNS_CACHE_TTL)
+    except Exception:
+        AIOHTTP_CLIENT_DNS_CACHE_TTL = 300
+
+
+UPSTREAM_LOAD_BALANCING_STRATEGY = os.environ.get(
+    "UPSTREAM_LOAD_BALANCING_STRATEGY", "least_requests"
+).lower()
+
+if UPSTREAM_LOAD_BALANCING_STRATEGY not in [
+    "random",
+    "least_requests",
+    "ewma",
+    "power_of_two",
+]:
+    UPSTREAM_LOAD_BALANCING_STRATEGY = "least_requests"
+
+UPSTREAM_MAX_FAILURES = os.environ.get("UPSTREAM_MAX_FAILURES", "3")
+
+try:
+    UPSTREAM_MAX_FAILURES = int(UPSTREAM_MAX_FAILURES)
+except Exception:
+    UPSTREAM_MAX_FAILURES = 3
+
+UPSTREAM_EJECTION_TIME = os.environ.get("UPSTREAM_EJECTION_TIME", "30")
+
+try:
+    UPSTREAM_EJECTION_TIME = float(UPSTREAM_EJECTION_TIME)
+except Exception:
+    UPSTREAM_EJECTION_TIME = 30.0
+
+
 ####################################
 # SENTENCE TRANSFORMERS
 ####################################
@@ -70,6 +70,7 @@ from open_webui.routers import (
     groups,
     files,
     functions,
+    jobs,
     memories,
     models,
     knowledge,
@@ -396,7 +397,13 @@ from open_webui.utils.chat import (
     chat_action as chat_action_handler,
 )
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
-from open_webui.utils.access_control import has_access
+from open_webui.utils.chat_buffer import CHAT_WRITE_BUFFER
+from open_webui.utils.http_sessions import CLIENT_SESSIONS
+from open_webui.utils.load_balancer import UPSTREAM_BALANCER
+from open_webui.retrieval.embedding_cache import CHUNK_EMBEDDINGS, EMBEDDING_CACHE
+from open_webui.retrieval.pipeline import FILE_PROCESSING_PIPELINE
+from open_webui.utils.jobs import JOB_QUEUE
+from open_webui.utils.access_control import get_user_group_ids, has_access
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -478,9 +485,23 @@ async def lifespan(app: FastAPI):
         limiter.total_tokens = THREAD_POOL_SIZE
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    await JOB_QUEUE.start(app)
+
+    # Responses of a worker that died mid-stream left message-level rows behind
+    try:
+        compacted = await asyncio.to_thread(Chats.compact_stale_chat_messages)
+        if compacted:
+            log.info(f"Compacted the pending messages of {compacted} chats")
+    except Exception as e:
+        log.exception(f"Error compacting pending chat messages: {e}")
 
     yield
 
+    await JOB_QUEUE.shutdown()
+    FILE_PROCESSING_PIPELINE.shutdown()
+    await CHAT_WRITE_BUFFER.shutdown()
+    await CLIENT_SESSIONS.close()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -1046,6 +1067,7 @@ app.include_router(memories.router, prefix="/api/v1/memories", tags=["memories"]
 app.include_router(folders.router, prefix="/api/v1/folders", tags=["folders"])
 app.include_router(groups.router, prefix="/api/v1/groups", tags=["groups"])
 app.include_router(files.router, prefix="/api/v1/files", tags=["files"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
 app.include_router(functions.router, prefix="/api/v1/functions", tags=["functions"])
 app.include_router(
     evaluations.router, prefix="/api/v1/evaluations", tags=["evaluations"]
@@ -1076,6 +1098,9 @@ if audit_level != AuditLevel.NONE:
 @app.get("/api/models")
 async def get_models(request: Request, user=Depends(get_verified_user)):
     def get_filtered_models(models, user):
+        model_infos = {model.id: model for model in Models.get_all_models()}
+        user_group_ids = get_user_group_ids(user.id)
+
         filtered_models = []
         for model in models:
             if model.get("arena"):
@@ -1085,14 +1110,18 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
                     access_control=model.get("info", {})
                     .get("meta", {})
                     .get("access_control", {}),
+                    user_group_ids=user_group_ids,
                 ):
                     filtered_models.append(model)
                 continue
 
-            model_info = Models.get_model_by_id(model["id"])
+            model_info = model_infos.get(model["id"])
             if model_info:
                 if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
+                    user.id,
+                    type="read",
+                    access_control=model_info.access_control,
+                    user_group_ids=user_group_ids,
                 ):
                     filtered_models.append(model)
 
@@ -1453,6 +1482,18 @@ async def update_webhook_url(form_data: UrlForm, user=Depends(get_admin_user)):
     return {"url": app.state.config.WEBHOOK_URL}
 
 
+@app.get("/api/metrics")
+async def get_app_metrics(user=Depends(get_admin_user)):
+    return {
+        "chat_write_buffer": CHAT_WRITE_BUFFER.get_stats(),
+        "client_sessions": CLIENT_SESSIONS.get_stats(),
+        "upstreams": UPSTREAM_BALANCER.get_stats(),
+        "embedding_cache": EMBEDDING_CACHE.get_stats(),
+        "chunk_embeddings": CHUNK_EMBEDDINGS.get_stats(),
+        "jobs": JOB_QUEUE.get_stats(),
+    }
+
+
 @app.get("/api/version")
 async def get_app_version():
     return {
@@ -0,0 +1,33 @@
+"""Add chat_message_delta table
+
+Revision ID: b6d2e8f41a07
+Revises: e4a1b7c2d9f3
+Create Date: 2025-06-02 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b6d2e8f41a07"
+down_revision = "e4a1b7c2d9f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "chat_message_delta",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("message_id", sa.Text(), nullable=False),
+        sa.Column("start", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index("chat_message_delta_chat_id_idx", "chat_message_delta", ["chat_id"])
+
+
+def downgrade():
+    op.drop_index("chat_message_delta_chat_id_idx", table_name="chat_message_delta")
+    op.drop_table("chat_message_delta")
@@ -0,0 +1,41 @@
+"""Add job table
+
+Revision ID: e4a1b7c2d9f3
+Revises: d31026856c01
+Create Date: 2025-05-28 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e4a1b7c2d9f3"
+down_revision = "d31026856c01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "job",
+        sa.Column("id", sa.Text(), nullable=False, primary_key=True, unique=True),
+        sa.Column("user_id", sa.Text(), nullable=True),
+        sa.Column("type", sa.Text(), nullable=True),
+        sa.Column("status", sa.Text(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("progress", sa.JSON(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("cancel_requested", sa.Boolean(), nullable=True),
+        sa.Column("worker_id", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index("job_status_idx", "job", ["status", "created_at"])
+    op.create_index("job_user_id_idx", "job", ["user_id"])
+
+
+def downgrade():
+    op.drop_index("job_user_id_idx", table_name="job")
+    op.drop_index("job_status_idx", table_name="job")
+    op.drop_table("job")
@@ -0,0 +1,332 @@
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    Integer,
+    Text,
+    JSON,
+    PrimaryKeyConstraint,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# ChatMessage DB Schema
+####################
+
+# Message-level storage for real-time chat saving. While a response is streaming,
+# each message is written to its own row (keyed by chat_id/message_id) instead of
+# rewriting the whole `chat` JSON blob, and the rows are compacted back into
+# `Chat.chat` once the response completes. The streamed content itself is
+# appended to chat_message_delta, one small row per write: the content is
+# `previous[:start] + content`, so a delta only carries what changed.
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    chat_id = Column(Text)
+    message_id = Column(Text)
+    data = Column(JSON)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("chat_id", "message_id", name="pk_chat_id_message_id"),
+    )
+
+
+class ChatMessageDelta(Base):
+    __tablename__ = "chat_message_delta"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(Text, nullable=False)
+    message_id = Column(Text, nullable=False)
+    start = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+
+    created_at = Column(BigInteger)
+
+    __table_args__ = (Index("chat_message_delta_chat_id_idx", "chat_id"),)
+
+
+class ChatMessageModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    chat_id: str
+    message_id: str
+    data: dict = {}
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+def get_content_delta(previous: str, content: str) -> tuple[int, str]:
+    """Return (start, suffix) such that `content == previous[:start] + suffix`."""
+    if content.startswith(previous):
+        return len(previous), content[len(previous) :]
+
+    # Longest common prefix by bisection; slice comparisons run at memcmp speed
+    low, high = 0, min(len(previous), len(content))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if previous[:mid] == content[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low, content[low:]
+
+
+def apply_content_deltas(deltas) -> str:
+    """Rebuild a message content from its (start, content) deltas, in order."""
+    parts: list[str] = []
+    length = 0
+    for start, content in deltas:
+        if start != length:
+            # Rewrite of the tail (e.g. a reasoning block was closed), rare
+            parts = ["".join(parts)[:start]]
+            length = start
+        parts.append(content)
+        length += len(content)
+    return "".join(parts)
+
+
+class ChatMessageTable:
+    def upsert_message_by_chat_id_and_message_id(
+        self, chat_id: str, message_id: str, message: dict
+    ) -> Optional[ChatMessageModel]:
+        try:
+            with get_db() as db:
+                chat_message = db.get(ChatMessage, (chat_id, message_id))
+
+                if chat_message:
+                    chat_message.data = {**(chat_message.data or {}), **message}
+                    chat_message.updated_at = int(time.time())
+                else:
+                    chat_message = ChatMessage(
+                        **{
+                            "chat_id": chat_id,
+                            "message_id": message_id,
+                            "data": message,
+                            "created_at": int(time.time()),
+                            "updated_at": int(time.time()),
+                        }
+                    )
+                    db.add(chat_message)
+
+                db.commit()
+                db.refresh(chat_message)
+                return ChatMessageModel.model_validate(chat_message)
+        except Exception as e:
+            log.exception(
+                f"Error upserting message {message_id} of chat {chat_id}: {e}"
+            )
+            return None
+
+    def append_message_content_by_chat_id_and_message_id(
+        self, chat_id: str, message_id: str, start: int, content: str
+    ) -> bool:
+        """Replace the content of a message from `start` on with `content`."""
+        try:
+            with get_db() as db:
+                db.add(
+                    ChatMessageDelta(
+                        chat_id=chat_id,
+                        message_id=message_id,
+                        start=start,
+                        content=content,
+                        created_at=int(time.time()),
+                    )
+                )
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(
+                f"Error appending content of message {message_id} of chat {chat_id}: {e}"
+            )
+            return False
+
+    def get_pending_chat_ids(self, chat_ids: list[str]) -> set[str]:
+        """Which of `chat_ids` have message-level rows not yet compacted."""
+        if not chat_ids:
+            return set()
+
+        with get_db() as db:
+            return {
+                row[0]
+                for row in db.query(ChatMessage.chat_id)
+                .filter(ChatMessage.chat_id.in_(chat_ids))
+                .distinct()
+                .all()
+            } | {
+                row[0]
+                for row in db.query(ChatMessageDelta.chat_id)
+                .filter(ChatMessageDelta.chat_id.in_(chat_ids))
+                .distinct()
+                .all()
+            }
+
+    def get_stale_chat_ids(self, updated_before: int) -> list[str]:
+        """
+        Ids of the chats whose message-level rows were all last written before
+        `updated_before`, e.g. left behind by a worker that died mid-stream.
+        """
+        with get_db() as db:
+            chat_ids = {
+                row[0] for row in db.query(ChatMessage.chat_id).distinct().all()
+            } | {row[0] for row in db.query(ChatMessageDelta.chat_id).distinct().all()}
+            active_chat_ids = {
+                row[0]
+                for row in db.query(ChatMessage.chat_id)
+                .filter(ChatMessage.updated_at >= updated_before)
+                .distinct()
+                .all()
+            } | {
+                row[0]
+                for row in db.query(ChatMessageDelta.chat_id)
+                .filter(ChatMessageDelta.created_at >= updated_before)
+                .distinct()
+                .all()
+            }
+            return sorted(chat_ids - active_chat_ids)
+
+    def get_messages_by_chat_ids(
+        self, chat_ids: list[str]
+    ) -> dict[str, list[ChatMessageModel]]:
+        """
+        Pending messages per chat, oldest first, with the content rebuilt from
+        the deltas of each message.
+        """
+        if not chat_ids:
+            return {}
+
+        with get_db() as db:
+            chat_messages = (
+                db.query(ChatMessage)
+                .filter(ChatMessage.chat_id.in_(chat_ids))
+                .order_by(ChatMessage.updated_at.asc())
+                .all()
+            )
+            deltas = (
+                db.query(
+                    ChatMessageDelta.chat_id,
+                    ChatMessageDelta.message_id,
+                    ChatMessageDelta.start,
+                    ChatMessageDelta.content,
+                    ChatMessageDelta.created_at,
+                )
+                .filter(ChatMessageDelta.chat_id.in_(chat_ids))
+                .order_by(ChatMessageDelta.id.asc())
+                .all()
+            )
+
+            messages: dict[tuple[str, str], ChatMessageModel] = {
+                (chat_message.chat_id, chat_message.message_id): (
+                    ChatMessageModel.model_validate(chat_message)
+                )
+                for chat_message in chat_messages
+            }
+
+        message_deltas: dict[tuple[str, str], list] = {}
+        for chat_id, message_id, start, content, created_at in deltas:
+            message_deltas.setdefault((chat_id, message_id), []).append(
+                (start, content, created_at)
+            )
+
+        for key, key_deltas in message_deltas.items():
+            content = apply_content_deltas(
+                (start, content) for start, content, _ in key_deltas
+            )
+            message = messages.get(key)
+            if message is None:
+                message = ChatMessageModel(
+                    chat_id=key[0],
+                    message_id=key[1],
+                    data={},
+                    created_at=key_deltas[0][2],
+                    updated_at=key_deltas[-1][2],
+                )
+                messages[key] = message
+            message.data = {**message.data, "content": content}
+
+        result: dict[str, list[ChatMessageModel]] = {}
+        for message in sorted(messages.values(), key=lambda m: m.updated_at):
+            result.setdefault(message.chat_id, []).append(message)
+        return result
+
+    def get_messages_by_chat_id(self, chat_id: str) -> list[ChatMessageModel]:
+        return self.get_messages_by_chat_ids([chat_id]).get(chat_id, [])
+
+    def delete_messages_by_chat_id(
+        self, chat_id: str, message_id: Optional[str] = None
+    ) -> bool:
+        try:
+            with get_db() as db:
+                filters = {"chat_id": chat_id}
+                if message_id is not None:
+                    filters["message_id"] = message_id
+
+                db.query(ChatMessage).filter_by(**filters).delete()
+                db.query(ChatMessageDelta).filter_by(**filters).delete()
+                db.commit()
+
+                return True
+        except Exception:
+            return False
+
+    def delete_messages_by_chat_ids(self, chat_ids: list[str]) -> bool:
+        if not chat_ids:
+            return True
+
+        try:
+            with get_db() as db:
+                db.query(ChatMessage).filter(ChatMessage.chat_id.in_(chat_ids)).delete(
+                    synchronize_session=False
+                )
+                db.query(ChatMessageDelta).filter(
+                    ChatMessageDelta.chat_id.in_(chat_ids)
+                ).delete(synchronize_session=False)
+                db.commit()
+
+                return True
+        except Exception:
+            return False
+
+
+class ChatMessageContentWriter:
+    """
+    Writes the streamed content of a message to message-level storage as a
+    delta against the previous write, so the cost of a write follows the size
+    of the delta rather than of the message.
+    """
+
+    def __init__(self, chat_id: str, message_id: str):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.content: Optional[str] = None
+
+    def write(self, content: str):
+        if self.content is None:
+            start, suffix = 0, content
+        else:
+            start, suffix = get_content_delta(self.content, content)
+            if start == len(self.content) and not suffix:
+                return
+
+        if ChatMessages.append_message_content_by_chat_id_and_message_id(
+            self.chat_id, self.message_id, start, suffix
+        ):
+            self.content = content
+
+
+ChatMessages = ChatMessageTable()
@@ -2,10 +2,11 @@ import logging
 import json
 import time
 import uuid
-from typing import Optional
+from typing import Callable, Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
+from open_webui.models.chat_messages import ChatMessages
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
@@ -105,6 +106,17 @@ class ChatTitleIdResponse(BaseModel):
 
 
 class ChatTable:
+    def __init__(self):
+        # Set by the chat write buffer (utils/chat_buffer.py): writes the updates
+        # it holds for the given chats and returns the ids of those it wrote, so
+        # that they land before the chats are read or written directly
+        self.pending_writes_flusher: Optional[Callable[[list[str]], set[str]]] = None
+
+    def _flush_pending_writes(self, chat_ids: list[str]) -> set[str]:
+        if self.pending_writes_flusher is None or not chat_ids:
+            return set()
+        return self.pending_writes_flusher(chat_ids)
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -159,6 +171,7 @@ class ChatTable:
             return ChatModel.model_validate(result) if result else None
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
+        self._flush_pending_writes([id])
         try:
             with get_db() as db:
                 chat_item = db.get(Chat, id)
@@ -225,14 +238,7 @@ class ChatTable:
 
         return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
 
-    def upsert_message_to_chat_by_id_and_message_id(
-        self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
+    def _merge_message_into_chat(self, chat: dict, message_id: str, message: dict):
         history = chat.get("history", {})
 
         if message_id in history.get("messages", {}):
@@ -246,8 +252,96 @@ class ChatTable:
         history["currentId"] = message_id
 
         chat["history"] = history
+        return chat
+
+    def upsert_message_to_chat_by_id_and_message_id(
+        self, id: str, message_id: str, message: dict
+    ) -> Optional[ChatModel]:
+        chat = self.get_chat_by_id(id)
+        if chat is None:
+            return None
+
+        chat = self._merge_message_into_chat(chat.chat, message_id, message)
         return self.update_chat_by_id(id, chat)
 
+    def compact_chat_messages_by_id(
+        self, id: str, message_id: Optional[str] = None
+    ) -> Optional[ChatModel]:
+        """
+        Fold the pending message-level rows of a chat, or of one of its
+        messages, back into `Chat.chat`.
+        """
+        chat_messages = [
+            chat_message
+            for chat_message in ChatMessages.get_messages_by_chat_id(id)
+            if message_id is None or chat_message.message_id == message_id
+        ]
+        if not chat_messages:
+            return self.get_chat_by_id(id)
+
+        chat = self._get_chat_by_id(id)
+        if chat is None:
+            ChatMessages.delete_messages_by_chat_id(id)
+            return None
+
+        chat = chat.chat
+        for chat_message in chat_messages:
+            chat = self._merge_message_into_chat(
+                chat, chat_message.message_id, chat_message.data
+            )
+
+        result = self.update_chat_by_id(id, chat)
+        if result:
+            ChatMessages.delete_messages_by_chat_id(id, message_id=message_id)
+        return result
+
+    def compact_stale_chat_messages(self, timeout: int = 300) -> int:
+        """
+        Compact the message-level rows no worker wrote to for `timeout` seconds,
+        e.g. those of a response whose worker died mid-stream.
+        """
+        chat_ids = ChatMessages.get_stale_chat_ids(int(time.time()) - timeout)
+        for chat_id in chat_ids:
+            self.compact_chat_messages_by_id(chat_id)
+        return len(chat_ids)
+
+    def _overlay_chat_messages(
+        self,
+        chats: list[ChatModel],
+        chat_messages: Optional[dict[str, list]] = None,
+    ) -> list[ChatModel]:
+        """
+        Overlay the messages still being streamed into message-level storage,
+        so every read sees them before they are compacted into `Chat.chat`.
+        """
+        if chat_messages is None:
+            chat_ids = [chat.id for chat in chats]
+            if not chat_ids:
+                return chats
+            # Chats with buffered writes are read again once those are written
+            flushed_chat_ids = self._flush_pending_writes(chat_ids)
+            if flushed_chat_ids:
+                chats = [
+                    (
+                        (self._get_chat_by_id(chat.id) or chat)
+                        if chat.id in flushed_chat_ids
+                        else chat
+                    )
+                    for chat in chats
+                ]
+
+            pending_chat_ids = ChatMessages.get_pending_chat_ids(chat_ids)
+            chat_messages = ChatMessages.get_messages_by_chat_ids(
+                [chat_id for chat_id in chat_ids if chat_id in pending_chat_ids]
+            )
+
+        for chat in chats:
+            for chat_message in chat_messages.get(chat.id, []):
+                chat.chat = self._merge_message_into_chat(
+                    chat.chat, chat_message.message_id, chat_message.data
+                )
+        return chats
+
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
     ) -> Optional[ChatModel]:
@@ -387,7 +481,8 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def get_chat_list_by_user_id(
         self,
@@ -409,7 +504,8 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -460,9 +556,11 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
-    def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
+    def _get_chat_by_id(self, id: str) -> Optional[ChatModel]:
+        self._flush_pending_writes([id])
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
@@ -470,6 +568,15 @@ class ChatTable:
         except Exception:
             return None
 
+    def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
+        # Pending messages are read first: a compaction committing in between
+        # then only makes them redundant, never lost
+        chat_messages = ChatMessages.get_messages_by_chat_ids([id])
+        chat = self._get_chat_by_id(id)
+        if chat is None:
+            return None
+        return self._overlay_chat_messages([chat], chat_messages)[0]
+
     def get_chat_by_share_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
@@ -485,13 +592,17 @@ class ChatTable:
             return None
 
     def get_chat_by_id_and_user_id(self, id: str, user_id: str) -> Optional[ChatModel]:
+        chat_messages = ChatMessages.get_messages_by_chat_ids([id])
+        self._flush_pending_writes([id])
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                chat = ChatModel.model_validate(chat)
         except Exception:
             return None
 
+        return self._overlay_chat_messages([chat], chat_messages)[0]
+
     def get_chats(self, skip: int = 0, limit: int = 50) -> list[ChatModel]:
         with get_db() as db:
             all_chats = (
@@ -499,7 +610,8 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -508,7 +620,8 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -517,7 +630,8 @@ class ChatTable:
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -526,7 +640,8 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -677,7 +792,8 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
@@ -690,7 +806,8 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -705,7 +822,8 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -757,7 +875,8 @@ class ChatTable:
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            chats = [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._overlay_chat_messages(chats)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -857,6 +976,7 @@ class ChatTable:
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
+                ChatMessages.delete_messages_by_chat_id(id)
                 return True and self.delete_shared_chat_by_chat_id(id)
         except Exception:
             return False
@@ -867,6 +987,7 @@ class ChatTable:
                 db.query(Chat).filter_by(id=id, user_id=user_id).delete()
                 db.commit()
 
+                ChatMessages.delete_messages_by_chat_id(id)
                 return True and self.delete_shared_chat_by_chat_id(id)
         except Exception:
             return False
@@ -876,10 +997,13 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                chat_ids = [
+                    row[0] for row in db.query(Chat.id).filter_by(user_id=user_id)
+                ]
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
-                return True
+                return ChatMessages.delete_messages_by_chat_ids(chat_ids)
         except Exception:
             return False
 
@@ -888,10 +1012,16 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                chat_ids = [
+                    row[0]
+                    for row in db.query(Chat.id).filter_by(
+                        user_id=user_id, folder_id=folder_id
+                    )
+                ]
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
-                return True
+                return ChatMessages.delete_messages_by_chat_ids(chat_ids)
         except Exception:
             return False
 
@@ -5,9 +5,17 @@ from typing import Optional
 import uuid
 
 from open_webui.internal.db import Base, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+    USER_CACHE_TTL,
+)
 
 from open_webui.models.files import FileMetadataResponse
+from open_webui.utils.cache import CacheGeneration, TTLCache
+from open_webui.utils.redis import get_sentinels_from_env
 
 
 from pydantic import BaseModel, ConfigDict
@@ -88,6 +96,26 @@ class GroupUpdateForm(GroupForm):
 
 
 class GroupTable:
+    def __init__(self):
+        # user_id -> (version, groups) for get_groups_by_member_id; a group write
+        # through any worker bumps `version` (see get_permissions)
+        self.member_cache = TTLCache(max_size=10000, ttl=USER_CACHE_TTL)
+        self.cache_generation = CacheGeneration(
+            "open-webui:groups:generation",
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+        )
+
+    @property
+    def version(self) -> int:
+        return self.cache_generation.get()
+
+    def invalidate_cache(self):
+        self.member_cache.clear()
+        self.cache_generation.bump()
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -107,6 +135,7 @@ class GroupTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                self.invalidate_cache()
                 if result:
                     return GroupModel.model_validate(result)
                 else:
@@ -123,8 +152,14 @@ class GroupTable:
             ]
 
     def get_groups_by_member_id(self, user_id: str) -> list[GroupModel]:
+        version = self.version if USER_CACHE_TTL > 0 else 0
+        if USER_CACHE_TTL > 0:
+            entry = self.member_cache.get(user_id)
+            if entry and entry[0] == version:
+                return [group.model_copy(deep=True) for group in entry[1]]
+
         with get_db() as db:
-            return [
+            groups = [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
                 .filter(
@@ -137,6 +172,12 @@ class GroupTable:
                 .all()
             ]
 
+        if USER_CACHE_TTL > 0:
+            self.member_cache.set(
+                user_id, (version, [group.model_copy(deep=True) for group in groups])
+            )
+        return groups
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -164,6 +205,7 @@ class GroupTable:
                     }
                 )
                 db.commit()
+                self.invalidate_cache()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -174,6 +216,7 @@ class GroupTable:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
                 db.commit()
+                self.invalidate_cache()
                 return True
         except Exception:
             return False
@@ -183,6 +226,7 @@ class GroupTable:
             try:
                 db.query(Group).delete()
                 db.commit()
+                self.invalidate_cache()
 
                 return True
             except Exception:
@@ -203,6 +247,7 @@ class GroupTable:
                     )
                     db.commit()
 
+                self.invalidate_cache()
                 return True
             except Exception:
                 return False
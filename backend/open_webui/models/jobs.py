@@ -0,0 +1,239 @@
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Boolean, Column, Text, JSON
+
+####################
+# Job DB Schema
+####################
+
+
+class Job(Base):
+    __tablename__ = "job"
+
+    id = Column(Text, primary_key=True)
+    user_id = Column(Text)
+
+    type = Column(Text)
+    # pending, running, completed, failed, cancelled
+    status = Column(Text)
+
+    data = Column(JSON, nullable=True)
+    progress = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    cancel_requested = Column(Boolean, default=False)
+    worker_id = Column(Text, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+class JobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+
+    type: str
+    status: str
+
+    data: Optional[dict] = None
+    progress: Optional[dict] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    cancel_requested: bool = False
+    worker_id: Optional[str] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+####################
+# Forms
+####################
+
+
+class JobResponse(BaseModel):
+    id: str
+    user_id: str
+    type: str
+    status: str
+    progress: Optional[dict] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: int
+    updated_at: int
+
+
+class JobTable:
+    def insert_new_job(
+        self, user_id: str, type: str, data: Optional[dict] = None
+    ) -> Optional[JobModel]:
+        with get_db() as db:
+            job = JobModel(
+                **{
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "type": type,
+                    "status": "pending",
+                    "data": data,
+                    "created_at": int(time.time()),
+                    "updated_at": int(time.time()),
+                }
+            )
+
+            db.add(Job(**job.model_dump()))
+            db.commit()
+            return job
+
+    def get_job_by_id(self, id: str) -> Optional[JobModel]:
+        with get_db() as db:
+            job = db.query(Job).filter_by(id=id).first()
+            return JobModel.model_validate(job) if job else None
+
+    def get_jobs_by_user_id(
+        self, user_id: str, status: Optional[str] = None, limit: int = 100
+    ) -> list[JobModel]:
+        with get_db() as db:
+            query = db.query(Job).filter_by(user_id=user_id)
+            if status:
+                query = query.filter_by(status=status)
+            jobs = query.order_by(Job.created_at.desc()).limit(limit).all()
+            return [JobModel.model_validate(job) for job in jobs]
+
+    def claim_next_job(self, worker_id: str, types: list[str]) -> Optional[JobModel]:
+        """
+        Atomically move the oldest pending job to running for `worker_id`;
+        the conditional update makes sure only one worker gets it.
+        """
+        with get_db() as db:
+            candidates = (
+                db.query(Job.id)
+                .filter(Job.status == "pending", Job.type.in_(types))
+                .order_by(Job.created_at)
+                .limit(10)
+                .all()
+            )
+            for (id,) in candidates:
+                claimed = (
+                    db.query(Job)
+                    .filter_by(id=id, status="pending")
+                    .update(
+                        {
+                            "status": "running",
+                            "worker_id": worker_id,
+                            "updated_at": int(time.time()),
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+                if claimed:
+                    return JobModel.model_validate(
+                        db.query(Job).filter_by(id=id).first()
+                    )
+            return None
+
+    def update_job_progress(self, id: str, progress: dict) -> Optional[JobModel]:
+        with get_db() as db:
+            db.query(Job).filter_by(id=id).update(
+                {"progress": progress, "updated_at": int(time.time())}
+            )
+            db.commit()
+            return self.get_job_by_id(id)
+
+    def update_job_status(
+        self,
+        id: str,
+        status: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> Optional[JobModel]:
+        with get_db() as db:
+            db.query(Job).filter_by(id=id).update(
+                {
+                    "status": status,
+                    "result": result,
+                    "error": error,
+                    "updated_at": int(time.time()),
+                }
+            )
+            db.commit()
+            return self.get_job_by_id(id)
+
+    def cancel_job_by_id(self, id: str) -> Optional[JobModel]:
+        """Cancel a pending job right away, flag a running one for cancellation."""
+        with get_db() as db:
+            db.query(Job).filter_by(id=id, status="pending").update(
+                {"status": "cancelled", "updated_at": int(time.time())}
+            )
+            db.query(Job).filter_by(id=id, status="running").update(
+                {"cancel_requested": True}
+            )
+            db.commit()
+            return self.get_job_by_id(id)
+
+    def is_cancel_requested(self, id: str) -> bool:
+        with get_db() as db:
+            job = db.query(Job.cancel_requested).filter_by(id=id).first()
+            return bool(job and job.cancel_requested)
+
+    def touch_jobs_by_ids(self, ids: list[str]):
+        if not ids:
+            return
+        with get_db() as db:
+            db.query(Job).filter(Job.id.in_(ids)).update(
+                {"updated_at": int(time.time())}, synchronize_session=False
+            )
+            db.commit()
+
+    def _requeue_jobs(self, db, *criteria) -> int:
+        # Jobs whose cancellation was requested while running end cancelled,
+        # the others start over without a stale cancellation flag
+        db.query(Job).filter(
+            Job.status == "running", Job.cancel_requested == True, *criteria
+        ).update(
+            {
+                "status": "cancelled",
+                "worker_id": None,
+                "cancel_requested": False,
+                "updated_at": int(time.time()),
+            },
+            synchronize_session=False,
+        )
+        count = (
+            db.query(Job)
+            .filter(Job.status == "running", *criteria)
+            .update(
+                {
+                    "status": "pending",
+                    "worker_id": None,
+                    "cancel_requested": False,
+                    "updated_at": int(time.time()),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return count
+
+    def requeue_job_by_id(self, id: str) -> Optional[JobModel]:
+        """Put a running job back into the queue."""
+        with get_db() as db:
+            self._requeue_jobs(db, Job.id == id)
+            return self.get_job_by_id(id)
+
+    def requeue_stale_jobs(self, timeout: int) -> int:
+        """Put running jobs back into the queue whose worker stopped heartbeating."""
+        with get_db() as db:
+            return self._requeue_jobs(db, Job.updated_at < int(time.time()) - timeout)
+
+
+Jobs = JobTable()
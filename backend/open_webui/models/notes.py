@@ -4,7 +4,7 @@ import uuid
 from typing import Optional
 
 from open_webui.internal.db import Base, get_db
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import filter_by_access
 from open_webui.models.users import Users, UserResponse
 
 
@@ -98,12 +98,7 @@ class NoteTable:
         self, user_id: str, permission: str = "write"
     ) -> list[NoteModel]:
         notes = self.get_notes()
-        return [
-            note
-            for note in notes
-            if note.user_id == user_id
-            or has_access(user_id, permission, note.access_control)
-        ]
+        return filter_by_access(user_id, notes, permission)
 
     def get_note_by_id(self, id: str) -> Optional[NoteModel]:
         with get_db() as db:
@@ -2,6 +2,14 @@ import time
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.env import (
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    USER_CACHE_TTL,
+)
+from open_webui.utils.cache import CacheGeneration, TTLCache
+from open_webui.utils.redis import get_sentinels_from_env
 
 
 from open_webui.models.chats import Chats
@@ -102,6 +110,22 @@ class UserUpdateForm(BaseModel):
 
 
 class UsersTable:
+    def __init__(self):
+        # id -> (generation, user), only used by get_user_by_id(cached=True); a
+        # write through any worker bumps the user's generation
+        self.cache = TTLCache(max_size=10000, ttl=USER_CACHE_TTL)
+        self.cache_generation = CacheGeneration(
+            "open-webui:users:generation",
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+        )
+
+    def invalidate_user_cache(self, id: str):
+        self.cache.pop(id)
+        self.cache_generation.bump(id)
+
     def insert_new_user(
         self,
         id: str,
@@ -134,14 +158,31 @@ class UsersTable:
             else:
                 return None
 
-    def get_user_by_id(self, id: str) -> Optional[UserModel]:
+    def get_user_by_id(self, id: str, cached: bool = False) -> Optional[UserModel]:
+        """
+        With `cached`, a lookup from the last USER_CACHE_TTL seconds may be
+        returned instead of querying the database (used on the auth path).
+        """
+        cached = cached and USER_CACHE_TTL > 0
+        if cached:
+            # Read before the query, so that a write racing with it makes the
+            # entry stored below a miss
+            generation = self.cache_generation.get(id)
+            entry = self.cache.get(id)
+            if entry and entry[0] == generation:
+                return entry[1].model_copy(deep=True)
+
         try:
             with get_db() as db:
                 user = db.query(User).filter_by(id=id).first()
-                return UserModel.model_validate(user)
+                user = UserModel.model_validate(user)
         except Exception:
             return None
 
+        if cached:
+            self.cache.set(id, (generation, user.model_copy(deep=True)))
+        return user
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -274,6 +315,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                self.invalidate_user_cache(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -288,6 +330,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -314,6 +357,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -325,6 +369,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -344,6 +389,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -362,6 +408,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                    self.invalidate_user_cache(id)
 
                 return True
             else:
@@ -374,6 +421,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                self.invalidate_user_cache(id)
                 return True if result == 1 else False
         except Exception:
             return False
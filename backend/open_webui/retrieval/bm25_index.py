@@ -0,0 +1,562 @@
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+from open_webui.config import BM25_INDEX_PATH, ENABLE_BM25_INDEX
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Same parameters and tokenization as langchain's BM25Retriever (rank_bm25.BM25Okapi)
+K1 = 1.5
+B = 0.75
+EPSILON = 0.25
+
+
+def tokenize(text: str) -> list[str]:
+    return text.split()
+
+
+class BM25Segment:
+    """
+    An immutable batch of indexed documents.
+
+    Files:
+      - terms.json: term -> [start, end) range into the postings
+      - postings.npy: int32 (document, term frequency) pairs, grouped by term
+      - doc_lens.npy: token count per document
+      - doc_offsets.npy: byte offsets of each document in docs.jsonl
+      - docs.jsonl: one {"id", "text", "metadata"} object per document
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, "terms.json"), "r", encoding="utf-8") as f:
+            self.terms: dict[str, list[int]] = json.load(f)
+        with open(os.path.join(path, "ids.json"), "r", encoding="utf-8") as f:
+            self.ids: list[str] = json.load(f)
+
+        self.postings = np.load(os.path.join(path, "postings.npy"), mmap_mode="r")
+        self.doc_lens = np.load(os.path.join(path, "doc_lens.npy"))
+        self.doc_offsets = np.load(os.path.join(path, "doc_offsets.npy"))
+
+    @staticmethod
+    def write(path: str, ids: list[str], texts: list[str], metadatas: list[dict]):
+        os.makedirs(path)
+
+        term_postings: dict[str, list[tuple[int, int]]] = {}
+        doc_lens = []
+        for doc_idx, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lens.append(sum(counts.values()))
+            for term, tf in counts.items():
+                term_postings.setdefault(term, []).append((doc_idx, tf))
+
+        terms = {}
+        postings = []
+        for term, term_docs in term_postings.items():
+            terms[term] = [len(postings), len(postings) + len(term_docs)]
+            postings.extend(term_docs)
+
+        doc_offsets = [0]
+        with open(os.path.join(path, "docs.jsonl"), "wb") as f:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                line = json.dumps(
+                    {"id": doc_id, "text": text, "metadata": metadata},
+                    ensure_ascii=False,
+                ).encode("utf-8")
+                f.write(line + b"\n")
+                doc_offsets.append(doc_offsets[-1] + len(line) + 1)
+
+        np.save(
+            os.path.join(path, "postings.npy"),
+            np.asarray(postings, dtype=np.int32).reshape(-1, 2),
+        )
+        np.save(os.path.join(path, "doc_lens.npy"), np.asarray(doc_lens, np.int32))
+        np.save(
+            os.path.join(path, "doc_offsets.npy"), np.asarray(doc_offsets, np.int64)
+        )
+        with open(os.path.join(path, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(path, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+
+    def get_documents(self, doc_idxs: list[int]) -> list[dict]:
+        documents = []
+        with open(os.path.join(self.path, "docs.jsonl"), "rb") as f:
+            for doc_idx in doc_idxs:
+                start, end = self.doc_offsets[doc_idx], self.doc_offsets[doc_idx + 1]
+                f.seek(start)
+                documents.append(json.loads(f.read(end - start)))
+        return documents
+
+
+class BM25CollectionIndex:
+    """
+    The segments of one collection plus the corpus statistics BM25 needs.
+
+    Deleted documents are tombstoned per segment; they are skipped when
+    scoring but still count towards the corpus statistics (document count,
+    frequencies, average length) until the next compaction, which is accepted
+    as a small approximation.
+    """
+
+    def __init__(self, path: str, manifest: dict, version: int):
+        self.path = path
+        self.version = version
+
+        self.segments: list[tuple[BM25Segment, set[int]]] = [
+            (
+                BM25Segment(os.path.join(path, segment["name"])),
+                set(segment["deleted"]),
+            )
+            for segment in manifest["segments"]
+        ]
+
+        doc_freqs: Counter = Counter()
+        corpus_size = 0
+        total_len = 0
+        for segment, deleted in self.segments:
+            for term, (start, end) in segment.terms.items():
+                doc_freqs[term] += end - start
+            corpus_size += len(segment.ids)
+            total_len += int(segment.doc_lens.sum())
+
+        self.corpus_size = corpus_size
+        self.avgdl = total_len / corpus_size if corpus_size else 0.0
+
+        # Okapi idf with negative values floored at epsilon * average idf
+        self.idf = {}
+        negative_terms = []
+        for term, freq in doc_freqs.items():
+            idf = math.log(corpus_size - freq + 0.5) - math.log(freq + 0.5)
+            self.idf[term] = idf
+            if idf < 0:
+                negative_terms.append(term)
+
+        average_idf = sum(self.idf.values()) / len(self.idf) if self.idf else 0.0
+        for term in negative_terms:
+            self.idf[term] = EPSILON * average_idf
+
+    def search(self, query: str, k: int) -> list[dict]:
+        if self.corpus_size == 0 or self.avgdl == 0:
+            return []
+
+        tokens = [token for token in tokenize(query) if token in self.idf]
+
+        candidates = []
+        for segment_idx, (segment, deleted) in enumerate(self.segments):
+            scores = np.zeros(len(segment.ids))
+            for token in tokens:
+                if token not in segment.terms:
+                    continue
+                start, end = segment.terms[token]
+                postings = segment.postings[start:end]
+                doc_idxs, tf = postings[:, 0], postings[:, 1].astype(np.float64)
+                doc_lens = segment.doc_lens[doc_idxs]
+                scores[doc_idxs] += (
+                    self.idf[token]
+                    * tf
+                    * (K1 + 1)
+                    / (tf + K1 * (1 - B + B * doc_lens / self.avgdl))
+                )
+
+            if deleted:
+                scores[list(deleted)] = 0.0
+
+            top = np.flatnonzero(scores > 0)
+            if len(top) > k:
+                top = top[np.argpartition(-scores[top], k - 1)[:k]]
+            candidates.extend(
+                (float(scores[doc_idx]), segment_idx, int(doc_idx)) for doc_idx in top
+            )
+
+        candidates = sorted(candidates, key=lambda item: item[0], reverse=True)[:k]
+
+        results = []
+        for score, segment_idx, doc_idx in candidates:
+            segment, _ = self.segments[segment_idx]
+            document = segment.get_documents([doc_idx])[0]
+            results.append({**document, "score": score})
+        return results
+
+
+class BM25Index:
+    """
+    Persistent BM25 indexes, one directory per vector DB collection.
+
+    Hybrid search used to fetch every chunk of a collection from the vector DB
+    and rebuild a BM25 index on each query. Here the index is maintained on
+    ingestion (`add`, `delete`, `drop`) as append-only segments and queried
+    directly; collections without an index are backfilled from the vector DB
+    on first use.
+
+    Writers serialize on a lock file inside the collection directory, so
+    several workers can share the same BM25_INDEX_PATH. Readers reload an
+    index whenever its manifest changed.
+    """
+
+    MAX_SEGMENTS = 8
+    MAX_DELETED_RATIO = 0.25
+    LOCK_TIMEOUT = 30
+    STALE_LOCK_TIME = 300
+
+    def __init__(self, path: str, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+
+        self.indexes: dict[str, BM25CollectionIndex] = {}
+        self.lock = threading.RLock()
+
+    def _get_collection_path(self, collection_name: str) -> str:
+        return os.path.join(self.path, re.sub(r"[^A-Za-z0-9_.-]", "_", collection_name))
+
+    def _get_manifest_path(self, collection_name: str) -> str:
+        return os.path.join(self._get_collection_path(collection_name), "manifest.json")
+
+    def _read_manifest(self, collection_name: str) -> Optional[dict]:
+        try:
+            with open(
+                self._get_manifest_path(collection_name), "r", encoding="utf-8"
+            ) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, collection_name: str, manifest: dict):
+        manifest_path = self._get_manifest_path(collection_name)
+        tmp_path = f"{manifest_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+    @contextmanager
+    def _lock(self, collection_name: str):
+        collection_path = self._get_collection_path(collection_name)
+        os.makedirs(collection_path, exist_ok=True)
+        lock_path = os.path.join(collection_path, ".lock")
+
+        with self.lock:
+            deadline = time.monotonic() + self.LOCK_TIMEOUT
+            while True:
+                try:
+                    fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileNotFoundError:
+                    # The collection was dropped while waiting
+                    os.makedirs(collection_path, exist_ok=True)
+                    continue
+                except FileExistsError:
+                    try:
+                        if time.time() - os.path.getmtime(lock_path) > (
+                            self.STALE_LOCK_TIME
+                        ):
+                            os.remove(lock_path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(
+                            f"Timed out waiting for the BM25 index lock of {collection_name}"
+                        )
+                    time.sleep(0.05)
+
+            try:
+                yield
+            finally:
+                try:
+                    # A dropped collection takes its lock file along, the one at
+                    # lock_path may already belong to another writer
+                    if os.path.samestat(os.fstat(fd), os.stat(lock_path)):
+                        os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+                finally:
+                    os.close(fd)
+
+    def _get_index(self, collection_name: str) -> Optional[BM25CollectionIndex]:
+        try:
+            version = os.stat(self._get_manifest_path(collection_name)).st_mtime_ns
+        except FileNotFoundError:
+            self.indexes.pop(collection_name, None)
+            return None
+
+        index = self.indexes.get(collection_name)
+        if index is None or index.version != version:
+            manifest = self._read_manifest(collection_name)
+            if manifest is None:
+                return None
+            index = BM25CollectionIndex(
+                self._get_collection_path(collection_name), manifest, version
+            )
+            self.indexes[collection_name] = index
+        return index
+
+    def _write_segment(
+        self,
+        collection_name: str,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict],
+    ) -> dict:
+        name = f"segment-{uuid.uuid4().hex}"
+        BM25Segment.write(
+            os.path.join(self._get_collection_path(collection_name), name),
+            ids,
+            texts,
+            metadatas,
+        )
+        return {"name": name, "size": len(ids), "deleted": []}
+
+    def _compact(self, collection_name: str, manifest: dict) -> dict:
+        """
+        Merge segments, dropping deleted documents: all of them once too many
+        documents are deleted, otherwise the smallest ones, so that adding a
+        large file in many batches doesn't rewrite the whole index every few
+        batches.
+        """
+        collection_path = self._get_collection_path(collection_name)
+
+        if self._get_deleted_ratio(manifest) > self.MAX_DELETED_RATIO:
+            merged = manifest["segments"]
+        else:
+            count = len(manifest["segments"]) - self.MAX_SEGMENTS // 2 + 1
+            merged = sorted(manifest["segments"], key=lambda s: s["size"])[:count]
+        merged_names = {segment["name"] for segment in merged}
+
+        ids, texts, metadatas = [], [], []
+        for segment in merged:
+            deleted = set(segment["deleted"])
+            segment_path = os.path.join(collection_path, segment["name"])
+            with open(os.path.join(segment_path, "docs.jsonl"), "rb") as f:
+                for doc_idx, line in enumerate(f):
+                    if doc_idx in deleted:
+                        continue
+                    document = json.loads(line)
+                    ids.append(document["id"])
+                    texts.append(document["text"])
+                    metadatas.append(document["metadata"])
+
+        segments = [
+            segment
+            for segment in manifest["segments"]
+            if segment["name"] not in merged_names
+        ] + [self._write_segment(collection_name, ids, texts, metadatas)]
+        return {**manifest, "segments": segments}
+
+    def _get_deleted_ratio(self, manifest: dict) -> float:
+        size = sum(segment["size"] for segment in manifest["segments"])
+        deleted = sum(len(segment["deleted"]) for segment in manifest["segments"])
+        return deleted / size if size > 0 else 0
+
+    def _needs_compaction(self, manifest: dict) -> bool:
+        return (
+            len(manifest["segments"]) > self.MAX_SEGMENTS
+            or self._get_deleted_ratio(manifest) > self.MAX_DELETED_RATIO
+        )
+
+    def _commit(self, collection_name: str, manifest: dict, previous: Optional[dict]):
+        segments = (previous or {}).get("segments", []) + manifest["segments"]
+        if self._needs_compaction(manifest):
+            manifest = self._compact(collection_name, manifest)
+
+        self._write_manifest(collection_name, manifest)
+
+        # Remove segments that are no longer referenced
+        referenced = {segment["name"] for segment in manifest["segments"]}
+        for segment in segments:
+            if segment["name"] not in referenced:
+                shutil.rmtree(
+                    os.path.join(
+                        self._get_collection_path(collection_name), segment["name"]
+                    ),
+                    ignore_errors=True,
+                )
+
+    def has_index(self, collection_name: str) -> bool:
+        return self.enabled and os.path.exists(self._get_manifest_path(collection_name))
+
+    def add(
+        self,
+        collection_name: str,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict],
+    ):
+        """
+        Index a batch of documents, e.g. right after inserting it into the vector
+        DB. Documents already indexed under the same id are replaced.
+        """
+        if not self.enabled:
+            return
+
+        # Within the batch, the last document with a given id wins
+        positions = {doc_id: idx for idx, doc_id in enumerate(ids)}
+        if len(positions) < len(ids):
+            kept = sorted(positions.values())
+            ids = [ids[idx] for idx in kept]
+            texts = [texts[idx] for idx in kept]
+            metadatas = [metadatas[idx] for idx in kept]
+
+        with self._lock(collection_name):
+            previous = self._read_manifest(collection_name)
+            manifest = previous or {"segments": []}
+            manifest = {
+                **manifest,
+                "segments": self._tombstone_ids(
+                    collection_name, manifest["segments"], set(ids)
+                )
+                + [self._write_segment(collection_name, ids, texts, metadatas)],
+            }
+            self._commit(collection_name, manifest, previous)
+
+    def _tombstone_ids(
+        self, collection_name: str, segments: list[dict], ids: set[str]
+    ) -> list[dict]:
+        collection_path = self._get_collection_path(collection_name)
+
+        tombstoned = []
+        for segment in segments:
+            with open(
+                os.path.join(collection_path, segment["name"], "ids.json"),
+                "r",
+                encoding="utf-8",
+            ) as f:
+                segment_ids = json.load(f)
+
+            deleted = set(segment["deleted"])
+            deleted.update(
+                doc_idx for doc_idx, doc_id in enumerate(segment_ids) if doc_id in ids
+            )
+            tombstoned.append({**segment, "deleted": sorted(deleted)})
+        return tombstoned
+
+    def build(
+        self,
+        collection_name: str,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict],
+    ):
+        """(Re)build the index of a collection from all of its documents."""
+        if not self.enabled:
+            return
+
+        with self._lock(collection_name):
+            previous = self._read_manifest(collection_name)
+            manifest = {
+                "segments": [
+                    self._write_segment(collection_name, ids, texts, metadatas)
+                ]
+            }
+            self._commit(collection_name, manifest, previous)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        """
+        Tombstone documents by id or by metadata filter. Only equality filters
+        are supported; anything else drops the index so that it gets rebuilt
+        from the vector DB on next use.
+        """
+        if not self.enabled or not self.has_index(collection_name):
+            return
+
+        if filter and any(
+            isinstance(value, dict) or key.startswith("$")
+            for key, value in filter.items()
+        ):
+            self.drop(collection_name)
+            return
+
+        ids = set(ids or [])
+        with self._lock(collection_name):
+            previous = self._read_manifest(collection_name)
+            if previous is None:
+                return
+
+            collection_path = self._get_collection_path(collection_name)
+            segments = []
+            for segment in previous["segments"]:
+                deleted = set(segment["deleted"])
+                with open(
+                    os.path.join(collection_path, segment["name"], "docs.jsonl"), "rb"
+                ) as f:
+                    for doc_idx, line in enumerate(f):
+                        if doc_idx in deleted:
+                            continue
+                        document = json.loads(line)
+                        if document["id"] in ids or (
+                            filter
+                            and all(
+                                (document["metadata"] or {}).get(key) == value
+                                for key, value in filter.items()
+                            )
+                        ):
+                            deleted.add(doc_idx)
+                segments.append({**segment, "deleted": sorted(deleted)})
+
+            self._commit(collection_name, {**previous, "segments": segments}, previous)
+
+    def drop(self, collection_name: str):
+        """Remove the index of a collection, e.g. when the collection is deleted."""
+        collection_path = self._get_collection_path(collection_name)
+        with self.lock:
+            self.indexes.pop(collection_name, None)
+        if not os.path.exists(collection_path):
+            return
+
+        # Rename first so that readers never see a half-deleted index, under the
+        # collection lock so that no writer is in the middle of a commit
+        dropped_path = f"{collection_path}.{uuid.uuid4().hex}.dropped"
+        with self._lock(collection_name):
+            try:
+                os.rename(collection_path, dropped_path)
+            except FileNotFoundError:
+                return
+        shutil.rmtree(dropped_path, ignore_errors=True)
+
+    def reset(self):
+        with self.lock:
+            self.indexes = {}
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def search(self, collection_name: str, query: str, k: int) -> list[dict]:
+        """
+        Return up to `k` documents ({"id", "text", "metadata", "score"}) with a
+        positive BM25 score, best first.
+        """
+        for attempt in range(2):
+            with self.lock:
+                index = self._get_index(collection_name)
+            if index is None:
+                return []
+
+            try:
+                return index.search(query, k)
+            except FileNotFoundError:
+                # A segment was compacted away by a concurrent writer, reload
+                if attempt:
+                    raise
+        return []
+
+
+BM25_INDEX = BM25Index(BM25_INDEX_PATH, enabled=ENABLE_BM25_INDEX)
@@ -0,0 +1,341 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Callable, Optional
+
+import numpy as np
+
+from open_webui.config import (
+    CHUNK_EMBEDDING_CACHE_MAX_ENTRIES,
+    CHUNK_EMBEDDING_CACHE_PATH,
+    ENABLE_CHUNK_EMBEDDING_CACHE,
+)
+from open_webui.env import (
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_TTL,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class EmbeddingCache:
+    """
+    Bounded cache of query embeddings keyed by (engine, model, prefix, text).
+
+    Entries live in an in-process LRU for `ttl` seconds. With Redis configured
+    misses fall through to a shared tier, so a query embedded by one worker is
+    reused by the others.
+    """
+
+    KEY_PREFIX = "open-webui:embeddings"
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl: int = 3600,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = [],
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = (
+            get_redis_connection(redis_url, redis_sentinels, decode_responses=True)
+            if redis_url and max_size > 0
+            else None
+        )
+
+        self.entries: OrderedDict[str, tuple[float, list]] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def get_key(engine: str, model: str, prefix: Optional[str], text: str) -> str:
+        digest = hashlib.sha256(
+            json.dumps([engine, model, prefix, text]).encode("utf-8")
+        ).hexdigest()
+        return f"{EmbeddingCache.KEY_PREFIX}:{digest}"
+
+    def _set_local(self, key: str, embedding: list):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, embedding)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[list]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, embedding = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return embedding
+                del self.entries[key]
+
+        if self.redis:
+            try:
+                value = self.redis.get(key)
+                if value:
+                    embedding = json.loads(value)
+                    self._set_local(key, embedding)
+                    with self.lock:
+                        self.redis_hits += 1
+                    return embedding
+            except Exception as e:
+                log.warning(f"Error reading embedding cache from redis: {e}")
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, embedding: list):
+        self._set_local(key, embedding)
+
+        if self.redis:
+            try:
+                self.redis.set(key, json.dumps(embedding), ex=self.ttl)
+            except Exception as e:
+                log.warning(f"Error writing embedding cache to redis: {e}")
+
+    def wrap(self, engine: str, model: str, func: Callable) -> Callable:
+        """
+        Cache single-text calls (queries) of an embedding function with the
+        `(query, prefix=None, user=None)` signature. Batches of documents are
+        passed through.
+        """
+        if not self.enabled:
+            return func
+
+        def cached_func(query, prefix=None, user=None):
+            if not isinstance(query, str):
+                return func(query, prefix, user)
+
+            key = self.get_key(engine, model, prefix, query)
+            embedding = self.get(key)
+            if embedding is None:
+                embedding = func(query, prefix, user)
+                if embedding:
+                    self.set(key, embedding)
+            return embedding
+
+        return cached_func
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            requests = self.hits + self.redis_hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": (
+                    (self.hits + self.redis_hits) / requests if requests else None
+                ),
+            }
+
+
+EMBEDDING_CACHE = EmbeddingCache(
+    max_size=EMBEDDING_CACHE_SIZE,
+    ttl=EMBEDDING_CACHE_TTL,
+    redis_url=REDIS_URL,
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
+
+
+class ChunkEmbeddingStore:
+    """
+    Persistent, content-addressed store of chunk embeddings.
+
+    Vectors are kept as float32 blobs in a SQLite file keyed by the sha256 of
+    (engine, model, prefix, chunk text), so re-chunking or re-adding the same
+    file, or reindexing every knowledge base, only embeds chunks that weren't
+    seen before with the current embedding model.
+
+    The store holds at most `max_entries` vectors: once more are written, the
+    least recently used ones (by `used_at`, refreshed at most hourly on reads)
+    are pruned down to 90% of it.
+    """
+
+    BATCH_SIZE = 500
+    TOUCH_INTERVAL = 60 * 60
+
+    def __init__(self, path: str, enabled: bool = True, max_entries: int = 1000000):
+        self.path = path
+        self.enabled = enabled
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # Upper bound of the row count (replaced rows are counted again),
+        # recounted when pruning
+        self.size = 0
+
+        if self.enabled:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with closing(self._connect()) as conn, conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS chunk_embedding ("
+                        "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                        "created_at INTEGER NOT NULL, used_at INTEGER)"
+                    )
+                    columns = [
+                        row[1]
+                        for row in conn.execute("PRAGMA table_info(chunk_embedding)")
+                    ]
+                    if "used_at" not in columns:
+                        conn.execute(
+                            "ALTER TABLE chunk_embedding ADD COLUMN used_at INTEGER"
+                        )
+                    conn.execute(
+                        "CREATE INDEX IF NOT EXISTS chunk_embedding_used_at_idx "
+                        "ON chunk_embedding (used_at)"
+                    )
+                    self.size = conn.execute(
+                        "SELECT COUNT(*) FROM chunk_embedding"
+                    ).fetchone()[0]
+            except Exception as e:
+                log.warning(f"Chunk embedding cache disabled: {e}")
+                self.enabled = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get_many(self, keys: list[str]) -> dict[str, list]:
+        now = int(time.time())
+        vectors = {}
+        with closing(self._connect()) as conn, conn:
+            for i in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[i : i + self.BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                rows = conn.execute(
+                    "SELECT key, vector FROM chunk_embedding WHERE key IN "
+                    f"({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, vector in rows:
+                    vectors[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+
+                if rows:
+                    conn.execute(
+                        "UPDATE chunk_embedding SET used_at = ? WHERE key IN "
+                        f"({placeholders}) AND "
+                        "(used_at IS NULL OR used_at < ?)",
+                        [now, *batch, now - self.TOUCH_INTERVAL],
+                    )
+        return vectors
+
+    def set_many(self, vectors: dict[str, list]):
+        now = int(time.time())
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunk_embedding "
+                "(key, vector, created_at, used_at) VALUES (?, ?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now, now)
+                    for key, vector in vectors.items()
+                ],
+            )
+
+        with self.lock:
+            self.size += len(vectors)
+            prune = self.size > self.max_entries
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Delete the least recently used vectors down to 90% of `max_entries`."""
+        with closing(self._connect()) as conn, conn:
+            size = conn.execute("SELECT COUNT(*) FROM chunk_embedding").fetchone()[0]
+            excess = size - int(self.max_entries * 0.9)
+            if size > self.max_entries and excess > 0:
+                conn.execute(
+                    "DELETE FROM chunk_embedding WHERE key IN ("
+                    "SELECT key FROM chunk_embedding "
+                    "ORDER BY used_at LIMIT ?)",
+                    (excess,),
+                )
+                size -= excess
+                log.info(f"Pruned {excess} chunk embeddings")
+
+        with self.lock:
+            self.size = size
+
+    def embed(
+        self,
+        engine: str,
+        model: str,
+        prefix: Optional[str],
+        texts: list[str],
+        func: Callable[[list[str]], list],
+    ) -> list:
+        """
+        Return the embeddings of `texts`, calling `func` only for the chunks
+        that aren't stored yet (in a single call, keeping their order).
+        """
+        if not self.enabled:
+            return func(texts)
+
+        keys = [EmbeddingCache.get_key(engine, model, prefix, text) for text in texts]
+        try:
+            vectors = self.get_many(list(set(keys)))
+        except Exception as e:
+            log.warning(f"Error reading chunk embedding cache: {e}")
+            vectors = {}
+
+        missing_keys = list(dict.fromkeys(key for key in keys if key not in vectors))
+        with self.lock:
+            self.hits += len([key for key in keys if key in vectors])
+            self.misses += len(missing_keys)
+
+        if missing_keys:
+            missing_texts = {key: text for key, text in zip(keys, texts)}
+            embeddings = func([missing_texts[key] for key in missing_keys])
+            new_vectors = {
+                key: embedding
+                for key, embedding in zip(missing_keys, embeddings)
+                if embedding
+            }
+            vectors.update(new_vectors)
+
+            try:
+                self.set_many(new_vectors)
+            except Exception as e:
+                log.warning(f"Error writing chunk embedding cache: {e}")
+
+        return [vectors.get(key) for key in keys]
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses}
+
+
+CHUNK_EMBEDDINGS = ChunkEmbeddingStore(
+    CHUNK_EMBEDDING_CACHE_PATH,
+    enabled=ENABLE_CHUNK_EMBEDDING_CACHE,
+    max_entries=CHUNK_EMBEDDING_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,201 @@
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from open_webui.env import (
+    EMBEDDING_MAX_CONCURRENT_REQUESTS,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_REQUEST_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.http_sessions import get_base_url
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Error messages of upstreams that reject a batch for its size rather than its content
+BATCH_TOO_LARGE_PATTERN = re.compile(
+    r"too (large|long|many)|maximum|exceed|payload", re.IGNORECASE
+)
+
+
+class EmbeddingBatchTooLargeError(Exception):
+    pass
+
+
+class EmbeddingClient:
+    """
+    HTTP client for the remote (Ollama/OpenAI) embedding engines.
+
+    - One pooled keep-alive `requests.Session` per upstream base URL
+    - At most `max_concurrency` batches in flight per upstream, shared by
+      everything embedding against it at the same time
+    - Retries with exponential backoff (honouring Retry-After) on 429, 5xx and
+      connection errors; failures are raised instead of returning None
+    - Adaptive batch size per (url, model): batches rejected for their size are
+      split in half, and the size grows back after consecutive successes
+
+    The embedding code paths are synchronous, so concurrency uses threads.
+    """
+
+    GROW_AFTER = 10
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        timeout: float = 300,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.sessions: dict[str, requests.Session] = {}
+        self.semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self.batch_sizes: dict[tuple, dict] = {}
+        self.lock = threading.Lock()
+
+    def _get_session(self, url: str) -> tuple[requests.Session, threading.Semaphore]:
+        base_url = get_base_url(url)
+        with self.lock:
+            if base_url not in self.sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.max_concurrency
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+
+                self.sessions[base_url] = session
+                self.semaphores[base_url] = threading.BoundedSemaphore(
+                    self.max_concurrency
+                )
+            return self.sessions[base_url], self.semaphores[base_url]
+
+    def _get_retry_delay(self, attempt: int, r: Optional[requests.Response]) -> float:
+        if r is not None and r.headers.get("Retry-After"):
+            try:
+                return min(float(r.headers["Retry-After"]), self.max_backoff)
+            except ValueError:
+                pass
+        delay = min(self.backoff * 2**attempt, self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    def post(self, url: str, headers: dict, json: dict, batch_size: int = 1) -> dict:
+        session, semaphore = self._get_session(url)
+
+        for attempt in range(self.max_retries + 1):
+            r = None
+            try:
+                with semaphore:
+                    r = session.post(
+                        url, headers=headers, json=json, timeout=self.timeout
+                    )
+
+                if r.status_code == 413 or (
+                    r.status_code == 400
+                    and batch_size > 1
+                    and BATCH_TOO_LARGE_PATTERN.search(r.text)
+                ):
+                    raise EmbeddingBatchTooLargeError(r.text)
+
+                if r.status_code not in RETRY_STATUS_CODES:
+                    r.raise_for_status()
+                    return r.json()
+
+                error = requests.HTTPError(f"{r.status_code} {r.text}", response=r)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == self.max_retries:
+                raise error
+
+            delay = self._get_retry_delay(attempt, r)
+            log.warning(
+                f"Embedding request to {get_base_url(url)} failed ({error}), "
+                f"retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+    def _get_batch_size(self, key: tuple, batch_size: int) -> int:
+        with self.lock:
+            state = self.batch_sizes.setdefault(
+                key, {"size": batch_size, "successes": 0}
+            )
+            return min(state["size"], batch_size)
+
+    def _on_batch_success(self, key: tuple, batch_size: int):
+        with self.lock:
+            state = self.batch_sizes[key]
+            state["successes"] += 1
+            if state["successes"] >= self.GROW_AFTER and state["size"] < batch_size:
+                state["size"] = min(state["size"] * 2, batch_size)
+                state["successes"] = 0
+
+    def _on_batch_too_large(self, key: tuple, size: int):
+        with self.lock:
+            state = self.batch_sizes[key]
+            state["size"] = max(min(state["size"], size // 2), 1)
+            state["successes"] = 0
+        log.info(f"Reducing embedding batch size for {key[1]} to {state['size']}")
+
+    def embed(
+        self,
+        url: str,
+        model: str,
+        texts: list[str],
+        batch_size: int,
+        embed_batch: Callable[[list[str]], list],
+    ) -> list:
+        """
+        Embed `texts` in batches of at most `batch_size` with `embed_batch`
+        (a single request), running batches in parallel. Results keep the
+        order of `texts`.
+        """
+        key = (get_base_url(url), model)
+        batch_size = max(batch_size, 1)
+
+        def run(batch: list[str]) -> list:
+            try:
+                embeddings = embed_batch(batch)
+                self._on_batch_success(key, batch_size)
+                return embeddings
+            except EmbeddingBatchTooLargeError:
+                if len(batch) == 1:
+                    raise
+                self._on_batch_too_large(key, len(batch))
+                middle = len(batch) // 2
+                return run(batch[:middle]) + run(batch[middle:])
+
+        size = self._get_batch_size(key, batch_size)
+        batches = [texts[i : i + size] for i in range(0, len(texts), size)]
+        if len(batches) <= 1:
+            return run(texts) if texts else []
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency, len(batches))
+        ) as executor:
+            results = list(executor.map(run, batches))
+
+        return [embedding for embeddings in results for embedding in embeddings]
+
+
+EMBEDDING_CLIENT = EmbeddingClient(
+    max_concurrency=EMBEDDING_MAX_CONCURRENT_REQUESTS,
+    max_retries=EMBEDDING_MAX_RETRIES,
+    timeout=EMBEDDING_REQUEST_TIMEOUT,
+)
@@ -2,6 +2,9 @@ import requests
 import logging
 import ftfy
 import sys
+from typing import Iterator
+
+from charset_normalizer import from_bytes
 
 from langchain_community.document_loaders import (
     AzureAIDocumentIntelligenceLoader,
@@ -85,6 +88,48 @@ known_source_ext = [
     "json",
 ]
 
+# Characters per document yielded when streaming plain text files
+TEXT_WINDOW_SIZE = 1024 * 1024
+
+
+def detect_encoding(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        sample = f.read(TEXT_WINDOW_SIZE)
+
+    try:
+        # A multi-byte character may be cut at the end of the sample
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        if e.start >= len(sample) - 3 and e.reason == "unexpected end of data":
+            return "utf-8"
+
+    match = from_bytes(sample).best()
+    return match.encoding if match else "utf-8"
+
+
+def iter_text_file(file_path: str, window_size: int = TEXT_WINDOW_SIZE):
+    """
+    Yield a text file as documents of about `window_size` characters, cut at
+    line ends (or after at most another `window_size` characters of a longer
+    line), with their character offset as `start_index`.
+    """
+    offset = 0
+    with open(
+        file_path, "r", encoding=detect_encoding(file_path), errors="replace"
+    ) as f:
+        while True:
+            text = f.read(window_size)
+            if not text:
+                break
+            text += f.readline(window_size)
+
+            yield Document(
+                page_content=text,
+                metadata={"source": file_path, "start_index": offset},
+            )
+            offset += len(text)
+
 
 class TikaLoader:
     def __init__(self, url, file_path, mime_type=None, extract_images=None):
@@ -207,6 +252,28 @@ class Loader:
             for doc in docs
         ]
 
+    def lazy_load(
+        self, filename: str, file_content_type: str, file_path: str
+    ) -> Iterator[Document]:
+        """
+        Like `load`, but yields the documents as they are read so large files
+        never have to fit in memory: plain text in windows of
+        `TEXT_WINDOW_SIZE` characters, other formats as their loader yields
+        them (rows, pages, ...).
+        """
+        loader = self._get_loader(filename, file_content_type, file_path)
+        if isinstance(loader, TextLoader):
+            docs = iter_text_file(file_path)
+        elif hasattr(loader, "lazy_load"):
+            docs = loader.lazy_load()
+        else:
+            docs = loader.load()
+
+        for doc in docs:
+            yield Document(
+                page_content=ftfy.fix_text(doc.page_content), metadata=doc.metadata
+            )
+
     def _is_text_file(self, file_ext: str, file_content_type: str) -> bool:
         return file_ext in known_source_ext or (
             file_content_type and file_content_type.find("text/") >= 0
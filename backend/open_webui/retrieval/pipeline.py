@@ -0,0 +1,276 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, Optional
+
+import tiktoken
+from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
+from langchain_core.documents import Document
+
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import (
+    FILE_PROCESSING_CONCURRENCY,
+    FILE_PROCESSING_WORKERS,
+    SRC_LOG_LEVELS,
+)
+from open_webui.retrieval.loaders.main import Loader
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Engines extracting content over HTTP; parsing is I/O bound for those
+REMOTE_CONTENT_EXTRACTION_ENGINES = {
+    "external",
+    "tika",
+    "docling",
+    "document_intelligence",
+    "mistral_ocr",
+}
+
+
+def get_text_splitter(
+    text_splitter: str, chunk_size: int, chunk_overlap: int, encoding_name: str
+):
+    if text_splitter in ["", "character"]:
+        return RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+        )
+    elif text_splitter == "token":
+        log.info(f"Using token text splitter: {encoding_name}")
+
+        tiktoken.get_encoding(str(encoding_name))
+        return TokenTextSplitter(
+            encoding_name=str(encoding_name),
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+        )
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+
+def split_documents_lazily(
+    docs: Iterable[Document], text_splitter
+) -> Iterator[Document]:
+    """
+    Split a stream of documents one document at a time. Windows of a text
+    file carry their offset as `start_index`, so chunks keep offsets relative
+    to the whole file.
+    """
+    for doc in docs:
+        offset = doc.metadata.get("start_index", 0)
+        for chunk in text_splitter.split_documents([doc]):
+            if offset:
+                chunk.metadata["start_index"] = (
+                    chunk.metadata.get("start_index", 0) + offset
+                )
+            yield chunk
+
+
+def iter_batches(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_file(
+    task: dict, loader_config: dict, splitter_config: Optional[dict]
+) -> tuple[str, list[Document]]:
+    """
+    Load (unless its content is already extracted) and split a file of a
+    batch. Runs in the worker processes, so it only takes picklable arguments:
+
+    - task: {"filename", "content_type", "file_path", "content", "metadata"}
+    - loader_config: `Loader` arguments, including "engine"
+    - splitter_config: `get_text_splitter` arguments, None to skip splitting
+
+    Returns the text content of the file and its chunks.
+    """
+    if task.get("content") is None and task.get("file_path"):
+        loader = Loader(**loader_config)
+        docs = loader.load(task["filename"], task["content_type"], task["file_path"])
+        docs = [
+            Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, **task["metadata"]},
+            )
+            for doc in docs
+        ]
+        text_content = " ".join([doc.page_content for doc in docs])
+    else:
+        text_content = task.get("content") or ""
+        docs = [
+            Document(
+                page_content=text_content.replace("<br/>", "\n"),
+                metadata=task["metadata"],
+            )
+        ]
+
+    if splitter_config is not None:
+        docs = get_text_splitter(**splitter_config).split_documents(docs)
+
+    return text_content, docs
+
+
+class FileProcessingPipeline:
+    """
+    Staged ingestion of a batch of files, so that fetching, parsing and
+    embedding of different files overlap instead of running one file after
+    another:
+
+    1. fetch: `fetch(task)` in a thread (e.g. download from the storage provider)
+    2. parse: `parse_file` in a process pool for the local extraction engine
+       (CPU bound), in the fetching thread for remote engines (I/O bound)
+    3. embed: `embed(docs)` in a thread as soon as the file is parsed
+
+    Every file succeeds or fails on its own; inserting the vectors is left to
+    the caller so it can be done in bulk. The worker processes are started on
+    first use and kept for later batches.
+    """
+
+    def __init__(self, workers: int = 4, concurrency: int = 4):
+        self.workers = workers
+        self.concurrency = concurrency
+
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers == 0:
+            return None
+
+        with self.lock:
+            if self.executor is None:
+                # spawn: forking a server process running threads isn't safe
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self.executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _parse(
+        self, task: dict, loader_config: dict, splitter_config: Optional[dict]
+    ) -> tuple[str, list[Document]]:
+        remote = loader_config.get("engine") in REMOTE_CONTENT_EXTRACTION_ENGINES
+        executor = None if remote else self._get_executor()
+        if executor is not None:
+            try:
+                return executor.submit(
+                    parse_file, task, loader_config, splitter_config
+                ).result()
+            except BrokenProcessPool:
+                log.warning("File processing workers died, parsing in-process")
+                self._reset_executor(executor)
+
+        return parse_file(task, loader_config, splitter_config)
+
+    def run(
+        self,
+        tasks: list[dict],
+        loader_config: dict,
+        splitter_config: Optional[dict],
+        embed: Callable[[list[Document]], list],
+        fetch: Optional[Callable[[dict], dict]] = None,
+        embed_concurrency: Optional[int] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> list[dict]:
+        """
+        Process `tasks` (see `parse_file`) and return, in the same order, a
+        result per file: {"text_content", "docs", "embeddings"} or {"error"}.
+
+        `on_progress` is called with the number of files done so far; an
+        exception it raises (e.g. on cancellation) aborts the remaining files
+        and is propagated.
+        """
+        results: list[dict] = [{} for _ in tasks]
+        completed = 0
+
+        def fetch_and_parse(task: dict) -> tuple[str, list[Document]]:
+            if fetch:
+                task = fetch(task)
+            return self._parse(task, loader_config, splitter_config)
+
+        with (
+            ThreadPoolExecutor(
+                max_workers=max(self.concurrency, self.workers),
+                thread_name_prefix="file-parse",
+            ) as parse_executor,
+            ThreadPoolExecutor(
+                max_workers=embed_concurrency or self.concurrency,
+                thread_name_prefix="file-embed",
+            ) as embed_executor,
+        ):
+            pending: dict[Future, tuple[str, int]] = {
+                parse_executor.submit(fetch_and_parse, task): ("parse", idx)
+                for idx, task in enumerate(tasks)
+            }
+
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, idx = pending.pop(future)
+                        try:
+                            if stage == "parse":
+                                text_content, docs = future.result()
+                                results[idx] = {
+                                    "text_content": text_content,
+                                    "docs": docs,
+                                }
+                                if not docs:
+                                    raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+                                pending[embed_executor.submit(embed, docs)] = (
+                                    "embed",
+                                    idx,
+                                )
+                                continue
+                            results[idx]["embeddings"] = future.result()
+                        except Exception as e:
+                            log.warning(
+                                f"Error processing {tasks[idx].get('filename')}: {e}"
+                            )
+                            results[idx] = {"error": e}
+
+                        completed += 1
+                        if on_progress:
+                            on_progress(completed)
+            except BaseException:
+                # Don't start the files that are still queued
+                for future in pending:
+                    future.cancel()
+                raise
+
+        return results
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+FILE_PROCESSING_PIPELINE = FileProcessingPipeline(
+    workers=FILE_PROCESSING_WORKERS, concurrency=FILE_PROCESSING_CONCURRENCY
+)
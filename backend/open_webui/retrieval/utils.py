@@ -1,10 +1,10 @@
+import heapq
 import logging
 import os
+from concurrent.futures import as_completed
 from typing import Optional, Union
 
-import requests
-import hashlib
-from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
@@ -12,12 +12,15 @@ from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
+from open_webui.retrieval.bm25_index import BM25_INDEX
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
+from open_webui.retrieval.embedding_client import EMBEDDING_CLIENT
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
 
-from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.vector.main import VECTOR_SEARCH_EXECUTOR, GetResult
 
 
 from open_webui.env import (
@@ -66,6 +69,7 @@ class VectorSearchRetriever(BaseRetriever):
         for idx in range(len(ids)):
             results.append(
                 Document(
+                    id=ids[idx],
                     metadata=metadatas[idx],
                     page_content=documents[idx],
                 )
@@ -73,6 +77,61 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class BM25IndexRetriever(BaseRetriever):
+    collection_name: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        return [
+            Document(
+                id=result["id"],
+                metadata=result["metadata"],
+                page_content=result["text"],
+            )
+            for result in BM25_INDEX.search(self.collection_name, query, self.top_k)
+        ]
+
+
+BM25_BACKFILL_BATCH_SIZE = 5000
+
+
+def ensure_bm25_index(collection_name: str) -> bool:
+    """
+    Make sure the persistent BM25 index of a collection exists, backfilling it
+    from the vector DB the first time. Returns False if it can't be used.
+    """
+    if not BM25_INDEX.enabled:
+        return False
+    if BM25_INDEX.has_index(collection_name):
+        return True
+
+    built = False
+    try:
+        # Stream the collection in batches: the first one (re)builds the
+        # index, the others are added to it
+        for batch in VECTOR_DB_CLIENT.iter_items(
+            collection_name, batch_size=BM25_BACKFILL_BATCH_SIZE
+        ):
+            (BM25_INDEX.add if built else BM25_INDEX.build)(
+                collection_name,
+                ids=batch.ids[0],
+                texts=batch.documents[0],
+                metadatas=batch.metadatas[0],
+            )
+            built = True
+        return built
+    except Exception as e:
+        log.exception(f"Error building BM25 index for {collection_name}: {e}")
+        if built:
+            BM25_INDEX.drop(collection_name)
+        return False
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -109,7 +168,7 @@ def get_doc(collection_name: str, user: UserModel = None):
 
 def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
+    collection_result: Optional[GetResult],
     query: str,
     embedding_function,
     k: int,
@@ -119,11 +178,18 @@ def query_doc_with_hybrid_search(
 ) -> dict:
     try:
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
-        )
-        bm25_retriever.k = k
+        if collection_result is None:
+            # Served from the persistent BM25 index
+            bm25_retriever = BM25IndexRetriever(
+                collection_name=collection_name, top_k=k
+            )
+        else:
+            bm25_retriever = BM25Retriever.from_texts(
+                texts=collection_result.documents[0],
+                metadatas=collection_result.metadatas[0],
+                ids=collection_result.ids[0],
+            )
+            bm25_retriever.k = k
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
@@ -134,9 +200,11 @@ def query_doc_with_hybrid_search(
         ensemble_retriever = EnsembleRetriever(
             retrievers=[bm25_retriever, vector_search_retriever], weights=[0.5, 0.5]
         )
+        # retrieve only min(k, k_reranker) items, the compressor returns them sorted
         compressor = RerankCompressor(
+            collection_name=collection_name,
             embedding_function=embedding_function,
-            top_n=k_reranker,
+            top_n=min(k, k_reranker),
             reranking_function=reranking_function,
             r_score=r,
         )
@@ -147,22 +215,11 @@ def query_doc_with_hybrid_search(
 
         result = compression_retriever.invoke(query)
 
-        distances = [d.metadata.get("score") for d in result]
-        documents = [d.page_content for d in result]
-        metadatas = [d.metadata for d in result]
-
-        # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
-        if k < k_reranker:
-            sorted_items = sorted(
-                zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
-            )
-            sorted_items = sorted_items[:k]
-            distances, documents, metadatas = map(list, zip(*sorted_items))
-
         result = {
-            "distances": [distances],
-            "documents": [documents],
-            "metadatas": [metadatas],
+            "ids": [[d.id for d in result]],
+            "distances": [[d.metadata.get("score") for d in result]],
+            "documents": [[d.page_content for d in result]],
+            "metadatas": [[d.metadata for d in result]],
         }
 
         log.info(
@@ -196,44 +253,69 @@ def merge_get_results(get_results: list[dict]) -> dict:
     return result
 
 
-def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
-    # Initialize lists to store combined data
-    combined = dict()  # To store documents with unique document hashes
+class TopKMerger:
+    """
+    Streaming top-k merge of query results. Keeps the k best scored chunks in
+    a bounded min-heap, deduplicated by chunk id (by document when there is
+    no id) with the best score of every chunk, so results can be added as
+    they come in without collecting and sorting them all.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap = []  # [distance, -seq, key, document, metadata]
+        self.entries = {}  # key -> heap entry
+        self.seq = 0
+
+    def add(self, distance: float, document: str, metadata: dict, id=None):
+        if not isinstance(document, str) or self.k <= 0:
+            return
+
+        key = id if id is not None else document
+        entry = self.entries.get(key)
+        if entry is not None:
+            # if chunk is already in, but new distance is better, update
+            if distance > entry[0]:
+                entry[0], entry[3], entry[4] = distance, document, metadata
+                heapq.heapify(self.heap)
+            return
+
+        # Earlier results win ties, as with a stable sort
+        self.seq += 1
+        entry = [distance, -self.seq, key, document, metadata]
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            del self.entries[heapq.heapreplace(self.heap, entry)[2]]
+        else:
+            return
+        self.entries[key] = entry
 
-    for data in query_results:
-        distances = data["distances"][0]
-        documents = data["documents"][0]
-        metadatas = data["metadatas"][0]
-
-        for distance, document, metadata in zip(distances, documents, metadatas):
-            if isinstance(document, str):
-                doc_hash = hashlib.sha256(
-                    document.encode()
-                ).hexdigest()  # Compute a hash for uniqueness
-
-                if doc_hash not in combined.keys():
-                    combined[doc_hash] = (distance, document, metadata)
-                    continue  # if doc is new, no further comparison is needed
-
-                # if doc is alredy in, but new distance is better, update
-                if distance > combined[doc_hash][0]:
-                    combined[doc_hash] = (distance, document, metadata)
-
-    combined = list(combined.values())
-    # Sort the list based on distances
-    combined.sort(key=lambda x: x[0], reverse=True)
-
-    # Slice to keep only the top k elements
-    sorted_distances, sorted_documents, sorted_metadatas = (
-        zip(*combined[:k]) if combined else ([], [], [])
-    )
+    def add_result(self, result: dict):
+        distances = result["distances"][0]
+        documents = result["documents"][0]
+        metadatas = result["metadatas"][0]
+        ids = (result.get("ids") or [None])[0] or [None] * len(documents)
 
-    # Create and return the output dictionary
-    return {
-        "distances": [list(sorted_distances)],
-        "documents": [list(sorted_documents)],
-        "metadatas": [list(sorted_metadatas)],
-    }
+        for distance, document, metadata, id in zip(
+            distances, documents, metadatas, ids
+        ):
+            self.add(distance, document, metadata, id)
+
+    def get_result(self) -> dict:
+        entries = sorted(self.heap, key=lambda entry: entry[:2], reverse=True)
+        return {
+            "distances": [[entry[0] for entry in entries]],
+            "documents": [[entry[3] for entry in entries]],
+            "metadatas": [[entry[4] for entry in entries]],
+        }
+
+
+def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
+    merger = TopKMerger(k)
+    for data in query_results:
+        merger.add_result(data)
+    return merger.get_result()
 
 
 def get_all_items_from_collections(collection_names: list[str]) -> dict:
@@ -242,9 +324,13 @@ def get_all_items_from_collections(collection_names: list[str]) -> dict:
     for collection_name in collection_names:
         if collection_name:
             try:
-                result = get_doc(collection_name=collection_name)
-                if result is not None:
-                    results.append(result.model_dump())
+                # Streamed in batches, without pulling the vectors
+                results.extend(
+                    [
+                        batch.model_dump()
+                        for batch in VECTOR_DB_CLIENT.iter_items(collection_name)
+                    ]
+                )
             except Exception as e:
                 log.exception(f"Error when querying the collection: {e}")
         else:
@@ -259,50 +345,36 @@ def query_collection(
     embedding_function,
     k: int,
 ) -> dict:
-    results = []
-    error = False
-
-    def process_query_collection(collection_name, query_embedding):
-        try:
-            if collection_name:
-                result = query_doc(
-                    collection_name=collection_name,
-                    k=k,
-                    query_embedding=query_embedding,
-                )
-                if result is not None:
-                    return result.model_dump(), None
-            return None, None
-        except Exception as e:
-            log.exception(f"Error when querying the collection: {e}")
-            return None, e
-
     # Generate all query embeddings (in one call)
     query_embeddings = embedding_function(queries, prefix=RAG_EMBEDDING_QUERY_PREFIX)
     log.debug(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
-
-    for result, err in task_results:
-        if err is not None:
-            error = True
-        elif result is not None:
-            results.append(result)
+    # Search every collection with every query embedding at once
+    try:
+        result = VECTOR_DB_CLIENT.search_collections(
+            collection_names=[name for name in collection_names if name],
+            vectors=query_embeddings,
+            limit=k,
+        )
+    except Exception as e:
+        log.exception(f"Error when querying the collections: {e}")
+        result = None
 
-    if error and not results:
+    merger = TopKMerger(k)
+    if result is None:
         log.warning("All collection queries failed. No results returned.")
+        return merger.get_result()
 
-    return merge_and_sort_query_results(results, k=k)
+    for ids, distances, documents, metadatas in zip(
+        result.ids, result.distances, result.documents, result.metadatas
+    ):
+        for id, distance, document, metadata in zip(
+            ids, distances, documents, metadatas
+        ):
+            merger.add(distance, document, metadata, id)
+    return merger.get_result()
 
 
 def query_collection_with_hybrid_search(
@@ -314,12 +386,18 @@ def query_collection_with_hybrid_search(
     k_reranker: int,
     r: float,
 ) -> dict:
-    results = []
     error = False
-    # Fetch collection data once per collection sequentially
+    succeeded = False
+    # Fetch collection data once per collection sequentially, unless the
+    # collection has a persistent BM25 index
     # Avoid fetching the same data multiple times later
     collection_results = {}
+    indexed_collections = set()
     for collection_name in collection_names:
+        if ensure_bm25_index(collection_name):
+            indexed_collections.add(collection_name)
+            continue
+
         try:
             log.debug(
                 f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
@@ -339,7 +417,7 @@ def query_collection_with_hybrid_search(
         try:
             result = query_doc_with_hybrid_search(
                 collection_name=collection_name,
-                collection_result=collection_results[collection_name],
+                collection_result=collection_results.get(collection_name),
                 query=query,
                 embedding_function=embedding_function,
                 k=k,
@@ -357,26 +435,29 @@ def query_collection_with_hybrid_search(
     tasks = [
         (cn, q)
         for cn in collection_names
-        if collection_results[cn] is not None
+        if cn in indexed_collections or collection_results[cn] is not None
         for q in queries
     ]
 
-    with ThreadPoolExecutor() as executor:
-        future_results = [executor.submit(process_query, cn, q) for cn, q in tasks]
-        task_results = [future.result() for future in future_results]
-
-    for result, err in task_results:
+    # Merge the results as the collection queries complete
+    merger = TopKMerger(k)
+    future_results = [
+        VECTOR_SEARCH_EXECUTOR.submit(process_query, cn, q) for cn, q in tasks
+    ]
+    for future in as_completed(future_results):
+        result, err = future.result()
         if err is not None:
             error = True
         elif result is not None:
-            results.append(result)
+            merger.add_result(result)
+            succeeded = True
 
-    if error and not results:
+    if error and not succeeded:
         raise Exception(
             "Hybrid search failed for all collections. Using Non-hybrid search as fallback."
         )
 
-    return merge_and_sort_query_results(results, k=k)
+    return merger.get_result()
 
 
 def get_embedding_function(
@@ -388,9 +469,13 @@ def get_embedding_function(
     embedding_batch_size,
 ):
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
-            query, **({"prompt": prefix} if prefix else {})
-        ).tolist()
+        return EMBEDDING_CACHE.wrap(
+            embedding_engine,
+            embedding_model,
+            lambda query, prefix=None, user=None: embedding_function.encode(
+                query, **({"prompt": prefix} if prefix else {})
+            ).tolist(),
+        )
     elif embedding_engine in ["ollama", "openai"]:
         func = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
@@ -404,21 +489,22 @@ def get_embedding_function(
 
         def generate_multiple(query, prefix, user, func):
             if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(
-                            query[i : i + embedding_batch_size],
-                            prefix=prefix,
-                            user=user,
-                        )
-                    )
-                return embeddings
+                return EMBEDDING_CLIENT.embed(
+                    url,
+                    embedding_model,
+                    query,
+                    embedding_batch_size,
+                    lambda batch: func(batch, prefix=prefix, user=user),
+                )
             else:
                 return func(query, prefix, user)
 
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
+        return EMBEDDING_CACHE.wrap(
+            embedding_engine,
+            embedding_model,
+            lambda query, prefix=None, user=None: generate_multiple(
+                query, prefix, user, func
+            ),
         )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
@@ -636,6 +722,23 @@ def get_model_path(model: str, update_model: bool = False):
         return model
 
 
+def get_embedding_headers(key: str, user: UserModel = None) -> dict:
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {key}",
+        **(
+            {
+                "X-OpenWebUI-User-Name": user.name,
+                "X-OpenWebUI-User-Id": user.id,
+                "X-OpenWebUI-User-Email": user.email,
+                "X-OpenWebUI-User-Role": user.role,
+            }
+            if ENABLE_FORWARD_USER_INFO_HEADERS and user
+            else {}
+        ),
+    }
+
+
 def generate_openai_batch_embeddings(
     model: str,
     texts: list[str],
@@ -643,42 +746,23 @@ def generate_openai_batch_embeddings(
     key: str = "",
     prefix: str = None,
     user: UserModel = None,
-) -> Optional[list[list[float]]]:
-    try:
-        log.debug(
-            f"generate_openai_batch_embeddings:model {model} batch size: {len(texts)}"
-        )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            json=json_data,
-        )
-        r.raise_for_status()
-        data = r.json()
-        if "data" in data:
-            return [elem["embedding"] for elem in data["data"]]
-        else:
-            raise "Something went wrong :/"
-    except Exception as e:
-        log.exception(f"Error generating openai batch embeddings: {e}")
-        return None
+) -> list[list[float]]:
+    log.debug(
+        f"generate_openai_batch_embeddings:model {model} batch size: {len(texts)}"
+    )
+    json_data = {"input": texts, "model": model}
+    if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
+        json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+    data = EMBEDDING_CLIENT.post(
+        f"{url}/embeddings",
+        headers=get_embedding_headers(key, user),
+        json=json_data,
+        batch_size=len(texts),
+    )
+    if "data" not in data:
+        raise Exception(f"Unexpected response from {url}/embeddings: {data}")
+    return [elem["embedding"] for elem in data["data"]]
 
 
 def generate_ollama_batch_embeddings(
@@ -688,43 +772,23 @@ def generate_ollama_batch_embeddings(
     key: str = "",
     prefix: str = None,
     user: UserModel = None,
-) -> Optional[list[list[float]]]:
-    try:
-        log.debug(
-            f"generate_ollama_batch_embeddings:model {model} batch size: {len(texts)}"
-        )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS
-                    else {}
-                ),
-            },
-            json=json_data,
-        )
-        r.raise_for_status()
-        data = r.json()
-
-        if "embeddings" in data:
-            return data["embeddings"]
-        else:
-            raise "Something went wrong :/"
-    except Exception as e:
-        log.exception(f"Error generating ollama batch embeddings: {e}")
-        return None
+) -> list[list[float]]:
+    log.debug(
+        f"generate_ollama_batch_embeddings:model {model} batch size: {len(texts)}"
+    )
+    json_data = {"input": texts, "model": model}
+    if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
+        json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+    data = EMBEDDING_CLIENT.post(
+        f"{url}/api/embed",
+        headers=get_embedding_headers(key, user),
+        json=json_data,
+        batch_size=len(texts),
+    )
+    if "embeddings" not in data:
+        raise Exception(f"Unexpected response from {url}/api/embed: {data}")
+    return data["embeddings"]
 
 
 def generate_embeddings(
@@ -787,16 +851,79 @@ from langchain_core.callbacks import Callbacks
 from langchain_core.documents import BaseDocumentCompressor, Document
 
 
+def cosine_similarity(query_embedding: list, embeddings: list[list]) -> np.ndarray:
+    """Cosine similarity of one vector against each row of the same dimension."""
+    query = np.asarray(query_embedding, dtype=np.float64)
+    if any(len(embedding) != len(query) for embedding in embeddings):
+        raise ValueError("Embeddings must have the same dimension as the query")
+
+    matrix = np.asarray(embeddings, dtype=np.float64).reshape(-1, len(query))
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    return np.divide(
+        matrix @ query, norms, out=np.zeros(len(embeddings)), where=norms > 0
+    )
+
+
+def fit_stored_vector(vector: Optional[list], dimensions: int) -> Optional[list]:
+    """
+    Return a stored vector as a `dimensions` long embedding, or None if it was
+    stored with another embedding model. Vector DBs with a fixed column size
+    (pgvector) store shorter vectors zero-padded.
+    """
+    if vector is None or len(vector) < dimensions:
+        return None
+    if len(vector) > dimensions:
+        if any(value != 0 for value in vector[dimensions:]):
+            return None
+        vector = vector[:dimensions]
+    return list(vector)
+
+
 class RerankCompressor(BaseDocumentCompressor):
     embedding_function: Any
     top_n: int
     reranking_function: Any
     r_score: float
+    collection_name: Optional[str] = None
 
     class Config:
         extra = "forbid"
         arbitrary_types_allowed = True
 
+    def get_document_embeddings(
+        self, documents: Sequence[Document], dimensions: int
+    ) -> list[list]:
+        """
+        Use the vectors stored in the collection for the candidates, embedding
+        only the ones the vector DB couldn't return or that were stored with
+        another embedding model.
+        """
+        vectors = {}
+        ids = [doc.id for doc in documents if doc.id]
+        if self.collection_name and ids:
+            try:
+                vectors = VECTOR_DB_CLIENT.get_vectors(self.collection_name, ids) or {}
+            except Exception as e:
+                log.warning(f"Error getting vectors from {self.collection_name}: {e}")
+
+        embeddings = [
+            fit_stored_vector(vectors.get(doc.id), dimensions) if doc.id else None
+            for doc in documents
+        ]
+        missing = [idx for idx, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            log.debug(
+                f"Embedding {len(missing)} documents without usable stored vectors"
+            )
+            missing_embeddings = self.embedding_function(
+                [documents[idx].page_content for idx in missing],
+                RAG_EMBEDDING_CONTENT_PREFIX,
+            )
+            for idx, embedding in zip(missing, missing_embeddings):
+                embeddings[idx] = embedding
+
+        return embeddings
+
     def compress_documents(
         self,
         documents: Sequence[Document],
@@ -809,14 +936,14 @@ class RerankCompressor(BaseDocumentCompressor):
             scores = self.reranking_function.predict(
                 [(query, doc.page_content) for doc in documents]
             )
-        else:
-            from sentence_transformers import util
-
+        elif documents:
             query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
+            scores = cosine_similarity(
+                query_embedding,
+                self.get_document_embeddings(documents, len(query_embedding)),
             )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+        else:
+            scores = []
 
         docs_with_scores = list(
             zip(documents, scores.tolist() if not isinstance(scores, list) else scores)
@@ -826,12 +953,15 @@ class RerankCompressor(BaseDocumentCompressor):
                 (d, s) for d, s in docs_with_scores if s >= self.r_score
             ]
 
-        result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
+        result = heapq.nlargest(
+            self.top_n, docs_with_scores, key=operator.itemgetter(1)
+        )
         final_results = []
-        for doc, doc_score in result[: self.top_n]:
+        for doc, doc_score in result:
             metadata = doc.metadata
             metadata["score"] = doc_score
             doc = Document(
+                id=doc.id,
                 page_content=doc.page_content,
                 metadata=metadata,
             )
@@ -3,13 +3,16 @@ import logging
 from chromadb import Settings
 from chromadb.utils.batch_utils import create_batches
 
-from typing import Optional
+from typing import Iterator, Optional
 
 from open_webui.retrieval.vector.main import (
+    DEFAULT_ITEM_FIELDS,
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    ItemBatch,
+    make_item_batch,
 )
 from open_webui.config import (
     CHROMA_DATA_PATH,
@@ -29,6 +32,8 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
 class ChromaClient(VectorDBBase):
+    MULTI_VECTOR_SEARCH = True
+
     def __init__(self):
         settings_dict = {
             "allow_reset": True,
@@ -82,9 +87,9 @@ class ChromaClient(VectorDBBase):
 
                 # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
                 # https://docs.trychroma.com/docs/collections/configure cosine equation
-                distances: list = result["distances"][0]
-                distances = [2 - dist for dist in distances]
-                distances = [[dist / 2 for dist in distances]]
+                distances = [
+                    [(2 - dist) / 2 for dist in row] for row in result["distances"]
+                ]
 
                 return SearchResult(
                     **{
@@ -135,6 +140,53 @@ class ChromaClient(VectorDBBase):
             )
         return None
 
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        if not self.has_collection(collection_name):
+            return
+
+        collection = self.client.get_collection(name=collection_name)
+        include = [{"vectors": "embeddings"}.get(field, field) for field in fields]
+
+        offset = 0
+        while True:
+            result = collection.get(limit=batch_size, offset=offset, include=include)
+            if not result["ids"]:
+                return
+
+            yield make_item_batch(
+                fields,
+                result["ids"],
+                documents=result.get("documents"),
+                metadatas=result.get("metadatas"),
+                vectors=(
+                    [list(embedding) for embedding in result["embeddings"]]
+                    if "vectors" in fields
+                    else None
+                ),
+            )
+            if len(result["ids"]) < batch_size:
+                return
+            offset += batch_size
+
+    def get_vectors(self, collection_name: str, ids: list[str]) -> Optional[dict]:
+        try:
+            collection = self.client.get_collection(name=collection_name)
+            if collection:
+                result = collection.get(ids=ids, include=["embeddings"])
+                return {
+                    id: list(embedding)
+                    for id, embedding in zip(result["ids"], result["embeddings"])
+                }
+            return None
+        except Exception as e:
+            log.exception(f"Error getting vectors from {collection_name}: {e}")
+            return None
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection = self.client.get_or_create_collection(
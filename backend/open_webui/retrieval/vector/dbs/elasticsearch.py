@@ -1,12 +1,15 @@
 from elasticsearch import Elasticsearch, BadRequestError
-from typing import Optional
+from typing import Iterator, Optional
 import ssl
 from elasticsearch.helpers import bulk, scan
 from open_webui.retrieval.vector.main import (
+    DEFAULT_ITEM_FIELDS,
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    ItemBatch,
+    make_item_batch,
 )
 from open_webui.config import (
     ELASTICSEARCH_URL,
@@ -77,6 +80,15 @@ class ElasticsearchClient(VectorDBBase):
 
         return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
 
+    def _hits_to_item_batch(self, hits, fields) -> ItemBatch:
+        return make_item_batch(
+            fields,
+            [hit["_id"] for hit in hits],
+            documents=[hit.get("_source", {}).get("text") for hit in hits],
+            metadatas=[hit.get("_source", {}).get("metadata") for hit in hits],
+            vectors=[hit.get("_source", {}).get("vector") for hit in hits],
+        )
+
     # Status: works
     def _result_to_search_result(self, result) -> SearchResult:
         ids = []
@@ -177,6 +189,51 @@ class ElasticsearchClient(VectorDBBase):
 
         return self._result_to_search_result(result)
 
+    def search_collections(
+        self, collection_names: list[str], vectors: list[list[float]], limit: int
+    ) -> Optional[SearchResult]:
+        # Collections share the index of their dimension, so a single
+        # multi-search with one query per vector covers all of them
+        if not collection_names or not vectors:
+            return None
+
+        searches = []
+        for vector in vectors:
+            searches.append({"index": self._get_index_name(len(vector))})
+            searches.append(
+                {
+                    "size": limit,
+                    "_source": ["text", "metadata"],
+                    "query": {
+                        "script_score": {
+                            "query": {
+                                "bool": {
+                                    "filter": [
+                                        {"terms": {"collection": collection_names}}
+                                    ]
+                                }
+                            },
+                            "script": {
+                                "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
+                                "params": {"vector": vector},
+                            },
+                        }
+                    },
+                }
+            )
+
+        result = SearchResult(ids=[], distances=[], documents=[], metadatas=[])
+        for response in self.client.msearch(searches=searches)["responses"]:
+            if "error" in response:
+                # e.g. no index for this dimension yet
+                response = {"hits": {"hits": []}}
+            row = self._result_to_search_result(response)
+            result.ids.append(row.ids[0])
+            result.distances.append(row.distances[0])
+            result.documents.append(row.documents[0])
+            result.metadatas.append(row.metadatas[0])
+        return result
+
     # Status: only tested halfwat
     def query(
         self, collection_name: str, filter: dict, limit: Optional[int] = None
@@ -229,6 +286,35 @@ class ElasticsearchClient(VectorDBBase):
 
         return self._scan_result_to_get_result(results)
 
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        source = [
+            {"documents": "text", "metadatas": "metadata", "vectors": "vector"}[field]
+            for field in fields
+        ]
+        query = {
+            "query": {"bool": {"filter": [{"term": {"collection": collection_name}}]}},
+            "_source": source or False,
+        }
+
+        hits = []
+        for hit in scan(
+            self.client,
+            index=f"{self.index_prefix}*",
+            query=query,
+            size=batch_size,
+        ):
+            hits.append(hit)
+            if len(hits) >= batch_size:
+                yield self._hits_to_item_batch(hits, fields)
+                hits = []
+        if hits:
+            yield self._hits_to_item_batch(hits, fields)
+
     # Status: works
     def insert(self, collection_name: str, items: list[VectorItem]):
         if not self._has_index(dimension=len(items[0]["vector"])):
@@ -0,0 +1,777 @@
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import numpy as np
+
+from open_webui.retrieval.vector.main import (
+    DEFAULT_ITEM_FIELDS,
+    VectorDBBase,
+    VectorItem,
+    SearchResult,
+    GetResult,
+    ItemBatch,
+    make_item_batch,
+)
+from open_webui.config import (
+    EMBEDDED_VECTOR_DB_PATH,
+    EMBEDDED_VECTOR_DB_DTYPE,
+    ENABLE_EMBEDDED_VECTOR_DB_HNSW,
+    EMBEDDED_VECTOR_DB_HNSW_MIN_SIZE,
+    EMBEDDED_VECTOR_DB_HNSW_M,
+    EMBEDDED_VECTOR_DB_HNSW_EF_CONSTRUCTION,
+    EMBEDDED_VECTOR_DB_HNSW_EF_SEARCH,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Rows converted to float32 and scored per matrix product; small blocks keep
+# the converted rows of float16 segments in the CPU cache
+SEARCH_BLOCK_SIZE = 1024
+
+
+def match_filter(metadata: Optional[dict], filter: dict) -> bool:
+    """
+    Match item metadata against a filter: equality on keys, plus the $and,
+    $or, $eq, $ne, $in and $nin operators of Chroma's `where` filters.
+    """
+    metadata = metadata or {}
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(match_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(match_filter(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$eq":
+                    matched = value == operand
+                elif operator == "$ne":
+                    matched = value != operand
+                elif operator == "$in":
+                    matched = value in operand
+                elif operator == "$nin":
+                    matched = value not in operand
+                else:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+                if not matched:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class EmbeddedSegment:
+    """
+    An immutable batch of items.
+
+    Files:
+      - vectors.npy: unit-length vectors (float32 or float16), memory-mapped so
+        that all workers share one copy through the page cache
+      - ids.json: item ids, in row order
+      - doc_offsets.npy: byte offsets of each item in docs.jsonl
+      - docs.jsonl: one {"text", "metadata"} object per item
+      - hnsw.bin: optional HNSW graph over the vectors (hnswlib, cosine space)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, "ids.json"), "r", encoding="utf-8") as f:
+            self.ids: list[str] = json.load(f)
+
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.doc_offsets = np.load(os.path.join(path, "doc_offsets.npy"))
+
+        self.graph = None
+        graph_path = os.path.join(path, "hnsw.bin")
+        if hnswlib is not None and os.path.exists(graph_path):
+            self.graph = hnswlib.Index(space="cosine", dim=self.vectors.shape[1])
+            self.graph.load_index(graph_path, max_elements=len(self.ids))
+
+    @staticmethod
+    def write(
+        path: str,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list,
+        vectors: np.ndarray,
+        dtype: str,
+        build_graph: bool = False,
+    ):
+        os.makedirs(path)
+
+        doc_offsets = [0]
+        with open(os.path.join(path, "docs.jsonl"), "wb") as f:
+            for text, metadata in zip(texts, metadatas):
+                line = json.dumps(
+                    {"text": text, "metadata": metadata}, ensure_ascii=False
+                ).encode("utf-8")
+                f.write(line + b"\n")
+                doc_offsets.append(doc_offsets[-1] + len(line) + 1)
+
+        np.save(os.path.join(path, "vectors.npy"), vectors.astype(dtype))
+        np.save(
+            os.path.join(path, "doc_offsets.npy"), np.asarray(doc_offsets, np.int64)
+        )
+        with open(os.path.join(path, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+
+        if build_graph:
+            graph = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+            graph.init_index(
+                max_elements=len(ids),
+                ef_construction=EMBEDDED_VECTOR_DB_HNSW_EF_CONSTRUCTION,
+                M=EMBEDDED_VECTOR_DB_HNSW_M,
+            )
+            graph.add_items(vectors, np.arange(len(ids)))
+            graph.save_index(os.path.join(path, "hnsw.bin"))
+
+    def get_documents(self, rows: list[int]) -> list[dict]:
+        documents = []
+        with open(os.path.join(self.path, "docs.jsonl"), "rb") as f:
+            for row in rows:
+                start, end = self.doc_offsets[row], self.doc_offsets[row + 1]
+                f.seek(start)
+                documents.append(json.loads(f.read(end - start)))
+        return documents
+
+    def get_vectors(self, rows: list[int]) -> list[list[float]]:
+        return self.vectors[rows].astype(np.float32).tolist()
+
+    def search(
+        self, queries: np.ndarray, k: int, deleted: set[int]
+    ) -> list[list[tuple[float, int]]]:
+        """
+        Return the (cosine similarity, row) of the `k` best live rows for each
+        of the unit-length `queries`.
+        """
+        size = len(self.ids)
+        k = min(k, size - len(deleted))
+        if k <= 0:
+            return [[] for _ in queries]
+
+        if self.graph is not None:
+            # Tombstones aren't part of the graph, ask for enough extra rows
+            count = min(k + len(deleted), size)
+            self.graph.set_ef(
+                max(EMBEDDED_VECTOR_DB_HNSW_EF_SEARCH or max(40, k), count)
+            )
+            labels, distances = self.graph.knn_query(queries, k=count)
+            return [
+                [
+                    (1.0 - float(distance), int(row))
+                    for row, distance in zip(row_labels, row_distances)
+                    if int(row) not in deleted
+                ][:k]
+                for row_labels, row_distances in zip(labels, distances)
+            ]
+
+        scores = np.empty((size, len(queries)), dtype=np.float32)
+        for start in range(0, size, SEARCH_BLOCK_SIZE):
+            block = np.asarray(
+                self.vectors[start : start + SEARCH_BLOCK_SIZE], dtype=np.float32
+            )
+            scores[start : start + len(block)] = block @ queries.T
+        if deleted:
+            scores[list(deleted)] = -np.inf
+
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        return [
+            [(float(scores[row, idx]), int(row)) for row in top[:, idx]]
+            for idx in range(len(queries))
+        ]
+
+
+class EmbeddedCollection:
+    """The segments of one collection, with their tombstoned rows."""
+
+    def __init__(
+        self,
+        path: str,
+        manifest: dict,
+        version: Optional[tuple],
+        previous: Optional["EmbeddedCollection"] = None,
+    ):
+        self.path = path
+        self.version = version
+        self.dimension: int = manifest["dimension"]
+
+        # Segments are immutable, keep those already loaded (and their graphs)
+        loaded = {
+            segment.path: segment
+            for segment, _ in (previous.segments if previous else [])
+        }
+        self.segments: list[tuple[EmbeddedSegment, set[int]]] = []
+        for entry in manifest["segments"]:
+            segment_path = os.path.join(path, entry["name"])
+            segment = loaded.get(segment_path) or EmbeddedSegment(segment_path)
+            self.segments.append((segment, set(entry["deleted"])))
+
+        # id -> (segment index, row) of the live items
+        self.rows: dict[str, tuple[int, int]] = {}
+        for segment_idx, (segment, deleted) in enumerate(self.segments):
+            for row, id in enumerate(segment.ids):
+                if row not in deleted:
+                    self.rows[id] = (segment_idx, row)
+
+    def search(self, queries: np.ndarray, k: int) -> list[list[tuple]]:
+        """Return the (similarity, segment index, row) of the `k` best items per query."""
+        matches = [[] for _ in queries]
+        for segment_idx, (segment, deleted) in enumerate(self.segments):
+            for idx, segment_matches in enumerate(segment.search(queries, k, deleted)):
+                matches[idx].extend(
+                    (score, segment_idx, row) for score, row in segment_matches
+                )
+        return [
+            sorted(query_matches, key=lambda match: match[0], reverse=True)[:k]
+            for query_matches in matches
+        ]
+
+    def iter_rows(self) -> Iterator[tuple[EmbeddedSegment, list[int]]]:
+        """Yield the live rows of each segment, in insertion order."""
+        for segment, deleted in self.segments:
+            rows = [row for row in range(len(segment.ids)) if row not in deleted]
+            if rows:
+                yield segment, rows
+
+
+class EmbeddedClient(VectorDBBase):
+    """
+    Vector store embedded in Open WebUI, without any service to run.
+
+    Each collection is a directory of append-only segments: inserts write a
+    new segment, deletes and upserts tombstone rows of the existing ones, and
+    segments are merged once there are too many or too many deleted rows, as
+    in the BM25 index. Search is exact (a matrix product over the memory-mapped
+    vectors) or, for large segments with ENABLE_EMBEDDED_VECTOR_DB_HNSW, uses
+    an HNSW graph.
+
+    Writers serialize on a lock file inside the collection directory (and,
+    within a process, on a lock per collection) and readers reload a collection
+    whenever its manifest changed, so all workers can share
+    EMBEDDED_VECTOR_DB_PATH. Readers never wait on writers.
+    """
+
+    MULTI_VECTOR_SEARCH = True
+
+    MAX_SEGMENTS = 8
+    MAX_DELETED_RATIO = 0.25
+    LOCK_TIMEOUT = 30
+    STALE_LOCK_TIME = 300
+
+    def __init__(
+        self, path: str = EMBEDDED_VECTOR_DB_PATH, dtype: str = EMBEDDED_VECTOR_DB_DTYPE
+    ):
+        if dtype not in ["float32", "float16"]:
+            raise ValueError(f"Unsupported embedded vector DB dtype: {dtype}")
+
+        self.path = path
+        self.dtype = dtype
+
+        self.build_graphs = ENABLE_EMBEDDED_VECTOR_DB_HNSW
+        if self.build_graphs and hnswlib is None:
+            log.warning(
+                "ENABLE_EMBEDDED_VECTOR_DB_HNSW is set but hnswlib is not installed, "
+                "using exact search"
+            )
+            self.build_graphs = False
+
+        # Guards the two dicts only, never held during I/O
+        self.collections: dict[str, EmbeddedCollection] = {}
+        self.write_locks: dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+
+    def _get_collection_path(self, collection_name: str) -> str:
+        return os.path.join(self.path, re.sub(r"[^A-Za-z0-9_.-]", "_", collection_name))
+
+    def _get_manifest_path(self, collection_name: str) -> str:
+        return os.path.join(self._get_collection_path(collection_name), "manifest.json")
+
+    def _read_manifest(self, collection_name: str) -> Optional[dict]:
+        try:
+            with open(
+                self._get_manifest_path(collection_name), "r", encoding="utf-8"
+            ) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, collection_name: str, manifest: dict):
+        manifest_path = self._get_manifest_path(collection_name)
+        tmp_path = f"{manifest_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+    @contextmanager
+    def _lock(self, collection_name: str):
+        collection_path = self._get_collection_path(collection_name)
+        os.makedirs(collection_path, exist_ok=True)
+        lock_path = os.path.join(collection_path, ".lock")
+
+        with self.lock:
+            write_lock = self.write_locks.setdefault(collection_name, threading.Lock())
+
+        with write_lock:
+            deadline = time.monotonic() + self.LOCK_TIMEOUT
+            while True:
+                try:
+                    fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    try:
+                        if time.time() - os.path.getmtime(lock_path) > (
+                            self.STALE_LOCK_TIME
+                        ):
+                            os.remove(lock_path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(
+                            f"Timed out waiting for the vector DB lock of {collection_name}"
+                        )
+                    time.sleep(0.05)
+
+            try:
+                yield
+            finally:
+                os.close(fd)
+                try:
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+
+    def _get_collection(self, collection_name: str) -> Optional[EmbeddedCollection]:
+        try:
+            # The manifest is replaced on every write: a new inode even when
+            # two writes fall within the mtime granularity
+            stat = os.stat(self._get_manifest_path(collection_name))
+            version = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            with self.lock:
+                self.collections.pop(collection_name, None)
+            return None
+
+        with self.lock:
+            collection = self.collections.get(collection_name)
+        if collection is None or collection.version != version:
+            manifest = self._read_manifest(collection_name)
+            if manifest is None:
+                return None
+            # Loaded without the lock: concurrent readers may both load a new
+            # version, which is harmless
+            collection = EmbeddedCollection(
+                self._get_collection_path(collection_name),
+                manifest,
+                version,
+                previous=collection,
+            )
+            with self.lock:
+                self.collections[collection_name] = collection
+        return collection
+
+    def _load_collection(
+        self, collection_name: str, manifest: dict
+    ) -> EmbeddedCollection:
+        """
+        Load the collection exactly as of `manifest`, for writers holding the
+        lock: row positions must match the manifest they are going to update.
+        """
+        with self.lock:
+            previous = self.collections.get(collection_name)
+        return EmbeddedCollection(
+            self._get_collection_path(collection_name), manifest, None, previous
+        )
+
+    def _read(self, collection_name: str, read):
+        """Run `read(collection)`, or return None if the collection doesn't exist."""
+        for attempt in range(2):
+            collection = self._get_collection(collection_name)
+            if collection is None:
+                return None
+
+            try:
+                return read(collection)
+            except FileNotFoundError:
+                # A segment was compacted away by a concurrent writer, reload
+                if attempt:
+                    raise
+        return None
+
+    def _write_segment(
+        self,
+        collection_name: str,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list,
+        vectors: np.ndarray,
+    ) -> dict:
+        name = f"segment-{uuid.uuid4().hex}"
+        EmbeddedSegment.write(
+            os.path.join(self._get_collection_path(collection_name), name),
+            ids,
+            texts,
+            metadatas,
+            vectors,
+            self.dtype,
+            build_graph=self.build_graphs
+            and len(ids) >= EMBEDDED_VECTOR_DB_HNSW_MIN_SIZE,
+        )
+        return {"name": name, "size": len(ids), "deleted": []}
+
+    def _compact(self, collection_name: str, manifest: dict) -> dict:
+        """
+        Merge segments, dropping deleted rows: all of them once too many rows
+        are deleted, otherwise the smallest ones.
+        """
+        collection_path = self._get_collection_path(collection_name)
+
+        if self._get_deleted_ratio(manifest) > self.MAX_DELETED_RATIO:
+            merged = manifest["segments"]
+        else:
+            count = len(manifest["segments"]) - self.MAX_SEGMENTS // 2 + 1
+            merged = sorted(manifest["segments"], key=lambda s: s["size"])[:count]
+        merged_names = {segment["name"] for segment in merged}
+
+        ids, texts, metadatas, vectors = [], [], [], []
+        for entry in merged:
+            deleted = set(entry["deleted"])
+            segment = EmbeddedSegment(os.path.join(collection_path, entry["name"]))
+            rows = [row for row in range(len(segment.ids)) if row not in deleted]
+            ids.extend(segment.ids[row] for row in rows)
+            for document in segment.get_documents(rows):
+                texts.append(document["text"])
+                metadatas.append(document["metadata"])
+            vectors.append(np.asarray(segment.vectors[rows], dtype=np.float32))
+
+        segments = [
+            segment
+            for segment in manifest["segments"]
+            if segment["name"] not in merged_names
+        ]
+        if ids:
+            segments.append(
+                self._write_segment(
+                    collection_name, ids, texts, metadatas, np.concatenate(vectors)
+                )
+            )
+        return {**manifest, "segments": segments}
+
+    def _get_deleted_ratio(self, manifest: dict) -> float:
+        size = sum(segment["size"] for segment in manifest["segments"])
+        deleted = sum(len(segment["deleted"]) for segment in manifest["segments"])
+        return deleted / size if size > 0 else 0
+
+    def _needs_compaction(self, manifest: dict) -> bool:
+        return (
+            len(manifest["segments"]) > self.MAX_SEGMENTS
+            or self._get_deleted_ratio(manifest) > self.MAX_DELETED_RATIO
+        )
+
+    def _commit(self, collection_name: str, manifest: dict, previous: Optional[dict]):
+        segments = (previous or {}).get("segments", []) + manifest["segments"]
+        if self._needs_compaction(manifest):
+            manifest = self._compact(collection_name, manifest)
+
+        self._write_manifest(collection_name, manifest)
+
+        # Remove segments that are no longer referenced; workers still mapping
+        # their vectors keep reading them until they reload the collection
+        referenced = {segment["name"] for segment in manifest["segments"]}
+        for segment in segments:
+            if segment["name"] not in referenced:
+                shutil.rmtree(
+                    os.path.join(
+                        self._get_collection_path(collection_name), segment["name"]
+                    ),
+                    ignore_errors=True,
+                )
+
+    def _tombstone(
+        self, manifest: dict, collection: Optional[EmbeddedCollection], ids
+    ) -> dict:
+        """Tombstone the rows of `ids` in the segments of `manifest`."""
+        deleted: dict[int, set[int]] = {}
+        for id in ids:
+            if collection is not None and id in collection.rows:
+                segment_idx, row = collection.rows[id]
+                deleted.setdefault(segment_idx, set()).add(row)
+
+        return {
+            **manifest,
+            "segments": [
+                (
+                    {
+                        **segment,
+                        "deleted": sorted(
+                            set(segment["deleted"]) | deleted[segment_idx]
+                        ),
+                    }
+                    if segment_idx in deleted
+                    else segment
+                )
+                for segment_idx, segment in enumerate(manifest["segments"])
+            ],
+        }
+
+    def _write(self, collection_name: str, items: list[VectorItem]):
+        # Later items win over earlier ones with the same id
+        items = list({str(item["id"]): item for item in items}.items())
+        if not items:
+            return
+
+        ids = [id for id, _ in items]
+        texts = [item["text"] for _, item in items]
+        metadatas = [item["metadata"] for _, item in items]
+        vectors = np.asarray([item["vector"] for _, item in items], dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("All vectors must have the same dimension")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1)
+
+        with self._lock(collection_name):
+            previous = self._read_manifest(collection_name)
+            manifest = previous or {
+                "name": collection_name,
+                "dimension": vectors.shape[1],
+                "segments": [],
+            }
+            if manifest["dimension"] != vectors.shape[1]:
+                raise ValueError(
+                    f"Vector dimension {vectors.shape[1]} does not match the "
+                    f"dimension {manifest['dimension']} of {collection_name}"
+                )
+
+            # Replace existing items, so that ids stay unique
+            if previous is not None:
+                manifest = self._tombstone(
+                    manifest, self._load_collection(collection_name, previous), ids
+                )
+
+            manifest = {
+                **manifest,
+                "segments": manifest["segments"]
+                + [
+                    self._write_segment(collection_name, ids, texts, metadatas, vectors)
+                ],
+            }
+            self._commit(collection_name, manifest, previous)
+
+    def has_collection(self, collection_name: str) -> bool:
+        return os.path.exists(self._get_manifest_path(collection_name))
+
+    def delete_collection(self, collection_name: str):
+        collection_path = self._get_collection_path(collection_name)
+        with self.lock:
+            self.collections.pop(collection_name, None)
+        if os.path.exists(collection_path):
+            # Rename first so that readers never see a half-deleted collection
+            dropped_path = f"{collection_path}.{uuid.uuid4().hex}.dropped"
+            try:
+                os.rename(collection_path, dropped_path)
+            except FileNotFoundError:
+                return
+            shutil.rmtree(dropped_path, ignore_errors=True)
+
+    def insert(self, collection_name: str, items: list[VectorItem]):
+        # Insert the items into the collection, creating it if needed. Existing
+        # ids are replaced.
+        self._write(collection_name, items)
+
+    def upsert(self, collection_name: str, items: list[VectorItem]):
+        # Insert or replace the items in the collection, creating it if needed.
+        self._write(collection_name, items)
+
+    def search(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
+        def search(collection: EmbeddedCollection) -> SearchResult:
+            queries = np.asarray(vectors, dtype=np.float32)
+            if queries.ndim != 2 or queries.shape[1] != collection.dimension:
+                raise ValueError(
+                    f"Query vectors do not match the dimension "
+                    f"{collection.dimension} of {collection_name}"
+                )
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries = queries / np.where(norms > 0, norms, 1)
+
+            result = SearchResult(ids=[], distances=[], documents=[], metadatas=[])
+            k = len(collection.rows) if limit is None else limit
+            for matches in collection.search(queries, k):
+                # Read the documents of the matches one segment at a time
+                segment_rows: dict[int, list[int]] = {}
+                for _, segment_idx, row in matches:
+                    segment_rows.setdefault(segment_idx, []).append(row)
+                found = {}
+                for segment_idx, rows in segment_rows.items():
+                    segment = collection.segments[segment_idx][0]
+                    for row, document in zip(rows, segment.get_documents(rows)):
+                        found[(segment_idx, row)] = document
+                documents = [
+                    found[(segment_idx, row)] for _, segment_idx, row in matches
+                ]
+
+                result.ids.append(
+                    [
+                        collection.segments[segment_idx][0].ids[row]
+                        for _, segment_idx, row in matches
+                    ]
+                )
+                # Cosine similarity -1 (worst) -> 1 (best), re-ordering to 0 -> 1
+                # like the other backends
+                result.distances.append([(score + 1) / 2 for score, _, _ in matches])
+                result.documents.append([document["text"] for document in documents])
+                result.metadatas.append(
+                    [document["metadata"] for document in documents]
+                )
+            return result
+
+        return self._read(collection_name, search)
+
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        # Query the items from the collection based on the filter.
+        def query(collection: EmbeddedCollection) -> GetResult:
+            ids, documents, metadatas = [], [], []
+            for segment, rows in collection.iter_rows():
+                for row, document in zip(rows, segment.get_documents(rows)):
+                    if not match_filter(document["metadata"], filter):
+                        continue
+                    ids.append(segment.ids[row])
+                    documents.append(document["text"])
+                    metadatas.append(document["metadata"])
+                    if limit is not None and len(ids) >= limit:
+                        return GetResult(
+                            ids=[ids], documents=[documents], metadatas=[metadatas]
+                        )
+            return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
+
+        return self._read(collection_name, query)
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        # Get all the items in the collection.
+        def get(collection: EmbeddedCollection) -> GetResult:
+            ids, documents, metadatas = [], [], []
+            for segment, rows in collection.iter_rows():
+                ids.extend(segment.ids[row] for row in rows)
+                for document in segment.get_documents(rows):
+                    documents.append(document["text"])
+                    metadatas.append(document["metadata"])
+            return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
+
+        return self._read(collection_name, get)
+
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        read_documents = "documents" in fields or "metadatas" in fields
+
+        yielded: set[str] = set()
+        for attempt in range(2):
+            collection = self._get_collection(collection_name)
+            if collection is None:
+                return
+
+            try:
+                for segment, rows in collection.iter_rows():
+                    if yielded:
+                        rows = [row for row in rows if segment.ids[row] not in yielded]
+                    for start in range(0, len(rows), batch_size):
+                        batch = rows[start : start + batch_size]
+                        ids = [segment.ids[row] for row in batch]
+                        documents = (
+                            segment.get_documents(batch) if read_documents else []
+                        )
+                        vectors = (
+                            segment.get_vectors(batch) if "vectors" in fields else None
+                        )
+                        yield make_item_batch(
+                            fields,
+                            ids,
+                            documents=[document["text"] for document in documents],
+                            metadatas=[document["metadata"] for document in documents],
+                            vectors=vectors,
+                        )
+                        yielded.update(ids)
+                return
+            except FileNotFoundError:
+                # A segment was compacted away by a concurrent writer: reload
+                # and carry on with the items not yielded yet
+                if attempt:
+                    raise
+
+    def get_vectors(self, collection_name: str, ids: list[str]) -> Optional[dict]:
+        # Stored vectors are normalized to unit length, which leaves cosine
+        # similarities unchanged
+        def get_vectors(collection: EmbeddedCollection) -> dict:
+            vectors = {}
+            for id in ids:
+                if id in collection.rows:
+                    segment_idx, row = collection.rows[id]
+                    segment = collection.segments[segment_idx][0]
+                    vectors[id] = segment.get_vectors([row])[0]
+            return vectors
+
+        return self._read(collection_name, get_vectors)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        # Delete the items from the collection based on the ids or the filter.
+        if not self.has_collection(collection_name) or not (ids or filter):
+            return
+
+        with self._lock(collection_name):
+            previous = self._read_manifest(collection_name)
+            if previous is None:
+                return
+            collection = self._load_collection(collection_name, previous)
+
+            if not ids:
+                ids = []
+                for segment, rows in collection.iter_rows():
+                    ids.extend(
+                        segment.ids[row]
+                        for row, document in zip(rows, segment.get_documents(rows))
+                        if match_filter(document["metadata"], filter)
+                    )
+
+            self._commit(
+                collection_name,
+                self._tombstone(previous, collection, ids),
+                previous,
+            )
+
+    def reset(self):
+        # Resets the database. This will delete all collections and item entries.
+        with self.lock:
+            self.collections = {}
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -2,12 +2,15 @@ from pymilvus import MilvusClient as Client
 from pymilvus import FieldSchema, DataType
 import json
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 from open_webui.retrieval.vector.main import (
+    DEFAULT_ITEM_FIELDS,
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    ItemBatch,
+    make_item_batch,
 )
 from open_webui.config import (
     MILVUS_URI,
@@ -26,6 +29,8 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
 class MilvusClient(VectorDBBase):
+    MULTI_VECTOR_SEARCH = True
+
     def __init__(self):
         self.collection_prefix = "open_webui"
         if MILVUS_TOKEN is None:
@@ -281,6 +286,48 @@ class MilvusClient(VectorDBBase):
         # This will use the paginated query logic.
         return self.query(collection_name=collection_name, filter={}, limit=None)
 
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        collection_name = collection_name.replace("-", "_")
+        if not self.has_collection(collection_name):
+            return
+
+        output_fields = ["id"]
+        if "documents" in fields:
+            output_fields.append("data")
+        if "metadatas" in fields:
+            output_fields.append("metadata")
+        if "vectors" in fields:
+            output_fields.append("vector")
+
+        # Paginate on the primary key: offsets are capped at 16384 results
+        last_id = None
+        while True:
+            results = self.client.query(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                filter=f"id > {json.dumps(last_id)}" if last_id is not None else "",
+                output_fields=output_fields,
+                limit=batch_size,
+            )
+            if not results:
+                return
+
+            results.sort(key=lambda item: item["id"])
+            yield make_item_batch(
+                fields,
+                [item["id"] for item in results],
+                documents=[item.get("data", {}).get("text") for item in results],
+                metadatas=[item.get("metadata") for item in results],
+                vectors=[list(item.get("vector") or []) for item in results],
+            )
+            if len(results) < batch_size:
+                return
+            last_id = results[-1]["id"]
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection_name = collection_name.replace("-", "_")
@@ -1,12 +1,15 @@
 from opensearchpy import OpenSearch
-from opensearchpy.helpers import bulk
-from typing import Optional
+from opensearchpy.helpers import bulk, scan
+from typing import Iterator, Optional
 
 from open_webui.retrieval.vector.main import (
+    DEFAULT_ITEM_FIELDS,
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    ItemBatch,
+    make_item_batch,
 )
 from open_webui.config import (
     OPENSEARCH_URI,
@@ -45,6 +48,15 @@ class OpenSearchClient(VectorDBBase):
 
         return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
 
+    def _hits_to_item_batch(self, hits, fields) -> ItemBatch:
+        return make_item_batch(
+            fields,
+            [hit["_id"] for hit in hits],
+            documents=[hit.get("_source", {}).get("text") for hit in hits],
+            metadatas=[hit.get("_source", {}).get("metadata") for hit in hits],
+            vectors=[hit.get("_source", {}).get("vector") for hit in hits],
+        )
+
     def _result_to_search_result(self, result) -> SearchResult:
         if not result["hits"]["hits"]:
             return None
@@ -186,6 +198,38 @@ class OpenSearchClient(VectorDBBase):
         )
         return self._result_to_get_result(result)
 
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        if not self.has_collection(collection_name):
+            return
+
+        source = [
+            {"documents": "text", "metadatas": "metadata", "vectors": "vector"}[field]
+            for field in fields
+        ]
+        query = {
+            "query": {"match_all": {}},
+            "_source": source or False,
+        }
+
+        hits = []
+        for hit in scan(
+            self.client,
+            index=self._get_index_name(collection_name),
+            query=query,
+            size=batch_size,
+        ):
+            hits.append(hit)
+            if len(hits) >= batch_size:
+                yield self._hits_to_item_batch(hits, fields)
+                hits = []
+        if hits:
+            yield self._hits_to_item_batch(hits, fields)
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         self._create_index_if_not_exists(
             collection_name=collection_name, dimension=len(items[0]["vector"])
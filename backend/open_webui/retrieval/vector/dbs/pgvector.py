@@ -1,5 +1,13 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
+import io
+import json
+import hashlib
 import logging
+import math
+import struct
+import uuid
+
+import numpy as np
 from sqlalchemy import (
     cast,
     column,
@@ -17,18 +25,34 @@ from sqlalchemy.sql import true
 from sqlalchemy.pool import NullPool
 
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB, array
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import JSONB, array, insert
+from pgvector.sqlalchemy import HALFVEC, Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
 
 from open_webui.retrieval.vector.main import (
+    DEFAULT_ITEM_FIELDS,
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    ItemBatch,
+    make_item_batch,
+)
+from open_webui.config import (
+    PGVECTOR_DB_URL,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_INDEX_HALFVEC,
+    PGVECTOR_INDEX_TYPE,
+    PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH,
+    PGVECTOR_INSERT_BATCH_SIZE,
+    PGVECTOR_INSERT_METHOD,
+    PGVECTOR_IVFFLAT_LISTS,
+    PGVECTOR_IVFFLAT_PROBES,
+    PGVECTOR_PARTITION_BY_COLLECTION,
 )
-from open_webui.config import PGVECTOR_DB_URL, PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH
 
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -38,6 +62,15 @@ Base = declarative_base()
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+# https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_BINARY_TRAILER = struct.pack("!h", -1)
+COPY_COLUMNS = ("id", "vector", "collection_name", "text", "vmetadata")
+
+VECTOR_INDEX_NAME = "idx_document_chunk_vector"
+# Partition of every collection when document_chunk is partitioned
+COLLECTION_TABLE_NAME = "document_chunk_collection"
+
 
 class DocumentChunk(Base):
     __tablename__ = "document_chunk"
@@ -74,30 +107,357 @@ class PgvectorClient(VectorDBBase):
             self.check_vector_length()
 
             # Create the tables if they do not exist
+            self.partitioned = self.create_tables()
+            if self.partitioned and PGVECTOR_INDEX_TYPE == "ivfflat":
+                log.warning(
+                    "ivfflat can't be trained on the empty partitions of new "
+                    "collections, the partitioned document_chunk table uses hnsw."
+                )
+
+            # Create an index on the vector column if it doesn't exist
+            self.ensure_vector_index()
+            if not self.partitioned:
+                self.session.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
+                        "ON document_chunk (collection_name);"
+                    )
+                )
+            self.session.commit()
+            log.info("Initialization complete.")
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during initialization: {e}")
+            raise
+
+    def create_tables(self) -> bool:
+        """
+        Create document_chunk if it doesn't exist, partitioned by collection
+        when PGVECTOR_PARTITION_BY_COLLECTION is set. Returns whether the
+        (existing) table is partitioned.
+        """
+        relkind = self.session.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = 'document_chunk'")
+        ).scalar()
+
+        if relkind is None and PGVECTOR_PARTITION_BY_COLLECTION:
+            # The partition key must be part of the primary key
+            self.session.execute(
+                text(
+                    "CREATE TABLE document_chunk ("
+                    "id TEXT NOT NULL, "
+                    f"vector VECTOR({VECTOR_LENGTH}), "
+                    "collection_name TEXT NOT NULL, "
+                    "text TEXT, "
+                    "vmetadata JSONB, "
+                    "PRIMARY KEY (id, collection_name)"
+                    ") PARTITION BY LIST (collection_name)"
+                )
+            )
+            relkind = "p"
+        elif relkind is None:
             # Base.metadata.create_all requires a bind (engine or connection)
             # Get the connection from the session
             connection = self.session.connection()
             Base.metadata.create_all(bind=connection)
+        elif relkind != "p" and PGVECTOR_PARTITION_BY_COLLECTION:
+            log.warning(
+                "PGVECTOR_PARTITION_BY_COLLECTION only applies to new installs, "
+                "the existing document_chunk table isn't partitioned."
+            )
 
-            # Create an index on the vector column if it doesn't exist
+        if relkind == "p":
             self.session.execute(
                 text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
+                    f"CREATE TABLE IF NOT EXISTS {COLLECTION_TABLE_NAME} ("
+                    "collection_name TEXT PRIMARY KEY, partition_name TEXT NOT NULL)"
                 )
             )
-            self.session.execute(
+        return relkind == "p"
+
+    def get_partition_name(self, collection_name: str) -> Optional[str]:
+        # Not cached: other workers create and drop partitions too
+        return self.session.execute(
+            text(
+                f"SELECT partition_name FROM {COLLECTION_TABLE_NAME} "
+                "WHERE collection_name = :name"
+            ),
+            {"name": collection_name},
+        ).scalar()
+
+    def ensure_partition(self, collection_name: str) -> None:
+        """Create and attach the partition of a collection on first insert."""
+        if not self.partitioned or self.get_partition_name(collection_name):
+            return
+
+        partition_name = f"document_chunk_{hashlib.sha256(collection_name.encode()).hexdigest()[:32]}"
+        # DDL takes no bind parameters; colons would be read as ones by text()
+        value = "'" + collection_name.replace("'", "''").replace(":", "\\:") + "'"
+
+        # In its own transaction, so the partition is visible to other
+        # sessions right away. Registering first serializes concurrent
+        # creators of the same partition.
+        with self.session.get_bind().begin() as connection:
+            connection.execute(
                 text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
-                    "ON document_chunk (collection_name);"
+                    f"INSERT INTO {COLLECTION_TABLE_NAME} (collection_name, partition_name) "
+                    "VALUES (:name, :partition) ON CONFLICT DO NOTHING"
+                ),
+                {"name": collection_name, "partition": partition_name},
+            )
+            attached = connection.execute(
+                text(
+                    "SELECT 1 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE c.relname = :partition"
+                ),
+                {"partition": partition_name},
+            ).first()
+            if not attached:
+                # CREATE TABLE ... PARTITION OF would lock out searches on
+                # document_chunk, ATTACH PARTITION doesn't
+                connection.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS {partition_name} "
+                        "(LIKE document_chunk INCLUDING DEFAULTS)"
+                    )
                 )
+                connection.execute(
+                    text(
+                        f"ALTER TABLE document_chunk ATTACH PARTITION {partition_name} "
+                        f"FOR VALUES IN ({value})"
+                    )
+                )
+
+    def get_vector_expression(self, vector):
+        # A halfvec index is an expression index, searches must use the same cast
+        if self.index_halfvec:
+            return cast(vector, HALFVEC(VECTOR_LENGTH))
+        return vector
+
+    def get_index_type(self) -> str:
+        """
+        Index type to build. ivfflat centroids are computed from the rows the
+        index is built on, and a partition is attached (and its index built)
+        before the first chunk of its collection is inserted, so partitioned
+        tables use hnsw instead.
+        """
+        if PGVECTOR_INDEX_TYPE == "ivfflat" and self.partitioned:
+            return "hnsw"
+        return PGVECTOR_INDEX_TYPE
+
+    def get_ivfflat_lists(self, table: str = "document_chunk") -> int:
+        """ivfflat lists for the rows of `table`."""
+        if PGVECTOR_IVFFLAT_LISTS > 0:
+            return PGVECTOR_IVFFLAT_LISTS
+
+        # https://github.com/pgvector/pgvector#ivfflat, but never below the
+        # previous fixed 100: an index created on an empty table would
+        # otherwise keep a single list
+        rows = self.session.execute(text(f"SELECT count(*) FROM {table}"))
+        rows = rows.scalar() or 0
+        if rows <= 1_000_000:
+            return max(rows // 1000, 100)
+        return int(math.sqrt(rows))
+
+    def get_vector_index_sql(
+        self,
+        name: str,
+        concurrently: bool = False,
+        table: str = "document_chunk",
+    ):
+        """
+        CREATE INDEX statement for the configured index on `table`, None for
+        "none". ivfflat lists are derived from the rows of `table`.
+        """
+        index_type = self.get_index_type()
+        if index_type == "none":
+            return None
+
+        if PGVECTOR_INDEX_HALFVEC:
+            column = f"(vector::halfvec({VECTOR_LENGTH})) halfvec_cosine_ops"
+        else:
+            column = "vector vector_cosine_ops"
+
+        if index_type == "hnsw":
+            method = "hnsw"
+            options = (
+                f"m = {PGVECTOR_HNSW_M}, "
+                f"ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION}"
+            )
+        elif index_type == "ivfflat":
+            method = "ivfflat"
+            options = f"lists = {self.get_ivfflat_lists(table)}"
+        else:
+            raise ValueError(f"Unknown PGVECTOR_INDEX_TYPE: {PGVECTOR_INDEX_TYPE}")
+
+        return (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+            f"{name} ON {table} USING {method} ({column}) WITH ({options})"
+        )
+
+    def load_vector_index(self) -> None:
+        # Method and options of the existing index, used to tune searches
+        row = self.session.execute(
+            text(
+                "SELECT am.amname, c.reloptions, pg_get_indexdef(c.oid) AS definition "
+                "FROM pg_class c JOIN pg_am am ON am.oid = c.relam "
+                "WHERE c.relname = :name"
+            ),
+            {"name": VECTOR_INDEX_NAME},
+        ).first()
+
+        self.index_type = row.amname if row else None
+        self.index_halfvec = bool(row) and "halfvec" in row.definition
+        self.ivfflat_lists = None
+        for option in (row.reloptions if row else None) or []:
+            key, _, value = option.partition("=")
+            if key == "lists":
+                self.ivfflat_lists = int(value)
+
+    def ensure_vector_index(self) -> None:
+        self.load_vector_index()
+        if self.index_type is None:
+            sql = self.get_vector_index_sql(VECTOR_INDEX_NAME)
+            if sql:
+                self.session.execute(text(sql))
+                self.load_vector_index()
+        elif (
+            self.index_type != self.get_index_type()
+            or self.index_halfvec != PGVECTOR_INDEX_HALFVEC
+        ):
+            log.warning(
+                "The document_chunk vector index doesn't match PGVECTOR_INDEX_TYPE "
+                "and PGVECTOR_INDEX_HALFVEC; run `open-webui reindex-vectors` to rebuild it."
+            )
+        elif (
+            self.index_type == "ivfflat" and self.ivfflat_lists and not self.partitioned
+        ):
+            lists = self.get_ivfflat_lists()
+            # ivfflat lists are fixed at build time while the table grows
+            if not lists / 4 <= self.ivfflat_lists <= lists * 4:
+                log.warning(
+                    f"The document_chunk ivfflat index has {self.ivfflat_lists} lists, "
+                    f"{lists} suit the current data; run `open-webui reindex-vectors` "
+                    "to rebuild it."
+                )
+
+    def reindex(self) -> None:
+        """
+        Rebuild the vector index with the current PGVECTOR_INDEX_* settings
+        without blocking writes: the new index is built concurrently next to
+        the old one, which is then swapped out.
+        """
+        new_name = f"{VECTOR_INDEX_NAME}_new"
+        sql = self.get_vector_index_sql(new_name, concurrently=True)
+        partition_names = (
+            [
+                row.partition_name
+                for row in self.session.execute(
+                    text(f"SELECT partition_name FROM {COLLECTION_TABLE_NAME}")
+                )
+            ]
+            if self.partitioned
+            else []
+        )
+        self.session.commit()
+
+        engine = self.session.get_bind()
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            # Indexes of partitioned tables can't be built concurrently: build
+            # the index of every partition concurrently and attach them to an
+            # index on the parent only
+            concurrently = "" if self.partitioned else "CONCURRENTLY "
+
+            # Left over (invalid) by an interrupted reindex
+            connection.execute(text(f"DROP INDEX {concurrently}IF EXISTS {new_name}"))
+            if self.partitioned:
+                # Partition indexes of a previous reindex still named after
+                # the new index would clash with the ones built now
+                self.rename_partition_indexes(connection, VECTOR_INDEX_NAME, new_name)
+            if sql and self.partitioned:
+                connection.execute(
+                    text(
+                        sql.replace("CONCURRENTLY ", "").replace(
+                            "ON document_chunk", "ON ONLY document_chunk"
+                        )
+                    )
+                )
+                for partition_name in partition_names:
+                    index_name = f"{new_name}_{partition_name[-32:]}"
+                    connection.execute(
+                        text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+                    )
+                    connection.execute(
+                        text(
+                            self.get_vector_index_sql(
+                                index_name, concurrently=True, table=partition_name
+                            )
+                        )
+                    )
+                    connection.execute(
+                        text(f"ALTER INDEX {new_name} ATTACH PARTITION {index_name}")
+                    )
+            elif sql:
+                log.info(f"Building vector index: {sql}")
+                connection.execute(text(sql))
+            connection.execute(
+                text(f"DROP INDEX {concurrently}IF EXISTS {VECTOR_INDEX_NAME}")
+            )
+            if sql:
+                connection.execute(
+                    text(f"ALTER INDEX {new_name} RENAME TO {VECTOR_INDEX_NAME}")
+                )
+                if self.partitioned:
+                    self.rename_partition_indexes(
+                        connection, VECTOR_INDEX_NAME, new_name
+                    )
+
+        self.load_vector_index()
+        self.session.commit()
+        log.info(f"Reindex complete, vector index: {self.index_type or 'none'}.")
+
+    @staticmethod
+    def rename_partition_indexes(connection, parent: str, prefix: str) -> None:
+        """Rename the partition indexes of `parent` named `{prefix}_*` after it."""
+        names = connection.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :parent"
+            ),
+            {"parent": parent},
+        ).scalars()
+        for name in list(names):
+            if name.startswith(f"{prefix}_"):
+                connection.execute(
+                    text(f"ALTER INDEX {name} RENAME TO {parent}{name[len(prefix):]}")
+                )
+
+    def set_search_parameters(self, limit: Optional[int]) -> None:
+        # Per-transaction settings of the index scan
+        if self.index_type == "hnsw":
+            ef_search = PGVECTOR_HNSW_EF_SEARCH or max(40, limit or 0)
+            self.session.execute(
+                text("SELECT set_config('hnsw.ef_search', :value, true)"),
+                {"value": str(ef_search)},
+            )
+        elif self.index_type == "ivfflat":
+            if self.partitioned:
+                # Left by an earlier version: the centroids of partitions that
+                # were attached empty are arbitrary, search all lists until
+                # the index is rebuilt
+                probes = self.ivfflat_lists or 1
+            else:
+                probes = PGVECTOR_IVFFLAT_PROBES or max(
+                    round(math.sqrt(self.ivfflat_lists or 1)), 1
+                )
+            self.session.execute(
+                text("SELECT set_config('ivfflat.probes', :value, true)"),
+                {"value": str(probes)},
             )
-            self.session.commit()
-            log.info("Initialization complete.")
-        except Exception as e:
-            self.session.rollback()
-            log.exception(f"Error during initialization: {e}")
-            raise
 
     def check_vector_length(self) -> None:
         """
@@ -139,29 +499,150 @@ class PgvectorClient(VectorDBBase):
         current_length = len(vector)
         if current_length < VECTOR_LENGTH:
             # Pad the vector with zeros
-            vector += [0.0] * (VECTOR_LENGTH - current_length)
+            vector = vector + [0.0] * (VECTOR_LENGTH - current_length)
         elif current_length > VECTOR_LENGTH:
             # Truncate the vector to VECTOR_LENGTH
             vector = vector[:VECTOR_LENGTH]
         return vector
 
-    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+    def adjust_vectors_length(self, vectors: List[List[float]]) -> np.ndarray:
+        # Pad with zeros / truncate all vectors to VECTOR_LENGTH at once
+        matrix = np.zeros((len(vectors), VECTOR_LENGTH), dtype=np.float32)
+        for idx, vector in enumerate(vectors):
+            vector = vector[:VECTOR_LENGTH]
+            matrix[idx, : len(vector)] = vector
+        return matrix
+
+    def encode_copy_rows(
+        self, collection_name: str, items: List[VectorItem], vectors: np.ndarray
+    ) -> bytes:
+        """Encode items as COPY ... (FORMAT BINARY) data for COPY_COLUMNS."""
+
+        def field(value: Optional[bytes]) -> bytes:
+            if value is None:
+                return struct.pack("!i", -1)
+            return struct.pack("!i", len(value)) + value
+
+        collection = field(collection_name.encode())
+        # pgvector binary format: dimensions, unused, big-endian float4 values
+        vector_header = struct.pack("!HH", VECTOR_LENGTH, 0)
+        vectors = vectors.astype(">f4")
+
+        buffer = io.BytesIO()
+        buffer.write(COPY_BINARY_HEADER)
+        for item, vector in zip(items, vectors):
+            buffer.write(struct.pack("!h", len(COPY_COLUMNS)))
+            buffer.write(field(item["id"].encode()))
+            buffer.write(field(vector_header + vector.tobytes()))
+            buffer.write(collection)
+            buffer.write(
+                field(item["text"].encode() if item["text"] is not None else None)
+            )
+            buffer.write(
+                # jsonb binary format: version 1 followed by the json text
+                field(b"\x01" + json.dumps(item["metadata"]).encode())
+                if item["metadata"] is not None
+                else field(None)
+            )
+        buffer.write(COPY_BINARY_TRAILER)
+        return buffer.getvalue()
+
+    def get_copy_cursor(self):
+        if PGVECTOR_INSERT_METHOD != "copy":
+            return None
+
+        # Raw DB-API cursor sharing the session's transaction
+        cursor = self.session.connection().connection.cursor()
+        if not hasattr(cursor, "copy_expert"):
+            # Only psycopg2 supports copy_expert, use INSERT statements otherwise
+            cursor.close()
+            return None
+        return cursor
+
+    def write_items(
+        self, collection_name: str, items: List[VectorItem], upsert: bool
+    ) -> None:
+        """
+        Write items in batches of PGVECTOR_INSERT_BATCH_SIZE rows in the current
+        transaction, with binary COPY when possible. Upserts COPY into a
+        temporary table and merge it with INSERT ... ON CONFLICT DO UPDATE.
+        """
+        if upsert:
+            # A row can't be updated twice by the same statement; keep the last
+            items = list({item["id"]: item for item in items}.values())
+
+        self.ensure_partition(collection_name)
+
+        cursor = self.get_copy_cursor()
+        columns = ", ".join(COPY_COLUMNS)
+        updates = ", ".join(
+            f"{name} = EXCLUDED.{name}" for name in COPY_COLUMNS if name != "id"
+        )
+        # The primary key of a partitioned table includes the collection
+        conflict_columns = ["id", "collection_name"] if self.partitioned else ["id"]
+
+        table = "document_chunk"
+        if cursor is not None and upsert:
+            table = f"document_chunk_upsert_{uuid.uuid4().hex}"
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {table} "
+                f"(LIKE document_chunk INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+
         try:
-            new_items = []
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                new_chunk = DocumentChunk(
-                    id=item["id"],
-                    vector=vector,
-                    collection_name=collection_name,
-                    text=item["text"],
-                    vmetadata=item["metadata"],
+            batch_size = max(PGVECTOR_INSERT_BATCH_SIZE, 1)
+            for start in range(0, len(items), batch_size):
+                batch = items[start : start + batch_size]
+                vectors = self.adjust_vectors_length([item["vector"] for item in batch])
+
+                if cursor is not None:
+                    cursor.copy_expert(
+                        f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT BINARY)",
+                        io.BytesIO(
+                            self.encode_copy_rows(collection_name, batch, vectors)
+                        ),
+                    )
+                    continue
+
+                stmt = insert(DocumentChunk).values(
+                    [
+                        {
+                            "id": item["id"],
+                            "vector": vector,
+                            "collection_name": collection_name,
+                            "text": item["text"],
+                            "vmetadata": item["metadata"],
+                        }
+                        for item, vector in zip(batch, vectors)
+                    ]
+                )
+                if upsert:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=conflict_columns,
+                        set_={
+                            name: stmt.excluded[name]
+                            for name in COPY_COLUMNS
+                            if name != "id"
+                        },
+                    )
+                self.session.execute(stmt)
+
+            if cursor is not None and upsert:
+                cursor.execute(
+                    f"INSERT INTO document_chunk ({columns}) "
+                    f"SELECT {columns} FROM {table} "
+                    f"ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET {updates}"
                 )
-                new_items.append(new_chunk)
-            self.session.bulk_save_objects(new_items)
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        try:
+            self.write_items(collection_name, items, upsert=False)
             self.session.commit()
             log.info(
-                f"Inserted {len(new_items)} items into collection '{collection_name}'."
+                f"Inserted {len(items)} items into collection '{collection_name}'."
             )
         except Exception as e:
             self.session.rollback()
@@ -170,29 +651,7 @@ class PgvectorClient(VectorDBBase):
 
     def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                existing = (
-                    self.session.query(DocumentChunk)
-                    .filter(DocumentChunk.id == item["id"])
-                    .first()
-                )
-                if existing:
-                    existing.vector = vector
-                    existing.text = item["text"]
-                    existing.vmetadata = item["metadata"]
-                    existing.collection_name = (
-                        collection_name  # Update collection_name if necessary
-                    )
-                else:
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=item["metadata"],
-                    )
-                    self.session.add(new_chunk)
+            self.write_items(collection_name, items, upsert=True)
             self.session.commit()
             log.info(
                 f"Upserted {len(items)} items into collection '{collection_name}'."
@@ -208,8 +667,18 @@ class PgvectorClient(VectorDBBase):
         vectors: List[List[float]],
         limit: Optional[int] = None,
     ) -> Optional[SearchResult]:
+        return self.search_collections([collection_name], vectors, limit)
+
+    def search_collections(
+        self,
+        collection_names: List[str],
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+    ) -> Optional[SearchResult]:
+        # All collections share the document_chunk table, so every query
+        # vector is matched against all of them in a single statement
         try:
-            if not vectors:
+            if not vectors or not collection_names:
                 return None
 
             # Adjust query vectors to VECTOR_LENGTH
@@ -231,19 +700,18 @@ class PgvectorClient(VectorDBBase):
             )
 
             # Build the lateral subquery for each query vector
+            distance = self.get_vector_expression(DocumentChunk.vector).cosine_distance(
+                self.get_vector_expression(query_vectors.c.q_vector)
+            )
             subq = (
                 select(
                     DocumentChunk.id,
                     DocumentChunk.text,
                     DocumentChunk.vmetadata,
-                    (
-                        DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)
-                    ).label("distance"),
-                )
-                .where(DocumentChunk.collection_name == collection_name)
-                .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
+                    distance.label("distance"),
                 )
+                .where(DocumentChunk.collection_name.in_(collection_names))
+                .order_by(distance)
             )
             if limit is not None:
                 subq = subq.limit(limit)
@@ -263,6 +731,7 @@ class PgvectorClient(VectorDBBase):
                 .order_by(query_vectors.c.qid, subq.c.distance)
             )
 
+            self.set_search_parameters(limit)
             result_proxy = self.session.execute(stmt)
             results = result_proxy.all()
 
@@ -331,6 +800,9 @@ class PgvectorClient(VectorDBBase):
         self, collection_name: str, limit: Optional[int] = None
     ) -> Optional[GetResult]:
         try:
+            if self.partitioned and not self.get_partition_name(collection_name):
+                return None
+
             query = self.session.query(DocumentChunk).filter(
                 DocumentChunk.collection_name == collection_name
             )
@@ -351,6 +823,70 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during get: {e}")
             return None
 
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        columns = [DocumentChunk.id]
+        if "documents" in fields:
+            columns.append(DocumentChunk.text)
+        if "metadatas" in fields:
+            columns.append(DocumentChunk.vmetadata)
+        if "vectors" in fields:
+            columns.append(DocumentChunk.vector)
+        stmt = select(*columns).where(DocumentChunk.collection_name == collection_name)
+
+        # Server-side cursor on a connection of its own, so that callers can
+        # use the session between batches
+        with self.session.get_bind().connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(stmt)
+            for rows in result.partitions():
+                yield make_item_batch(
+                    fields,
+                    [row.id for row in rows],
+                    documents=(
+                        [row.text for row in rows] if "documents" in fields else None
+                    ),
+                    metadatas=(
+                        [row.vmetadata for row in rows]
+                        if "metadatas" in fields
+                        else None
+                    ),
+                    vectors=(
+                        [
+                            row.vector.tolist() if row.vector is not None else None
+                            for row in rows
+                        ]
+                        if "vectors" in fields
+                        else None
+                    ),
+                )
+
+    def get_vectors(
+        self, collection_name: str, ids: List[str]
+    ) -> Optional[Dict[str, List[float]]]:
+        try:
+            results = (
+                self.session.query(DocumentChunk.id, DocumentChunk.vector)
+                .filter(
+                    DocumentChunk.collection_name == collection_name,
+                    DocumentChunk.id.in_(ids),
+                )
+                .all()
+            )
+            # Vectors shorter than VECTOR_LENGTH are stored zero-padded, which
+            # doesn't change their cosine similarity
+            return {
+                result.id: list(result.vector)
+                for result in results
+                if result.vector is not None
+            }
+        except Exception as e:
+            log.exception(f"Error during get_vectors: {e}")
+            return None
+
     def delete(
         self,
         collection_name: str,
@@ -377,6 +913,12 @@ class PgvectorClient(VectorDBBase):
             raise
 
     def reset(self) -> None:
+        if self.partitioned:
+            for row in self.session.execute(
+                text(f"SELECT collection_name FROM {COLLECTION_TABLE_NAME}")
+            ).all():
+                self.delete_collection(row.collection_name)
+
         try:
             deleted = self.session.query(DocumentChunk).delete()
             self.session.commit()
@@ -393,6 +935,18 @@ class PgvectorClient(VectorDBBase):
 
     def has_collection(self, collection_name: str) -> bool:
         try:
+            if self.partitioned:
+                # The partition is registered before the first rows are written
+                # and kept when all rows are deleted: only rows make a collection
+                partition_name = self.get_partition_name(collection_name)
+                return (
+                    partition_name is not None
+                    and self.session.execute(
+                        text(f"SELECT 1 FROM {partition_name} LIMIT 1")
+                    ).first()
+                    is not None
+                )
+
             exists = (
                 self.session.query(DocumentChunk)
                 .filter(DocumentChunk.collection_name == collection_name)
@@ -401,9 +955,52 @@ class PgvectorClient(VectorDBBase):
             )
             return exists
         except Exception as e:
+            self.session.rollback()
             log.exception(f"Error checking collection existence: {e}")
             return False
 
+    def drop_partition(self, collection_name: str) -> bool:
+        partition_name = self.get_partition_name(collection_name)
+        self.session.commit()
+        if not partition_name:
+            return True
+
+        try:
+            # DETACH CONCURRENTLY doesn't lock out searches and inserts on
+            # document_chunk, but can't run in a transaction
+            engine = self.session.get_bind()
+            with engine.connect().execution_options(
+                isolation_level="AUTOCOMMIT"
+            ) as connection:
+                attached = connection.execute(
+                    text(
+                        "SELECT 1 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                        "WHERE c.relname = :partition"
+                    ),
+                    {"partition": partition_name},
+                ).first()
+                if attached:
+                    connection.execute(
+                        text(
+                            f"ALTER TABLE document_chunk DETACH PARTITION "
+                            f"{partition_name} CONCURRENTLY"
+                        )
+                    )
+                connection.execute(text(f"DROP TABLE IF EXISTS {partition_name}"))
+                connection.execute(
+                    text(
+                        f"DELETE FROM {COLLECTION_TABLE_NAME} WHERE collection_name = :name"
+                    ),
+                    {"name": collection_name},
+                )
+            return True
+        except Exception as e:
+            log.exception(f"Error dropping partition of '{collection_name}': {e}")
+            return False
+
     def delete_collection(self, collection_name: str) -> None:
-        self.delete(collection_name)
+        # Dropping the partition of a collection is a metadata operation; if
+        # that fails the rows are deleted instead
+        if not self.partitioned or not self.drop_partition(collection_name):
+            self.delete(collection_name)
         log.info(f"Collection '{collection_name}' deleted.")
@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Iterator, Union
 import logging
 import time  # for measuring elapsed time
 from pinecone import ServerlessSpec
@@ -10,10 +10,14 @@ import concurrent.futures  # for parallel batch upserts
 from pinecone.grpc import PineconeGRPC  # use gRPC client for faster upserts
 
 from open_webui.retrieval.vector.main import (
+    DEFAULT_ITEM_FIELDS,
+    VECTOR_SEARCH_EXECUTOR,
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    ItemBatch,
+    make_item_batch,
 )
 from open_webui.config import (
     PINECONE_API_KEY,
@@ -404,6 +408,52 @@ class PineconeClient(VectorDBBase):
             log.error(f"Error searching in '{collection_name_with_prefix}': {e}")
             return None
 
+    def search_collections(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+    ) -> Optional[SearchResult]:
+        """Search several collections of the index with one query per vector."""
+        if not collection_names or not vectors:
+            return None
+
+        if limit is None or limit <= 0:
+            limit = NO_LIMIT
+
+        collection_filter = {
+            "collection_name": {
+                "$in": [
+                    self._get_collection_name_with_prefix(collection_name)
+                    for collection_name in collection_names
+                ]
+            }
+        }
+
+        def query(vector: List[Union[float, int]]):
+            return self.index.query(
+                vector=vector,
+                top_k=limit,
+                include_metadata=True,
+                filter=collection_filter,
+            )
+
+        result = SearchResult(ids=[], distances=[], documents=[], metadatas=[])
+        try:
+            for query_response in VECTOR_SEARCH_EXECUTOR.map(query, vectors):
+                matches = query_response.matches or []
+                get_result = self._result_to_get_result(matches)
+                result.ids.append(get_result.ids[0])
+                result.documents.append(get_result.documents[0])
+                result.metadatas.append(get_result.metadatas[0])
+                result.distances.append(
+                    [self._normalize_distance(match.score) for match in matches]
+                )
+        except Exception as e:
+            log.error(f"Error searching in {len(collection_names)} collections: {e}")
+            return None
+        return result
+
     def query(
         self, collection_name: str, filter: Dict, limit: Optional[int] = None
     ) -> Optional[GetResult]:
@@ -462,6 +512,46 @@ class PineconeClient(VectorDBBase):
             log.error(f"Error getting collection '{collection_name}': {e}")
             return None
 
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        """
+        Stream the items of a collection. Pinecone can't page through filtered
+        results, so like `get` this reads up to NO_LIMIT matches in one query,
+        with their values only when vectors are asked for.
+        """
+        collection_name_with_prefix = self._get_collection_name_with_prefix(
+            collection_name
+        )
+
+        try:
+            query_response = self.index.query(
+                vector=[0.0] * self.dimension,
+                top_k=NO_LIMIT,
+                include_metadata="documents" in fields or "metadatas" in fields,
+                include_values="vectors" in fields,
+                filter={"collection_name": collection_name_with_prefix},
+            )
+        except Exception as e:
+            log.error(f"Error iterating collection '{collection_name}': {e}")
+            return
+
+        matches = query_response.matches
+        for start in range(0, len(matches), batch_size):
+            batch = matches[start : start + batch_size]
+            yield make_item_batch(
+                fields,
+                [match["id"] for match in batch],
+                documents=[
+                    (match.get("metadata") or {}).get("text", "") for match in batch
+                ],
+                metadatas=[match.get("metadata") or {} for match in batch],
+                vectors=[list(match.get("values") or []) for match in batch],
+            )
+
     def delete(
         self,
         collection_name: str,
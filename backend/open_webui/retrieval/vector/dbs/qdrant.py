@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Iterator, Optional
 import logging
 from urllib.parse import urlparse
 
@@ -7,10 +7,13 @@ from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
 
 from open_webui.retrieval.vector.main import (
+    DEFAULT_ITEM_FIELDS,
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    ItemBatch,
+    make_item_batch,
 )
 from open_webui.config import (
     QDRANT_URI,
@@ -75,6 +78,15 @@ class QdrantClient(VectorDBBase):
             }
         )
 
+    def _points_to_item_batch(self, points, fields) -> ItemBatch:
+        return make_item_batch(
+            fields,
+            [point.id for point in points],
+            documents=[(point.payload or {}).get("text") for point in points],
+            metadatas=[(point.payload or {}).get("metadata") for point in points],
+            vectors=[point.vector for point in points],
+        )
+
     def _create_collection(self, collection_name: str, dimension: int):
         collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
         self.client.create_collection(
@@ -169,6 +181,42 @@ class QdrantClient(VectorDBBase):
         )
         return self._result_to_get_result(points.points)
 
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        if not self.has_collection(collection_name):
+            return
+
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                limit=batch_size,
+                offset=offset,
+                with_payload="documents" in fields or "metadatas" in fields,
+                with_vectors="vectors" in fields,
+            )
+            if points:
+                yield self._points_to_item_batch(points, fields)
+            if offset is None:
+                return
+
+    def get_vectors(self, collection_name: str, ids: list[str]) -> Optional[dict]:
+        try:
+            points = self.client.retrieve(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                ids=ids,
+                with_payload=False,
+                with_vectors=True,
+            )
+            return {str(point.id): point.vector for point in points}
+        except Exception as e:
+            log.exception(f"Error getting vectors from '{collection_name}': {e}")
+            return None
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         self._create_collection_if_not_exists(collection_name, len(items[0]["vector"]))
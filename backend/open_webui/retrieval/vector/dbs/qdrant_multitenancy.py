@@ -1,5 +1,5 @@
 import logging
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
 from urllib.parse import urlparse
 
 import grpc
@@ -12,10 +12,14 @@ from open_webui.config import (
 )
 from open_webui.env import SRC_LOG_LEVELS
 from open_webui.retrieval.vector.main import (
+    DEFAULT_ITEM_FIELDS,
     GetResult,
+    ItemBatch,
     SearchResult,
     VectorDBBase,
     VectorItem,
+    make_item_batch,
+    merge_search_results,
 )
 from qdrant_client import QdrantClient as Qclient
 from qdrant_client.http.exceptions import UnexpectedResponse
@@ -83,6 +87,15 @@ class QdrantClient(VectorDBBase):
             }
         )
 
+    def _points_to_item_batch(self, points, fields) -> ItemBatch:
+        return make_item_batch(
+            fields,
+            [point.id for point in points],
+            documents=[(point.payload or {}).get("text") for point in points],
+            metadatas=[(point.payload or {}).get("metadata") for point in points],
+            vectors=[point.vector for point in points],
+        )
+
     def _get_collection_and_tenant_id(self, collection_name: str) -> Tuple[str, str]:
         """
         Maps the traditional collection name to multi-tenant collection and tenant ID.
@@ -445,6 +458,88 @@ class QdrantClient(VectorDBBase):
             log.exception(f"Error searching collection '{collection_name}': {e}")
             return None
 
+    def search_collections(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: Optional[int],
+    ) -> Optional[SearchResult]:
+        """
+        Search several collections with one batch request per multi-tenant
+        collection, filtering on all of their tenant IDs at once.
+        """
+        if not self.client or not collection_names or not vectors:
+            return None
+
+        if limit is None:
+            limit = NO_LIMIT
+
+        tenant_ids_by_collection = {}
+        for collection_name in collection_names:
+            mt_collection, tenant_id = self._get_collection_and_tenant_id(
+                collection_name
+            )
+            tenant_ids_by_collection.setdefault(mt_collection, []).append(tenant_id)
+
+        results = []
+        for mt_collection, tenant_ids in tenant_ids_by_collection.items():
+            try:
+                # Ensure vector dimensions match the collection
+                collection_dim = self.client.get_collection(
+                    mt_collection
+                ).config.params.vectors.size
+                query_vectors = [
+                    vector[:collection_dim] + [0] * (collection_dim - len(vector))
+                    for vector in vectors
+                ]
+
+                tenant_filter = models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key="tenant_id", match=models.MatchAny(any=tenant_ids)
+                        )
+                    ]
+                )
+                responses = self.client.query_batch_points(
+                    collection_name=mt_collection,
+                    requests=[
+                        models.QueryRequest(
+                            query=vector,
+                            filter=tenant_filter,
+                            limit=limit,
+                            with_payload=True,
+                        )
+                        for vector in query_vectors
+                    ],
+                )
+            except (UnexpectedResponse, grpc.RpcError) as e:
+                if self._is_collection_not_found_error(e):
+                    log.debug(
+                        f"Collection {mt_collection} doesn't exist, skipping it in search"
+                    )
+                    continue
+                _, error_msg = self._extract_error_message(e)
+                log.warning(f"Unexpected Qdrant error during search: {error_msg}")
+                raise
+
+            rows = [
+                self._result_to_get_result(response.points) for response in responses
+            ]
+            results.append(
+                SearchResult(
+                    ids=[row.ids[0] for row in rows],
+                    documents=[row.documents[0] for row in rows],
+                    metadatas=[row.metadatas[0] for row in rows],
+                    # qdrant distance is [-1, 1], normalize to [0, 1]
+                    distances=[
+                        [(point.score + 1.0) / 2.0 for point in response.points]
+                        for response in responses
+                    ],
+                )
+            )
+
+        return merge_search_results(results, len(vectors), limit)
+
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         """
         Query points with filters and tenant isolation.
@@ -539,6 +634,47 @@ class QdrantClient(VectorDBBase):
             log.exception(f"Error getting collection '{collection_name}': {e}")
             return None
 
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        """
+        Stream the items of a collection with tenant isolation.
+        """
+        if not self.client:
+            return
+
+        mt_collection, tenant_id = self._get_collection_and_tenant_id(collection_name)
+        tenant_filter = models.FieldCondition(
+            key="tenant_id", match=models.MatchValue(value=tenant_id)
+        )
+
+        offset = None
+        while True:
+            try:
+                points, offset = self.client.scroll(
+                    collection_name=mt_collection,
+                    scroll_filter=models.Filter(must=[tenant_filter]),
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload="documents" in fields or "metadatas" in fields,
+                    with_vectors="vectors" in fields,
+                )
+            except (UnexpectedResponse, grpc.RpcError) as e:
+                if self._is_collection_not_found_error(e):
+                    log.debug(
+                        f"Collection {mt_collection} doesn't exist, no items to iterate"
+                    )
+                    return
+                raise
+
+            if points:
+                yield self._points_to_item_batch(points, fields)
+            if offset is None:
+                return
+
     def _handle_operation_with_error_retry(
         self, operation_name, mt_collection, points, dimension
     ):
@@ -44,6 +44,10 @@ class Vector:
                 )
 
                 return ElasticsearchClient()
+            case VectorType.EMBEDDED:
+                from open_webui.retrieval.vector.dbs.embedded import EmbeddedClient
+
+                return EmbeddedClient()
             case VectorType.CHROMA:
                 from open_webui.retrieval.vector.dbs.chroma import ChromaClient
 
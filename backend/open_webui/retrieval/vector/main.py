@@ -1,6 +1,18 @@
+import logging
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from open_webui.env import SRC_LOG_LEVELS, VECTOR_SEARCH_WORKERS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Long-lived pool shared by all requests, instead of one pool per query
+VECTOR_SEARCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=VECTOR_SEARCH_WORKERS, thread_name_prefix="vector-search"
+)
 
 
 class VectorItem(BaseModel):
@@ -20,6 +32,66 @@ class SearchResult(GetResult):
     distances: Optional[List[List[float | int]]]
 
 
+class ItemBatch(GetResult):
+    # None for items without a stored vector
+    vectors: Optional[List[List[Optional[List[float | int]]]]] = None
+
+
+# Fields `iter_items` returns unless asked otherwise; ids are always returned
+DEFAULT_ITEM_FIELDS = ("documents", "metadatas")
+
+
+def make_item_batch(
+    fields,
+    ids: list,
+    documents: Optional[list] = None,
+    metadatas: Optional[list] = None,
+    vectors: Optional[list] = None,
+) -> ItemBatch:
+    """Build a batch of `iter_items`, leaving the fields not asked for empty."""
+    return ItemBatch(
+        ids=[ids],
+        documents=[documents] if "documents" in fields else None,
+        metadatas=[metadatas] if "metadatas" in fields else None,
+        vectors=[vectors] if "vectors" in fields else None,
+    )
+
+
+def merge_search_results(
+    results: List[SearchResult], num_vectors: int, limit: Optional[int]
+) -> SearchResult:
+    """
+    Merge the results of several collections for the same `num_vectors` query
+    vectors, keeping the `limit` best matches (highest normalized score) of
+    each vector.
+    """
+    merged = SearchResult(ids=[], distances=[], documents=[], metadatas=[])
+    for idx in range(num_vectors):
+        matches = []
+        for result in results:
+            if result is None or idx >= len(result.ids or []):
+                continue
+            matches.extend(
+                zip(
+                    result.distances[idx],
+                    result.ids[idx],
+                    result.documents[idx],
+                    result.metadatas[idx],
+                )
+            )
+
+        matches.sort(key=lambda match: match[0], reverse=True)
+        if limit is not None:
+            matches = matches[:limit]
+
+        merged.distances.append([match[0] for match in matches])
+        merged.ids.append([match[1] for match in matches])
+        merged.documents.append([match[2] for match in matches])
+        merged.metadatas.append([match[3] for match in matches])
+
+    return merged
+
+
 class VectorDBBase(ABC):
     """
     Abstract base class for all vector database backends.
@@ -31,6 +103,10 @@ class VectorDBBase(ABC):
     implement all abstract methods.
     """
 
+    # Whether `search` returns one result row per query vector; backends
+    # only using the first vector leave it False
+    MULTI_VECTOR_SEARCH = False
+
     @abstractmethod
     def has_collection(self, collection_name: str) -> bool:
         """Check if the collection exists in the vector DB."""
@@ -58,6 +134,68 @@ class VectorDBBase(ABC):
         """Search for similar vectors in a collection."""
         pass
 
+    def search_collections(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: Optional[int],
+    ) -> Optional[SearchResult]:
+        """
+        Search several collections at once. Returns one row per query vector
+        with its `limit` best matches across all collections.
+
+        Backends storing all collections in one table or index override this
+        with a single query. The default runs one search per collection (per
+        collection and vector without MULTI_VECTOR_SEARCH) on a shared thread
+        pool; collections failing to search are skipped.
+        """
+        if not collection_names or not vectors:
+            return None
+
+        def search(collection_name: str, vectors: list) -> Optional[SearchResult]:
+            try:
+                return self.search(collection_name, vectors, limit)
+            except Exception as e:
+                log.exception(f"Error searching collection {collection_name}: {e}")
+                return None
+
+        if self.MULTI_VECTOR_SEARCH:
+            results = list(
+                VECTOR_SEARCH_EXECUTOR.map(
+                    lambda collection_name: search(collection_name, vectors),
+                    collection_names,
+                )
+            )
+            return merge_search_results(results, len(vectors), limit)
+
+        futures = {
+            (collection_name, idx): VECTOR_SEARCH_EXECUTOR.submit(
+                search, collection_name, [vector]
+            )
+            for collection_name in collection_names
+            for idx, vector in enumerate(vectors)
+        }
+
+        # Stack the rows of each collection into one result per collection
+        def first_row(result: Optional[SearchResult], field: str) -> list:
+            rows = getattr(result, field) if result else None
+            return rows[0] if rows else []
+
+        results = []
+        for collection_name in collection_names:
+            rows = [
+                futures[(collection_name, idx)].result() for idx in range(len(vectors))
+            ]
+            results.append(
+                SearchResult(
+                    **{
+                        field: [first_row(row, field) for row in rows]
+                        for field in ["ids", "distances", "documents", "metadatas"]
+                    }
+                )
+            )
+        return merge_search_results(results, len(vectors), limit)
+
     @abstractmethod
     def query(
         self, collection_name: str, filter: Dict, limit: Optional[int] = None
@@ -70,6 +208,49 @@ class VectorDBBase(ABC):
         """Retrieve all vectors from a collection."""
         pass
 
+    def iter_items(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        fields=DEFAULT_ITEM_FIELDS,
+    ) -> Iterator[ItemBatch]:
+        """
+        Stream the items of a collection in batches of up to `batch_size`, with
+        the ids and the requested `fields` ("documents", "metadatas",
+        "vectors"), so large collections can be read with bounded memory.
+
+        Backends override this with server-side pagination. The default
+        slices the result of `get` and looks up vectors per batch.
+        """
+        result = self.get(collection_name)
+        if result is None or not result.ids:
+            return
+
+        ids = result.ids[0]
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            vectors = None
+            if "vectors" in fields:
+                found = self.get_vectors(collection_name, ids[start:end]) or {}
+                vectors = [found.get(id) for id in ids[start:end]]
+
+            yield make_item_batch(
+                fields,
+                ids[start:end],
+                documents=result.documents[0][start:end],
+                metadatas=result.metadatas[0][start:end],
+                vectors=vectors,
+            )
+
+    def get_vectors(
+        self, collection_name: str, ids: List[str]
+    ) -> Optional[Dict[str, List[float]]]:
+        """
+        Retrieve the stored vectors of the given ids. Backends that can't return
+        vectors return None and callers fall back to re-embedding the documents.
+        """
+        return None
+
     @abstractmethod
     def delete(
         self,
@@ -10,6 +10,8 @@ from open_webui.models.functions import (
     Functions,
 )
 from open_webui.utils.plugin import load_function_module_by_id, replace_imports
+from open_webui.utils.filter import invalidate_function_cache
+from open_webui.utils.model_catalog import MODEL_CATALOG
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 from fastapi import APIRouter, Depends, HTTPException, Request, status
@@ -71,8 +73,10 @@ async def create_new_function(
 
             FUNCTIONS = request.app.state.FUNCTIONS
             FUNCTIONS[form_data.id] = function_module
+            invalidate_function_cache(form_data.id)
 
             function = Functions.insert_new_function(user.id, function_type, form_data)
+            MODEL_CATALOG.invalidate()
 
             function_cache_dir = CACHE_DIR / "functions" / form_data.id
             function_cache_dir.mkdir(parents=True, exist_ok=True)
@@ -129,6 +133,7 @@ async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            MODEL_CATALOG.invalidate()
             return function
         else:
             raise HTTPException(
@@ -156,6 +161,7 @@ async def toggle_global_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            MODEL_CATALOG.invalidate()
             return function
         else:
             raise HTTPException(
@@ -187,11 +193,13 @@ async def update_function_by_id(
 
         FUNCTIONS = request.app.state.FUNCTIONS
         FUNCTIONS[id] = function_module
+        invalidate_function_cache(id)
 
         updated = {**form_data.model_dump(exclude={"id"}), "type": function_type}
         log.debug(updated)
 
         function = Functions.update_function_by_id(id, updated)
+        MODEL_CATALOG.invalidate()
 
         if function:
             return function
@@ -223,6 +231,8 @@ async def delete_function_by_id(
         FUNCTIONS = request.app.state.FUNCTIONS
         if id in FUNCTIONS:
             del FUNCTIONS[id]
+        invalidate_function_cache(id)
+        MODEL_CATALOG.invalidate()
 
     return result
 
@@ -303,6 +313,8 @@ async def update_function_valves_by_id(
                 form_data = {k: v for k, v in form_data.items() if v is not None}
                 valves = Valves(**form_data)
                 Functions.update_function_valves_by_id(id, valves.model_dump())
+                invalidate_function_cache(id)
+                MODEL_CATALOG.invalidate()
                 return valves.model_dump()
             except Exception as e:
                 log.exception(f"Error updating function values by id {id}: {e}")
@@ -392,6 +404,7 @@ async def update_function_user_valves_by_id(
                 Functions.update_user_valves_by_id_and_user_id(
                     id, user.id, user_valves.model_dump()
                 )
+                invalidate_function_cache(id)
                 return user_valves.model_dump()
             except Exception as e:
                 log.exception(f"Error updating function user valves by id {id}: {e}")
@@ -0,0 +1,51 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.models.jobs import JobResponse, Jobs
+from open_webui.utils.auth import get_verified_user
+from open_webui.utils.jobs import JOB_QUEUE
+
+router = APIRouter()
+
+
+def get_job_or_raise(id: str, user):
+    job = Jobs.get_job_by_id(id)
+    if not job or (job.user_id != user.id and user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+    return job
+
+
+############################
+# GetJobs
+############################
+
+
+@router.get("/", response_model=list[JobResponse])
+async def get_jobs(status: Optional[str] = None, user=Depends(get_verified_user)):
+    return Jobs.get_jobs_by_user_id(user.id, status=status)
+
+
+############################
+# GetJobById
+############################
+
+
+@router.get("/{id}", response_model=Optional[JobResponse])
+async def get_job_by_id(id: str, user=Depends(get_verified_user)):
+    return get_job_or_raise(id, user)
+
+
+############################
+# CancelJobById
+############################
+
+
+@router.post("/{id}/cancel", response_model=Optional[JobResponse])
+async def cancel_job_by_id(id: str, user=Depends(get_verified_user)):
+    get_job_or_raise(id, user)
+    return JOB_QUEUE.cancel(id)
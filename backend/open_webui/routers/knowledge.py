@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 import logging
@@ -10,11 +10,13 @@ from open_webui.models.knowledge import (
     KnowledgeUserResponse,
 )
 from open_webui.models.files import Files, FileModel, FileMetadataResponse
+from open_webui.models.jobs import JobResponse
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25_index import BM25_INDEX
 from open_webui.routers.retrieval import (
     process_file,
     ProcessFileForm,
-    process_files_batch,
+    process_files,
     BatchProcessFilesForm,
 )
 from open_webui.storage.provider import Storage
@@ -22,6 +24,7 @@ from open_webui.storage.provider import Storage
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.jobs import JOB_QUEUE, JobCancelledError
 
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -166,8 +169,64 @@ async def create_new_knowledge(
 ############################
 
 
-@router.post("/reindex", response_model=bool)
-async def reindex_knowledge_files(request: Request, user=Depends(get_verified_user)):
+def reindex_knowledge_base(request: Request, knowledge_base, user, context=None):
+    """
+    Rebuild the collection of a knowledge base from its files. With a job
+    `context` progress is reported per file and cancellation is honoured.
+    """
+    file_ids = knowledge_base.data.get("file_ids", [])
+    files = Files.get_files_by_ids(file_ids)
+
+    if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
+        VECTOR_DB_CLIENT.delete_collection(collection_name=knowledge_base.id)
+    BM25_INDEX.drop(knowledge_base.id)
+
+    failed_files = []
+    for idx, file in enumerate(files):
+        if context:
+            context.raise_if_cancelled()
+            context.set_progress(idx, len(files))
+
+        try:
+            process_file(
+                request,
+                ProcessFileForm(file_id=file.id, collection_name=knowledge_base.id),
+                user=user,
+            )
+        except Exception as e:
+            log.error(
+                f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
+            )
+            failed_files.append({"file_id": file.id, "error": str(e)})
+            continue
+
+    if context:
+        context.set_progress(len(files), len(files))
+
+    if failed_files:
+        log.warning(
+            f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
+        )
+        for failed in failed_files:
+            log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
+
+    return failed_files
+
+
+@JOB_QUEUE.handler("reindex_knowledge")
+def reindex_knowledge_job(request: Request, data: dict, user, context):
+    knowledge_base = Knowledges.get_knowledge_by_id(id=data["knowledge_id"])
+    if not knowledge_base:
+        raise Exception(ERROR_MESSAGES.NOT_FOUND)
+
+    failed_files = reindex_knowledge_base(request, knowledge_base, user, context)
+    return {"knowledge_id": knowledge_base.id, "failed_files": failed_files}
+
+
+@router.post("/reindex", response_model=Union[bool, list[JobResponse]])
+def reindex_knowledge_files(
+    request: Request, user=Depends(get_verified_user), background: bool = False
+):
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -179,6 +238,7 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
     log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
 
     deleted_knowledge_bases = []
+    jobs = []
 
     for knowledge_base in knowledge_bases:
         # -- Robust error handling for missing or invalid data
@@ -195,51 +255,26 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
                 )
             continue
 
-        try:
-            file_ids = knowledge_base.data.get("file_ids", [])
-            files = Files.get_files_by_ids(file_ids)
-            try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
-                    VECTOR_DB_CLIENT.delete_collection(
-                        collection_name=knowledge_base.id
-                    )
-            except Exception as e:
-                log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
-                continue  # Skip, don't raise
-
-            failed_files = []
-            for file in files:
-                try:
-                    process_file(
-                        request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
-                    )
-                except Exception as e:
-                    log.error(
-                        f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
-                    )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
+        if background:
+            # One job per knowledge base so that the workers reindex them in parallel
+            jobs.append(
+                JOB_QUEUE.enqueue(
+                    user.id, "reindex_knowledge", {"knowledge_id": knowledge_base.id}
+                )
+            )
+            continue
 
+        try:
+            reindex_knowledge_base(request, knowledge_base, user)
         except Exception as e:
             log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
             # Don't raise, just continue
             continue
 
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
-            )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
-
     log.info(
-        f"Reindexing completed. Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
+        f"Reindexing {'queued' if background else 'completed'}. Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
     )
-    return True
+    return jobs if background else True
 
 
 ############################
@@ -451,6 +486,7 @@ def update_file_from_knowledge_by_id(
     VECTOR_DB_CLIENT.delete(
         collection_name=knowledge.id, filter={"file_id": form_data.file_id}
     )
+    BM25_INDEX.delete(knowledge.id, filter={"file_id": form_data.file_id})
 
     # Add content to the vector database
     try:
@@ -522,6 +558,7 @@ def remove_file_from_knowledge_by_id(
         VECTOR_DB_CLIENT.delete(
             collection_name=knowledge.id, filter={"file_id": form_data.file_id}
         )
+        BM25_INDEX.delete(knowledge.id, filter={"file_id": form_data.file_id})
     except Exception as e:
         log.debug("This was most likely caused by bypassing embedding processing")
         log.debug(e)
@@ -532,6 +569,7 @@ def remove_file_from_knowledge_by_id(
         file_collection = f"file-{form_data.file_id}"
         if VECTOR_DB_CLIENT.has_collection(collection_name=file_collection):
             VECTOR_DB_CLIENT.delete_collection(collection_name=file_collection)
+        BM25_INDEX.drop(file_collection)
     except Exception as e:
         log.debug("This was most likely caused by bypassing embedding processing")
         log.debug(e)
@@ -630,6 +668,7 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
     # Clean up vector DB
     try:
         VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        BM25_INDEX.drop(id)
     except Exception as e:
         log.debug(e)
         pass
@@ -663,6 +702,7 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 
     try:
         VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        BM25_INDEX.drop(id)
     except Exception as e:
         log.debug(e)
         pass
@@ -677,12 +717,16 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 ############################
 
 
-@router.post("/{id}/files/batch/add", response_model=Optional[KnowledgeFilesResponse])
+@router.post(
+    "/{id}/files/batch/add",
+    response_model=Optional[Union[KnowledgeFilesResponse, JobResponse]],
+)
 def add_files_to_knowledge_batch(
     request: Request,
     id: str,
     form_data: list[KnowledgeFileIdForm],
     user=Depends(get_verified_user),
+    background: bool = False,
 ):
     """
     Add multiple files to a knowledge base
@@ -716,13 +760,45 @@ def add_files_to_knowledge_batch(
             )
         files.append(file)
 
+    if background:
+        return JOB_QUEUE.enqueue(
+            user.id,
+            "add_files_to_knowledge",
+            {"knowledge_id": id, "file_ids": [file.id for file in files]},
+        )
+
+    return add_files_to_knowledge(request, id, files, user)
+
+
+@JOB_QUEUE.handler("add_files_to_knowledge")
+def add_files_to_knowledge_job(request: Request, data: dict, user, context):
+    files = Files.get_files_by_ids(data["file_ids"])
+
+    context.set_progress(0, len(files))
+    response = add_files_to_knowledge(
+        request, data["knowledge_id"], files, user, context=context
+    )
+    context.set_progress(len(files), len(files))
+
+    return {
+        "knowledge_id": data["knowledge_id"],
+        "file_ids": [file.id for file in response.files],
+    }
+
+
+def add_files_to_knowledge(
+    request: Request, id: str, files: List[FileModel], user, context=None
+) -> KnowledgeFilesResponse:
     # Process files
     try:
-        result = process_files_batch(
+        result = process_files(
             request=request,
             form_data=BatchProcessFilesForm(files=files, collection_name=id),
             user=user,
+            context=context,
         )
+    except JobCancelledError:
+        raise
     except Exception as e:
         log.error(
             f"add_files_to_knowledge_batch: Exception occurred: {e}", exc_info=True
@@ -730,6 +806,13 @@ def add_files_to_knowledge_batch(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     # Add successful files to knowledge base
+    knowledge = Knowledges.get_knowledge_by_id(id=id)
+    if not knowledge:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
     data = knowledge.data or {}
     existing_file_ids = data.get("file_ids", [])
 
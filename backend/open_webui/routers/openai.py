@@ -2,6 +2,7 @@ import asyncio
 import hashlib
 import json
 import logging
+import time
 from pathlib import Path
 from typing import Literal, Optional, overload
 
@@ -42,7 +43,18 @@ from open_webui.utils.misc import (
 )
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import get_user_group_ids, has_access
+from open_webui.utils.http_sessions import (
+    ResponseStream,
+    get_client_session,
+    release_response,
+)
+from open_webui.utils.model_catalog import MODEL_CATALOG
+from open_webui.utils.load_balancer import (
+    UPSTREAM_BALANCER,
+    UpstreamResponseStream,
+    release_upstream_response,
+)
 
 
 log = logging.getLogger(__name__)
@@ -59,41 +71,32 @@ log.setLevel(SRC_LOG_LEVELS["OPENAI"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        session = get_client_session(url)
+        async with session.get(
+            url,
+            headers={
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": user.name,
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            timeout=timeout,
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
         return None
 
 
-async def cleanup_response(
-    response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
-):
-    if response:
-        response.close()
-    if session:
-        await session.close()
-
-
 def openai_o_series_handler(payload):
     """
     Handle "o" series specific parameters
@@ -177,6 +180,8 @@ async def update_config(
         if key in keys
     }
 
+    MODEL_CATALOG.invalidate(base_models=True)
+
     return {
         "ENABLE_OPENAI_API": request.app.state.config.ENABLE_OPENAI_API,
         "OPENAI_API_BASE_URLS": request.app.state.config.OPENAI_API_BASE_URLS,
@@ -375,12 +380,18 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
+    model_infos = {model.id: model for model in Models.get_all_models()}
+    user_group_ids = get_user_group_ids(user.id)
+
     filtered_models = []
     for model in models.get("data", []):
-        model_info = Models.get_model_by_id(model["id"])
+        model_info = model_infos.get(model["id"])
         if model_info:
             if user.id == model_info.user_id or has_access(
-                user.id, type="read", access_control=model_info.access_control
+                user.id,
+                type="read",
+                access_control=model_info.access_control,
+                user_group_ids=user_group_ids,
             ):
                 filtered_models.append(model)
     return filtered_models
@@ -444,7 +455,12 @@ async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
     models = {"data": merge_models_lists(map(extract_data, responses))}
     log.debug(f"models: {models}")
 
-    request.app.state.OPENAI_MODELS = {model["id"]: model for model in models["data"]}
+    openai_models = {}
+    for model in models["data"]:
+        url_idxs = openai_models.get(model["id"], {}).get("urls", [])
+        openai_models[model["id"]] = {**model, "urls": [*url_idxs, model["urlIdx"]]}
+
+    request.app.state.OPENAI_MODELS = openai_models
     return models
 
 
@@ -741,6 +757,12 @@ async def generate_chat_completion(
     model = request.app.state.OPENAI_MODELS.get(model_id)
     if model:
         idx = model["urlIdx"]
+
+        # Balance across connections serving the same model id
+        url_idxs = model.get("urls", [idx])
+        if len(url_idxs) > 1:
+            urls = request.app.state.config.OPENAI_API_BASE_URLS
+            idx = url_idxs[UPSTREAM_BALANCER.select([urls[i] for i in url_idxs])]
     else:
         raise HTTPException(
             status_code=404,
@@ -825,33 +847,35 @@ async def generate_chat_completion(
     payload = json.dumps(payload)
 
     r = None
-    session = None
     streaming = False
     response = None
 
+    UPSTREAM_BALANCER.on_request_start(request_url)
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+        session = get_client_session(request_url)
 
+        start = time.perf_counter()
         r = await session.request(
             method="POST",
             url=request_url,
             data=payload,
             headers=headers,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
+        UPSTREAM_BALANCER.on_response(
+            request_url, time.perf_counter() - start, success=r.status < 500
+        )
 
         # Check if response is SSE
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
+            stream = UpstreamResponseStream(request_url, r)
             return StreamingResponse(
-                r.content,
+                stream,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(stream.release),
             )
         else:
             try:
@@ -865,6 +889,9 @@ async def generate_chat_completion(
     except Exception as e:
         log.exception(e)
 
+        if r is None:
+            UPSTREAM_BALANCER.on_response(request_url, None, success=False)
+
         detail = None
         if isinstance(response, dict):
             if "error" in response:
@@ -877,10 +904,8 @@ async def generate_chat_completion(
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
     finally:
-        if not streaming and session:
-            if r:
-                r.close()
-            await session.close()
+        if not streaming:
+            await release_upstream_response(request_url, r)
 
 
 @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -902,7 +927,6 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
     )
 
     r = None
-    session = None
     streaming = False
 
     try:
@@ -935,7 +959,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
             headers["Authorization"] = f"Bearer {key}"
             request_url = f"{url}/{path}"
 
-        session = aiohttp.ClientSession(trust_env=True)
+        session = get_client_session(request_url)
         r = await session.request(
             method=request.method,
             url=request_url,
@@ -948,13 +972,12 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
         # Check if response is SSE
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
+            stream = ResponseStream(r)
             return StreamingResponse(
-                r.content,
+                stream,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(stream.release),
             )
         else:
             response_data = await r.json()
@@ -977,7 +1000,5 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
     finally:
-        if not streaming and session:
-            if r:
-                r.close()
-            await session.close()
+        if not streaming:
+            await release_response(r)
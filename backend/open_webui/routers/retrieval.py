@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 import mimetypes
@@ -9,7 +10,7 @@ import asyncio
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Iterator, List, Optional, Sequence, Union
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
 
 from fastapi import (
     Depends,
@@ -25,18 +26,25 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import tiktoken
 
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
 from langchain_core.documents import Document
 
 from open_webui.models.files import FileModel, Files
+from open_webui.models.jobs import JobResponse
 from open_webui.models.knowledge import Knowledges
 from open_webui.storage.provider import Storage
 
 
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25_index import BM25_INDEX
+from open_webui.retrieval.embedding_cache import CHUNK_EMBEDDINGS
+from open_webui.retrieval.pipeline import (
+    FILE_PROCESSING_PIPELINE,
+    get_text_splitter,
+    iter_batches,
+    split_documents_lazily,
+)
 
 # Document loaders
 from open_webui.retrieval.loaders.main import Loader
@@ -79,6 +87,7 @@ from open_webui.utils.misc import (
     calculate_sha256_string,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.jobs import JOB_QUEUE
 
 from open_webui.config import (
     ENV,
@@ -94,6 +103,7 @@ from open_webui.config import (
 from open_webui.env import (
     SRC_LOG_LEVELS,
     DEVICE_TYPE,
+    FILE_STREAMING_THRESHOLD,
     DOCKER,
     SENTENCE_TRANSFORMERS_BACKEND,
     SENTENCE_TRANSFORMERS_MODEL_KWARGS,
@@ -926,6 +936,132 @@ async def update_rag_config(
 ####################################
 
 
+def get_loader_config(request: Request) -> dict:
+    return {
+        "engine": request.app.state.config.CONTENT_EXTRACTION_ENGINE,
+        "EXTERNAL_DOCUMENT_LOADER_URL": request.app.state.config.EXTERNAL_DOCUMENT_LOADER_URL,
+        "EXTERNAL_DOCUMENT_LOADER_API_KEY": request.app.state.config.EXTERNAL_DOCUMENT_LOADER_API_KEY,
+        "TIKA_SERVER_URL": request.app.state.config.TIKA_SERVER_URL,
+        "DOCLING_SERVER_URL": request.app.state.config.DOCLING_SERVER_URL,
+        "DOCLING_OCR_ENGINE": request.app.state.config.DOCLING_OCR_ENGINE,
+        "DOCLING_OCR_LANG": request.app.state.config.DOCLING_OCR_LANG,
+        "DOCLING_DO_PICTURE_DESCRIPTION": request.app.state.config.DOCLING_DO_PICTURE_DESCRIPTION,
+        "PDF_EXTRACT_IMAGES": request.app.state.config.PDF_EXTRACT_IMAGES,
+        "DOCUMENT_INTELLIGENCE_ENDPOINT": request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
+        "DOCUMENT_INTELLIGENCE_KEY": request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
+        "MISTRAL_OCR_API_KEY": request.app.state.config.MISTRAL_OCR_API_KEY,
+    }
+
+
+def get_splitter_config(request: Request) -> dict:
+    return {
+        "text_splitter": request.app.state.config.TEXT_SPLITTER,
+        "chunk_size": request.app.state.config.CHUNK_SIZE,
+        "chunk_overlap": request.app.state.config.CHUNK_OVERLAP,
+        "encoding_name": request.app.state.config.TIKTOKEN_ENCODING_NAME,
+    }
+
+
+def get_chunk_metadatas(
+    request: Request, docs: list[Document], metadata: Optional[dict] = None
+) -> list[dict]:
+    metadatas = [
+        {
+            **doc.metadata,
+            **(metadata if metadata else {}),
+            "embedding_config": json.dumps(
+                {
+                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+                }
+            ),
+        }
+        for doc in docs
+    ]
+
+    # ChromaDB does not like datetime formats
+    # for meta-data so convert them to string.
+    for metadata in metadatas:
+        for key, value in metadata.items():
+            if (
+                isinstance(value, datetime)
+                or isinstance(value, list)
+                or isinstance(value, dict)
+            ):
+                metadata[key] = str(value)
+
+    return metadatas
+
+
+def get_docs_embeddings(request: Request, docs: list[Document], user=None) -> list:
+    embedding_function = get_embedding_function(
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        request.app.state.ef,
+        (
+            request.app.state.config.RAG_OPENAI_API_BASE_URL
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else request.app.state.config.RAG_OLLAMA_BASE_URL
+        ),
+        (
+            request.app.state.config.RAG_OPENAI_API_KEY
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else request.app.state.config.RAG_OLLAMA_API_KEY
+        ),
+        request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+    )
+
+    return CHUNK_EMBEDDINGS.embed(
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        RAG_EMBEDDING_CONTENT_PREFIX,
+        [doc.page_content.replace("\n", " ") for doc in docs],
+        lambda texts: embedding_function(
+            texts,
+            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+            user=user,
+        ),
+    )
+
+
+def save_items_to_vector_db(
+    collection_name: str, items: list[dict], upsert: bool = False, index: bool = True
+):
+    """
+    Write items to the vector DB and, unless `index` is False (the caller
+    then adds them to the BM25 index itself), to the BM25 index.
+    """
+    # Upserting makes retrying items of a partially applied insert safe
+    (VECTOR_DB_CLIENT.upsert if upsert else VECTOR_DB_CLIENT.insert)(
+        collection_name=collection_name,
+        items=items,
+    )
+    if not index:
+        return
+
+    BM25_INDEX.add(
+        collection_name,
+        ids=[item["id"] for item in items],
+        texts=[item["text"] for item in items],
+        metadatas=[item["metadata"] for item in items],
+    )
+
+
+def check_duplicate_content(collection_name: str, metadata: Optional[dict]):
+    # Check if entries with the same hash (metadata.hash) already exist
+    if metadata and "hash" in metadata:
+        result = VECTOR_DB_CLIENT.query(
+            collection_name=collection_name,
+            filter={"hash": metadata["hash"]},
+        )
+
+        if result is not None:
+            existing_doc_ids = result.ids[0]
+            if existing_doc_ids:
+                log.info(f"Document with hash {metadata['hash']} already exists")
+                raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -956,71 +1092,17 @@ def save_docs_to_vector_db(
         f"save_docs_to_vector_db: document {_get_docs_info(docs)} {collection_name}"
     )
 
-    # Check if entries with the same hash (metadata.hash) already exist
-    if metadata and "hash" in metadata:
-        result = VECTOR_DB_CLIENT.query(
-            collection_name=collection_name,
-            filter={"hash": metadata["hash"]},
-        )
-
-        if result is not None:
-            existing_doc_ids = result.ids[0]
-            if existing_doc_ids:
-                log.info(f"Document with hash {metadata['hash']} already exists")
-                raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
+    check_duplicate_content(collection_name, metadata)
 
     if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
-
+        text_splitter = get_text_splitter(**get_splitter_config(request))
         docs = text_splitter.split_documents(docs)
 
     if len(docs) == 0:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
     texts = [doc.page_content for doc in docs]
-    metadatas = [
-        {
-            **doc.metadata,
-            **(metadata if metadata else {}),
-            "embedding_config": json.dumps(
-                {
-                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
-                }
-            ),
-        }
-        for doc in docs
-    ]
-
-    # ChromaDB does not like datetime formats
-    # for meta-data so convert them to string.
-    for metadata in metadatas:
-        for key, value in metadata.items():
-            if (
-                isinstance(value, datetime)
-                or isinstance(value, list)
-                or isinstance(value, dict)
-            ):
-                metadata[key] = str(value)
+    metadatas = get_chunk_metadatas(request, docs, metadata)
 
     try:
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
@@ -1028,6 +1110,7 @@ def save_docs_to_vector_db(
 
             if overwrite:
                 VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                BM25_INDEX.drop(collection_name)
                 log.info(f"deleting existing collection {collection_name}")
             elif add is False:
                 log.info(
@@ -1036,28 +1119,7 @@ def save_docs_to_vector_db(
                 return True
 
         log.info(f"adding to collection {collection_name}")
-        embedding_function = get_embedding_function(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
-            request.app.state.ef,
-            (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else request.app.state.config.RAG_OLLAMA_BASE_URL
-            ),
-            (
-                request.app.state.config.RAG_OPENAI_API_KEY
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else request.app.state.config.RAG_OLLAMA_API_KEY
-            ),
-            request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
-        )
-
-        embeddings = embedding_function(
-            list(map(lambda x: x.replace("\n", " "), texts)),
-            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
-            user=user,
-        )
+        embeddings = get_docs_embeddings(request, docs, user=user)
 
         items = [
             {
@@ -1069,10 +1131,7 @@ def save_docs_to_vector_db(
             for idx, text in enumerate(texts)
         ]
 
-        VECTOR_DB_CLIENT.insert(
-            collection_name=collection_name,
-            items=items,
-        )
+        save_items_to_vector_db(collection_name, items)
 
         return True
     except Exception as e:
@@ -1080,6 +1139,83 @@ def save_docs_to_vector_db(
         raise e
 
 
+# Chunks embedded and inserted at a time when streaming a document
+STREAMING_BATCH_SIZE = 512
+
+
+def save_doc_stream_to_vector_db(
+    request: Request,
+    docs: Iterable[Document],
+    collection_name,
+    metadata: Optional[dict] = None,
+    add: bool = False,
+    user=None,
+) -> bool:
+    """
+    Streaming variant of `save_docs_to_vector_db` for large files: the
+    documents are split, embedded and inserted `STREAMING_BATCH_SIZE` chunks
+    at a time, so memory use doesn't depend on the size of the file.
+    """
+    log.info(f"save_doc_stream_to_vector_db: {collection_name}")
+
+    check_duplicate_content(collection_name, metadata)
+
+    if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        log.info(f"collection {collection_name} already exists")
+
+        if add is False:
+            log.info(
+                f"collection {collection_name} already exists, overwrite is False and add is False"
+            )
+            return True
+
+    text_splitter = get_text_splitter(**get_splitter_config(request))
+
+    count = 0
+    try:
+        for docs in iter_batches(
+            split_documents_lazily(docs, text_splitter), STREAMING_BATCH_SIZE
+        ):
+            metadatas = get_chunk_metadatas(request, docs, metadata)
+            embeddings = get_docs_embeddings(request, docs, user=user)
+
+            save_items_to_vector_db(
+                collection_name,
+                [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "text": doc.page_content,
+                        "vector": embeddings[idx],
+                        "metadata": metadatas[idx],
+                    }
+                    for idx, doc in enumerate(docs)
+                ],
+            )
+            count += len(docs)
+    except Exception as e:
+        log.exception(e)
+
+        # Don't leave a partially indexed file behind
+        if count and metadata and "file_id" in metadata:
+            try:
+                VECTOR_DB_CLIENT.delete(
+                    collection_name=collection_name,
+                    filter={"file_id": metadata["file_id"]},
+                )
+                BM25_INDEX.delete(
+                    collection_name, filter={"file_id": metadata["file_id"]}
+                )
+            except Exception as e:
+                log.warning(f"Error removing partially indexed file: {e}")
+        raise
+
+    if count == 0:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    log.info(f"added {count} chunks to collection {collection_name}")
+    return True
+
+
 class ProcessFileForm(BaseModel):
     file_id: str
     content: Optional[str] = None
@@ -1091,11 +1227,17 @@ def process_file(
     request: Request,
     form_data: ProcessFileForm,
     user=Depends(get_verified_user),
+    background: bool = False,
 ):
+    if background:
+        # Processed by the job queue, track it with /api/v1/jobs/{id}
+        return JOB_QUEUE.enqueue(user.id, "process_file", form_data.model_dump())
+
     try:
         file = Files.get_file_by_id(form_data.file_id)
 
         collection_name = form_data.collection_name
+        stream = False
 
         if collection_name is None:
             collection_name = f"file-{file.id}"
@@ -1107,6 +1249,7 @@ def process_file(
             try:
                 # /files/{file_id}/data/content/update
                 VECTOR_DB_CLIENT.delete_collection(collection_name=f"file-{file.id}")
+                BM25_INDEX.drop(f"file-{file.id}")
             except:
                 # Audio file upload pipeline
                 pass
@@ -1129,21 +1272,31 @@ def process_file(
             # Check if the file has already been processed and save the content
             # Usage: /knowledge/{id}/file/add, /knowledge/{id}/file/update
 
-            result = VECTOR_DB_CLIENT.query(
-                collection_name=f"file-{file.id}", filter={"file_id": file.id}
-            )
+            if (file.data or {}).get("content_truncated") and file.path:
+                # Only a prefix of the text is stored, index the whole file
+                return process_large_file(
+                    request,
+                    file,
+                    Storage.get_file(file.path),
+                    collection_name,
+                    add=True,
+                    user=user,
+                )
 
-            if result is not None and len(result.ids[0]) > 0:
-                docs = [
-                    Document(
-                        page_content=result.documents[0][idx],
-                        metadata=result.metadatas[0][idx],
-                    )
-                    for idx, id in enumerate(result.ids[0])
-                ]
-            else:
-                docs = [
-                    Document(
+            def load_docs() -> Iterator[Document]:
+                # Stream the chunks of the file's own collection rather than
+                # holding all of them (and their embeddings) in memory
+                found = False
+                if VECTOR_DB_CLIENT.has_collection(collection_name=f"file-{file.id}"):
+                    for batch in VECTOR_DB_CLIENT.iter_items(f"file-{file.id}"):
+                        for text, metadata in zip(
+                            batch.documents[0], batch.metadatas[0]
+                        ):
+                            found = True
+                            yield Document(page_content=text, metadata=metadata)
+
+                if not found:
+                    yield Document(
                         page_content=file.data.get("content", ""),
                         metadata={
                             **file.meta,
@@ -1153,7 +1306,9 @@ def process_file(
                             "source": file.filename,
                         },
                     )
-                ]
+
+            docs = load_docs()
+            stream = True
 
             text_content = file.data.get("content", "")
         else:
@@ -1162,20 +1317,12 @@ def process_file(
             file_path = file.path
             if file_path:
                 file_path = Storage.get_file(file_path)
-                loader = Loader(
-                    engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
-                    EXTERNAL_DOCUMENT_LOADER_URL=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_URL,
-                    EXTERNAL_DOCUMENT_LOADER_API_KEY=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_API_KEY,
-                    TIKA_SERVER_URL=request.app.state.config.TIKA_SERVER_URL,
-                    DOCLING_SERVER_URL=request.app.state.config.DOCLING_SERVER_URL,
-                    DOCLING_OCR_ENGINE=request.app.state.config.DOCLING_OCR_ENGINE,
-                    DOCLING_OCR_LANG=request.app.state.config.DOCLING_OCR_LANG,
-                    DOCLING_DO_PICTURE_DESCRIPTION=request.app.state.config.DOCLING_DO_PICTURE_DESCRIPTION,
-                    PDF_EXTRACT_IMAGES=request.app.state.config.PDF_EXTRACT_IMAGES,
-                    DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
-                    DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
-                    MISTRAL_OCR_API_KEY=request.app.state.config.MISTRAL_OCR_API_KEY,
-                )
+                if os.path.getsize(file_path) > FILE_STREAMING_THRESHOLD:
+                    return process_large_file(
+                        request, file, file_path, collection_name, user=user
+                    )
+
+                loader = Loader(**get_loader_config(request))
                 docs = loader.load(
                     file.filename, file.meta.get("content_type"), file_path
                 )
@@ -1219,7 +1366,9 @@ def process_file(
 
         if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
             try:
-                result = save_docs_to_vector_db(
+                result = (
+                    save_doc_stream_to_vector_db if stream else save_docs_to_vector_db
+                )(
                     request,
                     docs=docs,
                     collection_name=collection_name,
@@ -1270,6 +1419,98 @@ def process_file(
             )
 
 
+def process_large_file(
+    request: Request,
+    file: FileModel,
+    file_path: str,
+    collection_name: str,
+    add: bool = False,
+    user=None,
+) -> dict:
+    """
+    Process a file larger than FILE_STREAMING_THRESHOLD without holding its
+    text in memory. The file is read twice, once to hash its text (the hash is
+    part of the metadata of every chunk) and once to index it; only the first
+    FILE_STREAMING_THRESHOLD characters are stored as the file content.
+    """
+    loader = Loader(**get_loader_config(request))
+
+    def load_docs() -> Iterator[Document]:
+        for doc in loader.lazy_load(
+            file.filename, file.meta.get("content_type"), file_path
+        ):
+            yield Document(
+                page_content=doc.page_content,
+                metadata={
+                    **doc.metadata,
+                    "name": file.filename,
+                    "created_by": file.user_id,
+                    "file_id": file.id,
+                    "source": file.filename,
+                },
+            )
+
+    sha256_hash = hashlib.sha256()
+    content_parts, content_length = [], 0
+    for idx, doc in enumerate(load_docs()):
+        text = f" {doc.page_content}" if idx else doc.page_content
+        sha256_hash.update(text.encode("utf-8"))
+        if content_length < FILE_STREAMING_THRESHOLD:
+            content_parts.append(text)
+            content_length += len(text)
+
+    hash = sha256_hash.hexdigest()
+    text_content = "".join(content_parts)[:FILE_STREAMING_THRESHOLD]
+    Files.update_file_data_by_id(
+        file.id,
+        {
+            "content": text_content,
+            # Batch processing reads truncated files from storage again
+            "content_truncated": content_length > FILE_STREAMING_THRESHOLD,
+        },
+    )
+    Files.update_file_hash_by_id(file.id, hash)
+
+    if request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
+        return {
+            "status": True,
+            "collection_name": None,
+            "filename": file.filename,
+            "content": text_content,
+        }
+
+    save_doc_stream_to_vector_db(
+        request,
+        docs=load_docs(),
+        collection_name=collection_name,
+        metadata={
+            "file_id": file.id,
+            "name": file.filename,
+            "hash": hash,
+        },
+        add=add,
+        user=user,
+    )
+    Files.update_file_metadata_by_id(file.id, {"collection_name": collection_name})
+
+    return {
+        "status": True,
+        "collection_name": collection_name,
+        "filename": file.filename,
+        "content": text_content,
+    }
+
+
+@JOB_QUEUE.handler("process_file")
+def process_file_job(request: Request, data: dict, user, context):
+    context.set_progress(0, 1)
+    result = process_file(request, ProcessFileForm(**data), user=user)
+    context.set_progress(1, 1)
+
+    # The extracted content is stored with the file already
+    return {key: value for key, value in result.items() if key != "content"}
+
+
 class ProcessTextForm(BaseModel):
     name: str
     content: str
@@ -1867,6 +2108,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
                 collection_name=form_data.collection_name,
                 metadata={"hash": hash},
             )
+            BM25_INDEX.delete(form_data.collection_name, filter={"hash": hash})
             return {"status": True}
         else:
             return {"status": False}
@@ -1878,6 +2120,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    BM25_INDEX.reset()
     Knowledges.delete_all_knowledge()
 
 
@@ -1936,72 +2179,200 @@ def process_files_batch(
     request: Request,
     form_data: BatchProcessFilesForm,
     user=Depends(get_verified_user),
-) -> BatchProcessFilesResponse:
+    background: bool = False,
+) -> Union[BatchProcessFilesResponse, JobResponse]:
     """
     Process a batch of files and save them to the vector database.
     """
+    if background:
+        return JOB_QUEUE.enqueue(
+            user.id,
+            "process_files_batch",
+            {
+                "file_ids": [file.id for file in form_data.files],
+                "collection_name": form_data.collection_name,
+            },
+        )
+
+    return process_files(request, form_data, user)
+
+
+def process_files(
+    request: Request, form_data: BatchProcessFilesForm, user, context=None
+) -> BatchProcessFilesResponse:
+    """
+    Process a batch of files and save them to the vector database. With a job
+    `context` progress is reported per file and cancellation is honoured.
+    """
     results: List[BatchProcessFilesResult] = []
     errors: List[BatchProcessFilesResult] = []
     collection_name = form_data.collection_name
 
-    # Prepare all documents first
-    all_docs: List[Document] = []
-    for file in form_data.files:
-        try:
-            text_content = file.data.get("content", "")
+    log.info(f"process_files_batch: {len(form_data.files)} files {collection_name}")
 
-            docs: List[Document] = [
-                Document(
-                    page_content=text_content.replace("<br/>", "\n"),
-                    metadata={
-                        **file.meta,
-                        "name": file.filename,
-                        "created_by": file.user_id,
-                        "file_id": file.id,
-                        "source": file.filename,
-                    },
-                )
-            ]
-
-            hash = calculate_sha256_string(text_content)
-            Files.update_file_hash_by_id(file.id, hash)
-            Files.update_file_data_by_id(file.id, {"content": text_content})
+    def set_progress(completed: int):
+        if context:
+            context.raise_if_cancelled()
+            context.set_progress(completed, len(form_data.files))
 
-            all_docs.extend(docs)
-            results.append(BatchProcessFilesResult(file_id=file.id, status="prepared"))
+    # Files whose stored content is truncated are streamed from storage
+    files = []
+    for file in form_data.files:
+        if not (file.data or {}).get("content_truncated"):
+            files.append(file)
+            continue
 
+        set_progress(len(results) + len(errors))
+        try:
+            process_large_file(
+                request,
+                file,
+                Storage.get_file(file.path),
+                collection_name,
+                add=True,
+                user=user,
+            )
+            results.append(BatchProcessFilesResult(file_id=file.id, status="completed"))
         except Exception as e:
             log.error(f"process_files_batch: Error processing file {file.id}: {str(e)}")
             errors.append(
                 BatchProcessFilesResult(file_id=file.id, status="failed", error=str(e))
             )
 
-    # Save all documents in one batch
-    if all_docs:
-        try:
-            save_docs_to_vector_db(
-                request=request,
-                docs=all_docs,
-                collection_name=collection_name,
-                add=True,
-                user=user,
-            )
+    # Files are fetched, parsed/split and embedded concurrently by the pipeline
+    tasks = [
+        {
+            "filename": file.filename,
+            "content_type": file.meta.get("content_type"),
+            "file_path": file.path,
+            # Files without extracted content are loaded from storage
+            "content": (file.data or {}).get("content") or (None if file.path else ""),
+            "metadata": {
+                **file.meta,
+                "name": file.filename,
+                "created_by": file.user_id,
+                "file_id": file.id,
+                "source": file.filename,
+            },
+        }
+        for file in files
+    ]
 
-            # Update all files with collection name
-            for result in results:
-                Files.update_file_metadata_by_id(
-                    result.file_id, {"collection_name": collection_name}
-                )
-                result.status = "completed"
+    def fetch(task: dict) -> dict:
+        if task["content"] is None:
+            return {**task, "file_path": Storage.get_file(task["file_path"])}
+        return task
+
+    pipeline_results = FILE_PROCESSING_PIPELINE.run(
+        tasks,
+        loader_config=get_loader_config(request),
+        splitter_config=get_splitter_config(request),
+        embed=lambda docs: get_docs_embeddings(request, docs, user=user),
+        fetch=fetch,
+        # Local embedding models already use every core
+        embed_concurrency=(
+            1 if request.app.state.config.RAG_EMBEDDING_ENGINE == "" else None
+        ),
+        on_progress=lambda completed: set_progress(
+            len(results) + len(errors) + completed
+        ),
+    )
 
-        except Exception as e:
+    file_items: dict[str, list[dict]] = {}
+    for file, result in zip(files, pipeline_results):
+        if "error" in result:
             log.error(
-                f"process_files_batch: Error saving documents to vector DB: {str(e)}"
+                f"process_files_batch: Error processing file {file.id}: {str(result['error'])}"
             )
-            for result in results:
-                result.status = "failed"
-                errors.append(
-                    BatchProcessFilesResult(file_id=result.file_id, error=str(e))
+            errors.append(
+                BatchProcessFilesResult(
+                    file_id=file.id, status="failed", error=str(result["error"])
                 )
+            )
+            continue
+
+        text_content = result["text_content"]
+        Files.update_file_hash_by_id(file.id, calculate_sha256_string(text_content))
+        Files.update_file_data_by_id(file.id, {"content": text_content})
+
+        docs = result["docs"]
+        metadatas = get_chunk_metadatas(request, docs)
+        file_items[file.id] = [
+            {
+                "id": str(uuid.uuid4()),
+                "text": doc.page_content,
+                "vector": result["embeddings"][idx],
+                "metadata": metadatas[idx],
+            }
+            for idx, doc in enumerate(docs)
+        ]
+
+    # Save all vectors in one bulk insert; if that fails, save them file by
+    # file so one bad file doesn't fail the whole batch
+    saved_file_ids = []
+    if context:
+        context.raise_if_cancelled()
+    if file_items:
+        try:
+            save_items_to_vector_db(
+                collection_name,
+                [item for items in file_items.values() for item in items],
+                index=False,
+            )
+            saved_file_ids = list(file_items)
+        except Exception as e:
+            log.warning(
+                f"process_files_batch: Error saving documents to vector DB, saving them per file: {str(e)}"
+            )
+            for file_id, items in file_items.items():
+                try:
+                    save_items_to_vector_db(
+                        collection_name, items, upsert=True, index=False
+                    )
+                    saved_file_ids.append(file_id)
+                except Exception as e:
+                    log.error(
+                        f"process_files_batch: Error saving documents of file {file_id} to vector DB: {str(e)}"
+                    )
+                    errors.append(
+                        BatchProcessFilesResult(
+                            file_id=file_id, status="failed", error=str(e)
+                        )
+                    )
+
+    # Index what made it into the vector DB for BM25 once, whichever way it was
+    # saved; if that fails the index is rebuilt from the vector DB on next use
+    saved_items = [item for file_id in saved_file_ids for item in file_items[file_id]]
+    if saved_items:
+        try:
+            BM25_INDEX.add(
+                collection_name,
+                ids=[item["id"] for item in saved_items],
+                texts=[item["text"] for item in saved_items],
+                metadatas=[item["metadata"] for item in saved_items],
+            )
+        except Exception as e:
+            log.warning(f"process_files_batch: Error updating BM25 index: {str(e)}")
+            BM25_INDEX.drop(collection_name)
+
+    # Update all files with collection name
+    for file_id in saved_file_ids:
+        Files.update_file_metadata_by_id(file_id, {"collection_name": collection_name})
+        results.append(BatchProcessFilesResult(file_id=file_id, status="completed"))
 
     return BatchProcessFilesResponse(results=results, errors=errors)
+
+
+@JOB_QUEUE.handler("process_files_batch")
+def process_files_batch_job(request: Request, data: dict, user, context):
+    files = Files.get_files_by_ids(data["file_ids"])
+
+    context.set_progress(0, len(files))
+    result = process_files(
+        request,
+        BatchProcessFilesForm(files=files, collection_name=data["collection_name"]),
+        user=user,
+        context=context,
+    )
+    context.set_progress(len(files), len(files))
+    return result.model_dump()
@@ -8,6 +8,7 @@ from redis import asyncio as aioredis
 from open_webui.models.users import Users, UserNameResponse
 from open_webui.models.channels import Channels
 from open_webui.models.chats import Chats
+from open_webui.utils.chat_buffer import CHAT_WRITE_BUFFER
 from open_webui.utils.redis import (
     get_sentinels_from_env,
     get_sentinel_url_from_env,
@@ -333,34 +334,23 @@ def get_event_emitter(request_info, update_db=True):
 
         if update_db:
             if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
+                await CHAT_WRITE_BUFFER.add_message_status(
                     request_info["chat_id"],
                     request_info["message_id"],
                     event_data.get("data", {}),
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                await CHAT_WRITE_BUFFER.append_message_content(
                     request_info["chat_id"],
                     request_info["message_id"],
+                    event_data.get("data", {}).get("content", ""),
                 )
 
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
-
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await CHAT_WRITE_BUFFER.upsert_message(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
@@ -390,6 +380,16 @@ def get_event_call(request_info):
 get_event_caller = get_event_call
 
 
+async def emit_to_user(user_id: str, event: str, data: dict):
+    """Emit an event to every session of a user."""
+    await asyncio.gather(
+        *[
+            sio.emit(event, data, to=session_id)
+            for session_id in USER_POOL.get(user_id, [])
+        ]
+    )
+
+
 def get_user_id_from_session_pool(sid):
     user = SESSION_POOL.get(sid)
     if user:
@@ -0,0 +1,122 @@
+import time
+
+from open_webui.models.chat_messages import apply_content_deltas, get_content_delta
+from test.util.abstract_integration_test import AbstractPostgresTest
+
+
+def test_content_delta_round_trip():
+    writes = ["Hel", "Hello", "Hello world", "Hello there", "Hello there", "Hi"]
+
+    deltas = []
+    previous = ""
+    for content in writes:
+        start, suffix = get_content_delta(previous, content)
+        assert content == previous[:start] + suffix
+        deltas.append((start, suffix))
+        assert apply_content_deltas(deltas) == content
+        previous = content
+
+    # Appends only carry the new characters
+    assert get_content_delta("Hello", "Hello world") == (5, " world")
+
+
+def make_chat(message_id: str = "m1", content: str = "") -> dict:
+    return {
+        "title": "Chat",
+        "history": {
+            "currentId": message_id,
+            "messages": {message_id: {"id": message_id, "content": content}},
+        },
+    }
+
+
+class TestChatMessages(AbstractPostgresTest):
+    def setup_class(cls):
+        super().setup_class()
+        from open_webui.models.chat_messages import ChatMessages
+        from open_webui.models.chats import ChatForm, Chats
+
+        cls.chat_messages = ChatMessages
+        cls.chats = Chats
+        cls.chat_form = ChatForm
+
+    def teardown_method(self):
+        from open_webui.internal.db import Session
+        from open_webui.models.chat_messages import ChatMessage, ChatMessageDelta
+
+        Session.query(ChatMessage).delete()
+        Session.query(ChatMessageDelta).delete()
+        super().teardown_method()
+
+    def insert_chat(self, user_id: str = "1", **kwargs):
+        return self.chats.insert_new_chat(
+            user_id, self.chat_form(chat=make_chat(**kwargs))
+        )
+
+    def write(self, chat_id: str, message_id: str, *contents: str):
+        from open_webui.models.chat_messages import ChatMessageContentWriter
+
+        writer = ChatMessageContentWriter(chat_id, message_id)
+        for content in contents:
+            writer.write(content)
+
+    def get_content(self, chat, message_id: str = "m1") -> str:
+        return chat.chat["history"]["messages"][message_id]["content"]
+
+    def test_reads_overlay_pending_messages(self):
+        chat = self.insert_chat()
+        other = self.insert_chat()
+        self.write(chat.id, "m1", "Hello", "Hello world")
+        self.chat_messages.upsert_message_by_chat_id_and_message_id(
+            chat.id, "m1", {"done": False}
+        )
+
+        assert self.chat_messages.get_pending_chat_ids([chat.id, other.id]) == {chat.id}
+        assert self.chat_messages.get_pending_chat_ids([other.id]) == set()
+
+        assert self.get_content(self.chats.get_chat_by_id(chat.id)) == "Hello world"
+        chats = {chat.id: chat for chat in self.chats.get_chats_by_user_id("1")}
+        assert self.get_content(chats[chat.id]) == "Hello world"
+        assert chats[chat.id].chat["history"]["messages"]["m1"]["done"] is False
+        assert self.get_content(chats[other.id]) == ""
+
+    def test_compaction(self):
+        chat = self.insert_chat()
+        self.write(chat.id, "m1", "Hello", "Hello world")
+
+        compacted = self.chats.compact_chat_messages_by_id(chat.id)
+        assert self.get_content(compacted) == "Hello world"
+        assert self.chat_messages.get_pending_chat_ids([chat.id]) == set()
+        assert self.get_content(self.chats.get_chat_by_id(chat.id)) == "Hello world"
+
+    def test_compact_stale_chat_messages(self):
+        from open_webui.internal.db import Session
+        from open_webui.models.chat_messages import ChatMessageDelta
+
+        stale = self.insert_chat()
+        active = self.insert_chat()
+        self.write(stale.id, "m1", "left behind")
+        self.write(active.id, "m1", "streaming")
+        Session.query(ChatMessageDelta).filter_by(chat_id=stale.id).update(
+            {"created_at": int(time.time()) - 600}
+        )
+        Session.commit()
+
+        assert self.chats.compact_stale_chat_messages(timeout=300) == 1
+        assert self.chat_messages.get_pending_chat_ids([stale.id, active.id]) == {
+            active.id
+        }
+        assert self.get_content(self.chats.get_chat_by_id(stale.id)) == "left behind"
+
+    def test_bulk_deletes_remove_pending_messages(self):
+        chat = self.insert_chat(user_id="1")
+        kept = self.insert_chat(user_id="2")
+        self.write(chat.id, "m1", "one")
+        self.write(kept.id, "m1", "two")
+
+        assert self.chats.delete_chats_by_user_id("1")
+        assert self.chat_messages.get_pending_chat_ids([chat.id, kept.id]) == {kept.id}
+
+        self.chats.update_chat_folder_id_by_id_and_user_id(kept.id, "2", "folder")
+        assert self.chats.delete_chats_by_user_id_and_folder_id("2", "folder")
+        assert self.chat_messages.get_pending_chat_ids([kept.id]) == set()
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+
+from test.util.abstract_integration_test import AbstractPostgresTest
+
+
+class TestJobs(AbstractPostgresTest):
+    def setup_class(cls):
+        super().setup_class()
+        from open_webui.models.jobs import Jobs
+
+        cls.jobs = Jobs
+
+    def teardown_method(self):
+        from open_webui.internal.db import Session
+        from open_webui.models.jobs import Job
+
+        Session.query(Job).delete()
+        super().teardown_method()
+
+    def test_claim_next_job(self):
+        first = self.jobs.insert_new_job("1", "process_files", {"file_ids": ["a"]})
+        second = self.jobs.insert_new_job("1", "process_files", {"file_ids": ["b"]})
+        self.jobs.insert_new_job("1", "other")
+
+        job = self.jobs.claim_next_job("worker-1", ["process_files"])
+        assert job.status == "running"
+        assert job.worker_id == "worker-1"
+
+        # A running job is never claimed twice
+        other = self.jobs.claim_next_job("worker-2", ["process_files"])
+        assert other.worker_id == "worker-2"
+        assert {job.id, other.id} == {first.id, second.id}
+        assert self.jobs.get_job_by_id(first.id).data == {"file_ids": ["a"]}
+        assert self.jobs.claim_next_job("worker-3", ["process_files"]) is None
+
+        job = self.jobs.update_job_status(job.id, "completed", result={"ok": True})
+        assert job.status == "completed"
+        assert job.result == {"ok": True}
+
+    def test_cancel_job(self):
+        running = self.jobs.insert_new_job("1", "process_files")
+        self.jobs.claim_next_job("worker-1", ["process_files"])
+        pending = self.jobs.insert_new_job("1", "process_files")
+
+        # Pending jobs are cancelled right away, running ones are flagged
+        assert self.jobs.cancel_job_by_id(pending.id).status == "cancelled"
+        job = self.jobs.cancel_job_by_id(running.id)
+        assert job.status == "running"
+        assert self.jobs.is_cancel_requested(running.id)
+        assert not self.jobs.is_cancel_requested(pending.id)
+        assert self.jobs.claim_next_job("worker-2", ["process_files"]) is None
+
+    def test_requeue_job(self):
+        job = self.jobs.insert_new_job("1", "process_files")
+        self.jobs.claim_next_job("worker-1", ["process_files"])
+
+        job = self.jobs.requeue_job_by_id(job.id)
+        assert job.status == "pending"
+        assert job.worker_id is None
+
+        job = self.jobs.claim_next_job("worker-2", ["process_files"])
+        self.jobs.cancel_job_by_id(job.id)
+
+        # A job whose cancellation was requested is not run again
+        job = self.jobs.requeue_job_by_id(job.id)
+        assert job.status == "cancelled"
+        assert not job.cancel_requested
+        assert self.jobs.claim_next_job("worker-3", ["process_files"]) is None
+
+    def test_requeue_stale_jobs(self):
+        self.jobs.insert_new_job("1", "process_files")
+        self.jobs.insert_new_job("1", "process_files")
+        stale = self.jobs.claim_next_job("worker-1", ["process_files"])
+        alive = self.jobs.claim_next_job("worker-2", ["process_files"])
+
+        from open_webui.internal.db import Session
+        from open_webui.models.jobs import Job
+
+        Session.query(Job).filter_by(id=stale.id).update(
+            {"updated_at": int(time.time()) - 600}
+        )
+        Session.commit()
+        self.jobs.touch_jobs_by_ids([alive.id])
+
+        assert self.jobs.requeue_stale_jobs(timeout=300) == 1
+        assert self.jobs.get_job_by_id(stale.id).status == "pending"
+        assert self.jobs.get_job_by_id(alive.id).status == "running"
+
+    def test_shutdown_waits_for_running_jobs(self):
+        from open_webui.models.users import Users
+        from open_webui.utils.jobs import JobQueue
+
+        Users.insert_new_user("1", "user 1", "user1@openwebui.com", role="user")
+
+        queue = JobQueue(workers=1, poll_interval=0.05)
+        started = threading.Event()
+        runs = []
+
+        @queue.handler("slow")
+        def slow(request, data, user, context):
+            started.set()
+            time.sleep(0.3)
+            runs.append(data["n"])
+            return {"n": data["n"]}
+
+        async def main():
+            await queue.start(app=None)
+            running = queue.enqueue("1", "slow", {"n": 1})
+            pending = queue.enqueue("1", "slow", {"n": 2})
+            await asyncio.to_thread(started.wait, 5)
+            await queue.shutdown()
+            return running, pending
+
+        running, pending = asyncio.run(main())
+
+        # The running job finished instead of being handed back to the queue
+        # while its handler kept running, and no other job was started
+        assert runs == [1]
+        job = self.jobs.get_job_by_id(running.id)
+        assert job.status == "completed"
+        assert job.result == {"n": 1}
+        assert self.jobs.get_job_by_id(pending.id).status == "pending"
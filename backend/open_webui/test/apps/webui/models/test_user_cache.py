@@ -0,0 +1,55 @@
+from test.util.abstract_integration_test import AbstractPostgresTest
+
+
+class TestUsersCache(AbstractPostgresTest):
+    def setup_class(cls):
+        super().setup_class()
+        from open_webui.models.users import Users
+
+        cls.users = Users
+
+    def setup_method(self):
+        super().setup_method()
+        self.users.cache.clear()
+        self.users.insert_new_user(
+            id="1", name="user 1", email="user1@openwebui.com", role="user"
+        )
+
+        self.generation_reads = 0
+        get_generation = self.users.cache_generation.get
+
+        def counting_get(name=None):
+            self.generation_reads += 1
+            return get_generation(name)
+
+        self.users.cache_generation.get = counting_get
+
+    def teardown_method(self):
+        del self.users.cache_generation.get
+        self.users.cache.clear()
+        super().teardown_method()
+
+    def test_uncached_lookup_skips_generation(self):
+        for _ in range(3):
+            assert self.users.get_user_by_id("1").name == "user 1"
+        assert self.generation_reads == 0
+        assert self.users.cache.get("1") is None
+
+    def test_cached_lookup_is_invalidated_by_writes(self):
+        assert self.users.get_user_by_id("1", cached=True).role == "user"
+        assert self.users.cache.get("1") is not None
+
+        # A write that bypasses the model layer is not seen until the TTL
+        from open_webui.internal.db import get_db
+        from open_webui.models.users import User
+
+        with get_db() as db:
+            db.query(User).filter_by(id="1").update({"name": "renamed"})
+            db.commit()
+        assert self.users.get_user_by_id("1", cached=True).name == "user 1"
+        assert self.users.get_user_by_id("1").name == "renamed"
+
+        self.users.update_user_role_by_id("1", "admin")
+        user = self.users.get_user_by_id("1", cached=True)
+        assert user.role == "admin"
+        assert user.name == "renamed"
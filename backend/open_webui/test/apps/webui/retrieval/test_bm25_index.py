@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from open_webui.retrieval.bm25_index import BM25Index
+
+DOCUMENTS = {
+    "1": "the quick brown fox",
+    "2": "a lazy dog sleeps",
+    "3": "brown bears eat honey",
+    "4": "cats chase mice",
+    "5": "birds sing songs",
+    "6": "fish swim upstream",
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25"))
+    ids = list(DOCUMENTS)
+    index.add(
+        "docs",
+        ids,
+        [DOCUMENTS[id] for id in ids],
+        [{"file_id": f"file-{int(id) % 2}"} for id in ids],
+    )
+    return index
+
+
+def read_manifest(index, collection_name):
+    with open(index._get_manifest_path(collection_name), "r") as f:
+        return json.load(f)
+
+
+def search_ids(index, query, k=10):
+    return [result["id"] for result in index.search("docs", query, k)]
+
+
+def test_add_and_search(index):
+    assert index.has_index("docs")
+    assert not index.has_index("other")
+    assert index.search("other", "fox", 5) == []
+
+    results = index.search("docs", "brown fox", 5)
+    assert [result["id"] for result in results] == ["1", "3"]
+    assert results[0]["text"] == DOCUMENTS["1"]
+    assert results[0]["metadata"] == {"file_id": "file-1"}
+    assert results[0]["score"] > results[1]["score"] > 0
+
+    assert search_ids(index, "brown", k=1) in (["1"], ["3"])
+    assert search_ids(index, "unknown") == []
+
+
+def test_add_replaces_existing_ids(index):
+    index.add("docs", ["1"], ["green turtles"], [{}])
+    assert search_ids(index, "fox") == []
+    assert search_ids(index, "turtles") == ["1"]
+
+    # Within a batch, the last document with a given id wins
+    index.add("docs", ["7", "7"], ["red apples", "blue whales"], [{}, {}])
+    assert search_ids(index, "apples") == []
+    assert search_ids(index, "whales") == ["7"]
+
+
+def test_delete_by_ids_and_filter(index):
+    index.delete("docs", ids=["1"])
+    assert search_ids(index, "brown fox") == ["3"]
+
+    index.delete("docs", filter={"file_id": "file-1"})
+    assert search_ids(index, "brown bears honey") == []
+    assert search_ids(index, "lazy dog") == ["2"]
+
+
+def test_delete_with_operator_filter_drops_index(index):
+    index.delete("docs", filter={"file_id": {"$in": ["file-1"]}})
+    assert not index.has_index("docs")
+    assert index.search("docs", "fox", 5) == []
+
+
+def test_compaction_drops_deleted_documents(index, monkeypatch):
+    monkeypatch.setattr(BM25Index, "MAX_SEGMENTS", 2)
+    for id in ["7", "8"]:
+        index.add("docs", [id], [f"word{id} extra"], [{}])
+
+    # Too many segments: the smallest ones are merged
+    manifest = read_manifest(index, "docs")
+    assert len(manifest["segments"]) <= 2
+    # and the merged segments are removed
+    segments = {segment["name"] for segment in manifest["segments"]}
+    collection_path = index._get_collection_path("docs")
+    assert {
+        name
+        for name in os.listdir(collection_path)
+        if os.path.isdir(os.path.join(collection_path, name))
+    } == segments
+    assert search_ids(index, "word7") == ["7"]
+    assert search_ids(index, "word8") == ["8"]
+
+    # Too many deleted documents: everything is rewritten without them
+    index.delete("docs", ids=["1", "2", "3", "4"])
+    manifest = read_manifest(index, "docs")
+    assert all(not segment["deleted"] for segment in manifest["segments"])
+    assert sum(segment["size"] for segment in manifest["segments"]) == 4
+    assert search_ids(index, "fox") == []
+    assert search_ids(index, "fish") == ["6"]
+
+
+def test_drop_and_disabled(tmp_path, index):
+    index.drop("docs")
+    assert not index.has_index("docs")
+    assert search_ids(index, "fox") == []
+
+    disabled = BM25Index(str(tmp_path / "disabled"), enabled=False)
+    disabled.add("docs", ["1"], ["the quick brown fox"], [{}])
+    assert not disabled.has_index("docs")
+
+
+def test_drop_waits_for_writers_of_other_workers(tmp_path, index):
+    # Another worker shares the index directory but not the in-process lock
+    other = BM25Index(index.path)
+    locked = threading.Event()
+    events = []
+
+    def write():
+        with other._lock("docs"):
+            locked.set()
+            time.sleep(0.2)
+            events.append("write")
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    locked.wait()
+    index.drop("docs")
+    events.append("drop")
+    thread.join()
+
+    assert events == ["write", "drop"]
+    assert not index.has_index("docs")
+    assert [name for name in os.listdir(index.path) if name.endswith(".dropped")] == []
+
+    ids = ["7", "8", "9"]
+    other.add("docs", ids, [DOCUMENTS[id] for id in "456"], [{} for _ in ids])
+    assert search_ids(index, "fish") == ["9"]
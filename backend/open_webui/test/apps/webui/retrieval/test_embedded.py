@@ -0,0 +1,147 @@
+import pytest
+
+from open_webui.retrieval.vector.dbs import embedded
+from open_webui.retrieval.vector.dbs.embedded import EmbeddedClient, match_filter
+
+
+def make_item(id, vector, metadata=None):
+    return {
+        "id": id,
+        "text": f"text {id}",
+        "vector": vector,
+        "metadata": metadata or {},
+    }
+
+
+ITEMS = [
+    make_item("a", [1.0, 0.0, 0.0], {"file_id": "f1", "page": 1}),
+    make_item("b", [0.0, 1.0, 0.0], {"file_id": "f1", "page": 2}),
+    make_item("c", [0.0, 0.0, 1.0], {"file_id": "f2", "page": 1}),
+]
+
+
+@pytest.fixture(params=["float32", "float16"])
+def client(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(embedded, "ENABLE_EMBEDDED_VECTOR_DB_HNSW", False)
+    client = EmbeddedClient(str(tmp_path / "vector_db"), request.param)
+    client.insert("docs", ITEMS)
+    return client
+
+
+def get_ids(client, collection_name="docs"):
+    return sorted(client.get(collection_name).ids[0])
+
+
+def test_match_filter():
+    metadata = {"file_id": "f1", "page": 2, "tag": None}
+    assert match_filter(metadata, {})
+    assert match_filter(metadata, {"file_id": "f1"})
+    assert not match_filter(metadata, {"file_id": "f2"})
+    assert match_filter(metadata, {"page": {"$eq": 2}})
+    assert match_filter(metadata, {"page": {"$ne": 1}})
+    assert match_filter(metadata, {"page": {"$in": [1, 2]}})
+    assert not match_filter(metadata, {"page": {"$nin": [1, 2]}})
+    assert match_filter(metadata, {"missing": {"$nin": ["x"]}})
+    assert match_filter(
+        metadata, {"$and": [{"file_id": "f1"}, {"page": {"$in": [2, 3]}}]}
+    )
+    assert not match_filter(metadata, {"$and": [{"file_id": "f1"}, {"page": 1}]})
+    assert match_filter(metadata, {"$or": [{"file_id": "f2"}, {"page": 2}]})
+    assert not match_filter(metadata, {"$or": [{"file_id": "f2"}, {"page": 1}]})
+    assert match_filter(None, {"file_id": {"$ne": "f1"}})
+    with pytest.raises(ValueError):
+        match_filter(metadata, {"page": {"$gt": 1}})
+
+
+def test_insert_and_get(client):
+    assert client.has_collection("docs")
+    assert not client.has_collection("other")
+    assert client.get("other") is None
+
+    result = client.get("docs")
+    assert result.ids == [["a", "b", "c"]]
+    assert result.documents == [["text a", "text b", "text c"]]
+    assert result.metadatas[0][2] == {"file_id": "f2", "page": 1}
+
+
+def test_search(client):
+    result = client.search("docs", [[1.0, 0.1, 0.0], [0.0, 0.0, 2.0]], 2)
+    assert result.ids[0] == ["a", "b"]
+    assert result.ids[1][0] == "c"
+    assert result.documents[0][0] == "text a"
+    # Cosine similarity mapped to 0 -> 1, best first
+    assert 0.99 < result.distances[1][0] <= 1.0
+    assert result.distances[0][0] >= result.distances[0][1]
+
+    assert client.search("other", [[1.0, 0.0, 0.0]], 2) is None
+    with pytest.raises(ValueError):
+        client.search("docs", [[1.0, 0.0]], 2)
+
+
+def test_upsert_replaces_items(client):
+    client.upsert(
+        "docs",
+        [
+            make_item("a", [0.0, 0.0, 1.0], {"file_id": "f3"}),
+            make_item("d", [1.0, 1.0, 0.0]),
+        ],
+    )
+    assert get_ids(client) == ["a", "b", "c", "d"]
+
+    result = client.search("docs", [[0.0, 0.0, 1.0]], 2)
+    assert sorted(result.ids[0]) == ["a", "c"]
+    assert client.query("docs", {"file_id": "f3"}).ids == [["a"]]
+
+    with pytest.raises(ValueError):
+        client.upsert("docs", [make_item("e", [1.0, 0.0])])
+
+
+def test_query(client):
+    assert client.query("docs", {"file_id": "f1"}).ids == [["a", "b"]]
+    assert client.query("docs", {"file_id": "f1"}, limit=1).ids == [["a"]]
+    assert client.query("docs", {"page": {"$in": [1]}}).ids == [["a", "c"]]
+    assert client.query("docs", {"file_id": "none"}).ids == [[]]
+
+
+def test_delete(client):
+    client.delete("docs", ids=["a"])
+    assert get_ids(client) == ["b", "c"]
+    assert "a" not in client.search("docs", [[1.0, 0.0, 0.0]], 3).ids[0]
+
+    client.delete("docs", filter={"file_id": {"$ne": "f1"}})
+    assert get_ids(client) == ["b"]
+
+    client.delete_collection("docs")
+    assert not client.has_collection("docs")
+
+
+def test_compaction_and_iter_items(client, monkeypatch):
+    monkeypatch.setattr(EmbeddedClient, "MAX_SEGMENTS", 2)
+    for idx in range(4):
+        client.insert("docs", [make_item(f"n{idx}", [1.0, float(idx), 0.0])])
+
+    manifest = client._read_manifest("docs")
+    assert len(manifest["segments"]) <= 2
+    assert len(get_ids(client)) == 7
+
+    # Deleting most items rewrites the segments without them
+    client.delete("docs", ids=["a", "b", "c", "n0", "n1"])
+    manifest = client._read_manifest("docs")
+    assert all(not segment["deleted"] for segment in manifest["segments"])
+    assert sum(segment["size"] for segment in manifest["segments"]) == 2
+
+    batches = list(client.iter_items("docs", batch_size=1))
+    assert sorted(id for batch in batches for id in batch.ids[0]) == ["n2", "n3"]
+
+
+def test_iter_items_survives_compaction(client, monkeypatch):
+    client.insert("docs", [make_item("d", [1.0, 1.0, 1.0])])
+
+    ids = []
+    for batch in client.iter_items("docs", batch_size=1):
+        ids.extend(batch.ids[0])
+        if len(ids) == 1:
+            # Compacts the segment being read
+            monkeypatch.setattr(EmbeddedClient, "MAX_DELETED_RATIO", 0)
+            client.delete("docs", ids=["c"])
+    assert sorted(ids) == ["a", "b", "d"]
@@ -0,0 +1,140 @@
+from open_webui.retrieval import embedding_cache
+from open_webui.retrieval.embedding_cache import ChunkEmbeddingStore, EmbeddingCache
+
+
+class MockRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+def make_embedding_function():
+    calls = []
+
+    def embedding_function(query, prefix=None, user=None):
+        calls.append(query)
+        if isinstance(query, str):
+            return [float(len(query)), 1.0 if prefix else 0.0]
+        return [[float(len(text)), 0.0] for text in query]
+
+    return embedding_function, calls
+
+
+def test_wrap_caches_queries_per_model_and_prefix():
+    cache = EmbeddingCache(max_size=10)
+    func, calls = make_embedding_function()
+    cached = cache.wrap("openai", "model-a", func)
+
+    assert cached("hello") == [5.0, 0.0]
+    assert cached("hello") == [5.0, 0.0]
+    assert cached("hello", prefix="query: ") == [5.0, 1.0]
+    cache.wrap("openai", "model-b", func)("hello")
+    assert calls == ["hello", "hello", "hello"]
+
+    # Batches of documents are not cached
+    assert cached(["a", "bb"]) == [[1.0, 0.0], [2.0, 0.0]]
+    assert cached(["a", "bb"]) == [[1.0, 0.0], [2.0, 0.0]]
+    assert calls[-2:] == [["a", "bb"], ["a", "bb"]]
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_disabled_cache_returns_the_function():
+    func, _ = make_embedding_function()
+    assert EmbeddingCache(max_size=0).wrap("", "model", func) is func
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embedding_cache.time, "monotonic", lambda: now[0])
+
+    cache = EmbeddingCache(max_size=2, ttl=60)
+    cache.set("a", [1.0])
+    cache.set("b", [2.0])
+    assert cache.get("a") == [1.0]
+
+    # "b" is the least recently used entry
+    cache.set("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+
+    now[0] += 61
+    assert cache.get("a") is None
+    assert cache.get_stats()["size"] == 1
+
+
+def test_redis_tier_is_shared_between_workers():
+    redis = MockRedis()
+    workers = []
+    for _ in range(2):
+        cache = EmbeddingCache(max_size=10)
+        cache.redis = redis
+        workers.append(cache)
+
+    func, calls = make_embedding_function()
+    assert workers[0].wrap("", "model", func)("hello") == [5.0, 0.0]
+    assert workers[1].wrap("", "model", func)("hello") == [5.0, 0.0]
+
+    assert calls == ["hello"]
+    assert workers[1].get_stats()["redis_hits"] == 1
+
+
+def test_chunk_store_embeds_unseen_chunks_once(tmp_path):
+    store = ChunkEmbeddingStore(str(tmp_path / "chunks.db"))
+    calls = []
+
+    def func(texts):
+        calls.append(texts)
+        return [[float(len(text)), 0.5] for text in texts]
+
+    embeddings = store.embed("", "model", None, ["a", "bb", "a"], func)
+    assert embeddings == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    assert calls == [["a", "bb"]]
+
+    # Another process (a fresh store on the same file) reuses the vectors
+    store = ChunkEmbeddingStore(str(tmp_path / "chunks.db"))
+    embeddings = store.embed("", "model", None, ["bb", "ccc"], func)
+    assert embeddings == [[2.0, 0.5], [3.0, 0.5]]
+    assert calls[-1] == ["ccc"]
+    assert store.get_stats() == {"enabled": True, "hits": 1, "misses": 1}
+
+    # Vectors are stored per embedding model
+    store.embed("", "other-model", None, ["bb"], func)
+    assert calls[-1] == ["bb"]
+
+
+def test_chunk_store_prunes_least_recently_used(tmp_path, monkeypatch):
+    now = [1_000_000]
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: now[0])
+
+    store = ChunkEmbeddingStore(str(tmp_path / "chunks.db"), max_entries=10)
+    func = lambda texts: [[1.0] for _ in texts]
+
+    texts = [f"chunk {idx}" for idx in range(10)]
+    store.embed("", "model", None, texts, func)
+
+    # Reading refreshes the first chunks, the others become the oldest
+    now[0] += store.TOUCH_INTERVAL + 1
+    store.embed("", "model", None, texts[:3], func)
+
+    now[0] += 1
+    store.embed("", "model", None, ["new 1", "new 2"], func)
+
+    keys = [EmbeddingCache.get_key("", "model", None, text) for text in texts]
+    remaining = store.get_many(keys)
+    assert len(remaining) + 2 == 9
+    assert all(key in remaining for key in keys[:3])
+
+
+def test_disabled_chunk_store_calls_through(tmp_path):
+    store = ChunkEmbeddingStore(str(tmp_path / "chunks.db"), enabled=False)
+    assert store.embed("", "model", None, ["a"], lambda texts: [[1.0]]) == [[1.0]]
+    assert not (tmp_path / "chunks.db").exists()
@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from open_webui.retrieval import embedding_client
+from open_webui.retrieval.embedding_client import (
+    EmbeddingBatchTooLargeError,
+    EmbeddingClient,
+)
+
+
+@pytest.fixture
+def server():
+    responses = []
+    requests_received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests_received.append(body)
+            status, headers, payload = (
+                responses.pop(0) if responses else (200, {}, {"ok": True})
+            )
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", responses, requests_received
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(embedding_client.time, "sleep", delays.append)
+    return delays
+
+
+def test_post_retries_with_retry_after(server, sleeps):
+    url, responses, received = server
+    responses.extend(
+        [(429, {"Retry-After": "7"}, {}), (503, {}, {}), (200, {}, {"data": [1]})]
+    )
+
+    client = EmbeddingClient(max_retries=3, backoff=1.0)
+    assert client.post(f"{url}/embed", {}, {"input": ["a"]}) == {"data": [1]}
+    assert len(received) == 3
+    assert sleeps[0] == 7
+    assert 1.0 <= sleeps[1] <= 2.0
+
+
+def test_post_raises_after_max_retries(server, sleeps):
+    url, responses, _ = server
+    responses.extend([(503, {}, {})] * 3)
+
+    client = EmbeddingClient(max_retries=2)
+    with pytest.raises(requests.HTTPError):
+        client.post(f"{url}/embed", {}, {"input": ["a"]})
+    assert len(sleeps) == 2
+
+
+def test_post_detects_batches_too_large(server, sleeps):
+    url, responses, _ = server
+    responses.append((400, {}, {"error": "input exceeds the maximum batch size"}))
+
+    client = EmbeddingClient()
+    with pytest.raises(EmbeddingBatchTooLargeError):
+        client.post(f"{url}/embed", {}, {"input": ["a", "b"]}, batch_size=2)
+    assert sleeps == []
+
+    # A single input is rejected for its content, not the batch size
+    responses.append((400, {}, {"error": "input exceeds the maximum length"}))
+    with pytest.raises(requests.HTTPError):
+        client.post(f"{url}/embed", {}, {"input": ["a"]}, batch_size=1)
+
+
+def test_embed_keeps_order_and_bounds_concurrency():
+    client = EmbeddingClient(max_concurrency=3)
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def embed_batch(batch):
+        with lock:
+            in_flight[0] += 1
+            max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        return [[float(text)] for text in batch]
+
+    texts = [str(idx) for idx in range(50)]
+    embeddings = client.embed("http://embed/api", "model", texts, 4, embed_batch)
+
+    assert embeddings == [[float(idx)] for idx in range(50)]
+    assert 1 < max_in_flight[0] <= 3
+
+
+def test_embed_splits_batches_that_are_too_large():
+    client = EmbeddingClient(max_concurrency=1)
+    batches = []
+
+    def embed_batch(batch):
+        batches.append(len(batch))
+        if len(batch) > 2:
+            raise EmbeddingBatchTooLargeError()
+        return [[float(text)] for text in batch]
+
+    texts = [str(idx) for idx in range(8)]
+    embeddings = client.embed("http://embed/api", "model", texts, 8, embed_batch)
+    assert embeddings == [[float(idx)] for idx in range(8)]
+    assert batches == [8, 4, 2, 2, 4, 2, 2]
+
+    # The next call starts with the reduced batch size
+    batches.clear()
+    client.embed("http://embed/api", "model", texts, 8, embed_batch)
+    assert batches == [2, 2, 2, 2]
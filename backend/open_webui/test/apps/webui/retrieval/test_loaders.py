@@ -0,0 +1,31 @@
+from open_webui.retrieval.loaders.main import iter_text_file
+
+
+def test_iter_text_file_cuts_at_line_ends(tmp_path):
+    content = "".join(f"line {idx}\n" for idx in range(100))
+    path = tmp_path / "lines.txt"
+    path.write_text(content, encoding="utf-8")
+
+    docs = list(iter_text_file(str(path), window_size=64))
+
+    assert len(docs) > 1
+    assert "".join(doc.page_content for doc in docs) == content
+    for doc in docs:
+        assert doc.page_content.endswith("\n")
+        start = doc.metadata["start_index"]
+        assert content[start : start + len(doc.page_content)] == doc.page_content
+
+
+def test_iter_text_file_bounds_long_lines(tmp_path):
+    content = "x" * 1000
+    path = tmp_path / "single_line.txt"
+    path.write_text(content, encoding="utf-8")
+
+    docs = list(iter_text_file(str(path), window_size=64))
+
+    assert len(docs) == 8
+    assert all(len(doc.page_content) <= 128 for doc in docs)
+    assert "".join(doc.page_content for doc in docs) == content
+    assert [doc.metadata["start_index"] for doc in docs] == [
+        idx * 128 for idx in range(8)
+    ]
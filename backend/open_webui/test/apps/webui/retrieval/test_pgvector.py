@@ -0,0 +1,293 @@
+import json
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.retrieval.vector.dbs import pgvector
+from open_webui.retrieval.vector.dbs.pgvector import PgvectorClient
+
+
+class MockResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class MockSession:
+    def __init__(self, rows=0):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+        return MockResult(self.rows)
+
+
+def make_client(partitioned: bool, rows: int = 0) -> PgvectorClient:
+    # Only the SQL generation is exercised, without a database
+    client = PgvectorClient.__new__(PgvectorClient)
+    client.session = MockSession(rows)
+    client.partitioned = partitioned
+    return client
+
+
+@pytest.fixture(autouse=True)
+def index_settings(monkeypatch):
+    monkeypatch.setattr(pgvector, "PGVECTOR_INDEX_TYPE", "ivfflat")
+    monkeypatch.setattr(pgvector, "PGVECTOR_INDEX_HALFVEC", False)
+    monkeypatch.setattr(pgvector, "PGVECTOR_IVFFLAT_LISTS", 0)
+    monkeypatch.setattr(pgvector, "PGVECTOR_IVFFLAT_PROBES", 0)
+
+
+def test_ivfflat_lists_follow_table_size():
+    sql = make_client(partitioned=False, rows=500_000).get_vector_index_sql(
+        "idx", concurrently=True
+    )
+    assert "CONCURRENTLY" in sql
+    assert "USING ivfflat" in sql
+    assert "lists = 500" in sql
+
+    sql = make_client(partitioned=False, rows=10).get_vector_index_sql("idx")
+    assert "lists = 100" in sql
+
+
+def test_partitioned_tables_use_hnsw(monkeypatch):
+    client = make_client(partitioned=True)
+    assert client.get_index_type() == "hnsw"
+    assert "USING hnsw" in client.get_vector_index_sql("idx")
+
+    monkeypatch.setattr(pgvector, "PGVECTOR_INDEX_TYPE", "none")
+    assert client.get_vector_index_sql("idx") is None
+
+
+@pytest.mark.parametrize("partitioned,probes", [(False, "20"), (True, "400")])
+def test_ivfflat_probes(partitioned, probes):
+    client = make_client(partitioned=partitioned)
+    client.index_type = "ivfflat"
+    client.ivfflat_lists = 400
+
+    client.set_search_parameters(limit=10)
+
+    # An ivfflat index of a partitioned table left by an earlier version has
+    # partitions indexed while empty, all of their lists are searched
+    assert client.session.statements[-1][1] == {"value": probes}
+
+
+class MockCopyCursor:
+    def __init__(self):
+        self.statements = []
+        self.copies = []
+        self.closed = False
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+    def copy_expert(self, statement, file):
+        self.copies.append((statement, file.read()))
+
+    def close(self):
+        self.closed = True
+
+
+def make_copy_client(cursor: MockCopyCursor) -> PgvectorClient:
+    client = make_client(partitioned=False)
+    connection = SimpleNamespace(connection=SimpleNamespace(cursor=lambda: cursor))
+    client.session.connection = lambda: connection
+    return client
+
+
+def decode_copy_rows(data: bytes) -> list[list]:
+    assert data.startswith(pgvector.COPY_BINARY_HEADER)
+    assert data.endswith(pgvector.COPY_BINARY_TRAILER)
+    data = data[len(pgvector.COPY_BINARY_HEADER) : -len(pgvector.COPY_BINARY_TRAILER)]
+
+    rows = []
+    offset = 0
+    while offset < len(data):
+        (count,) = struct.unpack_from("!h", data, offset)
+        offset += 2
+        row = []
+        for _ in range(count):
+            (length,) = struct.unpack_from("!i", data, offset)
+            offset += 4
+            if length == -1:
+                row.append(None)
+                continue
+            row.append(data[offset : offset + length])
+            offset += length
+        rows.append(row)
+    return rows
+
+
+def make_items(count: int) -> list[dict]:
+    return [
+        {
+            "id": f"id-{idx}",
+            "text": f"chunk {idx}",
+            "vector": [float(idx), 0.5],
+            "metadata": {"idx": idx},
+        }
+        for idx in range(count)
+    ]
+
+
+def test_encode_copy_rows(monkeypatch):
+    monkeypatch.setattr(pgvector, "VECTOR_LENGTH", 4)
+    client = make_client(partitioned=False)
+    items = make_items(2)
+    items[1]["text"] = None
+    items[1]["metadata"] = None
+
+    vectors = client.adjust_vectors_length([[1.0, 2.0], [1.0, 2.0, 3.0, 4.0, 5.0]])
+    rows = decode_copy_rows(client.encode_copy_rows("docs", items, vectors))
+
+    assert len(rows) == 2
+    id, vector, collection_name, text, metadata = rows[0]
+    assert (id, collection_name, text) == (b"id-0", b"docs", b"chunk 0")
+    assert struct.unpack("!HH4f", vector) == (4, 0, 1.0, 2.0, 0.0, 0.0)
+    assert metadata[:1] == b"\x01"
+    assert json.loads(metadata[1:]) == {"idx": 0}
+
+    # Vectors are truncated to VECTOR_LENGTH, missing values are NULL
+    assert struct.unpack("!HH4f", rows[1][1])[2:] == (1.0, 2.0, 3.0, 4.0)
+    assert rows[1][3:] == [None, None]
+
+
+def test_insert_copies_in_batches(monkeypatch):
+    monkeypatch.setattr(pgvector, "VECTOR_LENGTH", 2)
+    monkeypatch.setattr(pgvector, "PGVECTOR_INSERT_METHOD", "copy")
+    monkeypatch.setattr(pgvector, "PGVECTOR_INSERT_BATCH_SIZE", 2)
+    cursor = MockCopyCursor()
+
+    make_copy_client(cursor).write_items("docs", make_items(5), upsert=False)
+
+    assert [len(decode_copy_rows(data)) for _, data in cursor.copies] == [2, 2, 1]
+    assert all(
+        statement.startswith("COPY document_chunk (id, vector")
+        for statement, _ in cursor.copies
+    )
+    assert cursor.statements == []
+    assert cursor.closed
+
+
+def test_upsert_merges_through_a_temporary_table(monkeypatch):
+    monkeypatch.setattr(pgvector, "VECTOR_LENGTH", 2)
+    monkeypatch.setattr(pgvector, "PGVECTOR_INSERT_METHOD", "copy")
+    monkeypatch.setattr(pgvector, "PGVECTOR_INSERT_BATCH_SIZE", 100)
+    cursor = MockCopyCursor()
+
+    items = make_items(3)
+    # The last version of a repeated id wins
+    items.append({**items[0], "text": "updated"})
+    make_copy_client(cursor).write_items("docs", items, upsert=True)
+
+    create, merge = cursor.statements
+    table = create.split()[3]
+    assert create.startswith(f"CREATE TEMPORARY TABLE {table}")
+    assert "ON COMMIT DROP" in create
+
+    ((statement, data),) = cursor.copies
+    assert statement.startswith(f"COPY {table} ")
+    rows = decode_copy_rows(data)
+    assert [row[0] for row in rows] == [b"id-0", b"id-1", b"id-2"]
+    assert rows[0][3] == b"updated"
+
+    assert merge.startswith("INSERT INTO document_chunk")
+    assert f"FROM {table} ON CONFLICT (id) DO UPDATE" in merge
+
+
+def test_hnsw_halfvec_index(monkeypatch):
+    monkeypatch.setattr(pgvector, "VECTOR_LENGTH", 1536)
+    monkeypatch.setattr(pgvector, "PGVECTOR_INDEX_TYPE", "hnsw")
+    monkeypatch.setattr(pgvector, "PGVECTOR_INDEX_HALFVEC", True)
+    monkeypatch.setattr(pgvector, "PGVECTOR_HNSW_M", 24)
+    monkeypatch.setattr(pgvector, "PGVECTOR_HNSW_EF_CONSTRUCTION", 128)
+
+    sql = make_client(partitioned=False).get_vector_index_sql("idx")
+    assert sql == (
+        "CREATE INDEX IF NOT EXISTS idx ON document_chunk USING hnsw "
+        "((vector::halfvec(1536)) halfvec_cosine_ops) "
+        "WITH (m = 24, ef_construction = 128)"
+    )
+
+
+def test_ivfflat_lists_of_large_tables(monkeypatch):
+    assert make_client(partitioned=False, rows=4_000_000).get_ivfflat_lists() == 2000
+
+    monkeypatch.setattr(pgvector, "PGVECTOR_IVFFLAT_LISTS", 50)
+    client = make_client(partitioned=False, rows=4_000_000)
+    assert client.get_ivfflat_lists() == 50
+    # The configured lists don't need the size of the table
+    assert client.session.statements == []
+
+
+@pytest.mark.parametrize(
+    "configured,limit,ef_search", [(0, 10, "40"), (0, 100, "100"), (64, 100, "64")]
+)
+def test_hnsw_ef_search(monkeypatch, configured, limit, ef_search):
+    monkeypatch.setattr(pgvector, "PGVECTOR_HNSW_EF_SEARCH", configured)
+    client = make_client(partitioned=False)
+    client.index_type = "hnsw"
+
+    client.set_search_parameters(limit=limit)
+
+    assert client.session.statements[-1][1] == {"value": ef_search}
+
+
+def test_halfvec_index_searches_cast_the_query():
+    client = make_client(partitioned=False)
+    vector = pgvector.DocumentChunk.vector
+
+    client.index_halfvec = True
+    assert str(client.get_vector_expression(vector)) == (
+        f"CAST(document_chunk.vector AS HALFVEC({pgvector.VECTOR_LENGTH}))"
+    )
+
+    client.index_halfvec = False
+    assert client.get_vector_expression(vector) is vector
+
+
+def make_index_client(rows: int, **index) -> PgvectorClient:
+    client = make_client(partitioned=False, rows=rows)
+    loaded = []
+
+    def load_vector_index():
+        loaded.append(True)
+        client.index_type = index.get("index_type")
+        client.index_halfvec = index.get("index_halfvec", False)
+        client.ivfflat_lists = index.get("ivfflat_lists")
+
+    client.load_vector_index = load_vector_index
+    return client
+
+
+def test_ensure_vector_index_creates_a_missing_index():
+    client = make_index_client(rows=0)
+    client.ensure_vector_index()
+    assert client.session.statements[-1][0].startswith(
+        f"CREATE INDEX IF NOT EXISTS {pgvector.VECTOR_INDEX_NAME}"
+    )
+
+
+@pytest.mark.parametrize(
+    "index,warns",
+    [
+        ({"index_type": "ivfflat", "ivfflat_lists": 500}, False),
+        ({"index_type": "ivfflat", "ivfflat_lists": 100}, True),
+        ({"index_type": "hnsw"}, True),
+        ({"index_type": "ivfflat", "ivfflat_lists": 500, "index_halfvec": True}, True),
+    ],
+)
+def test_ensure_vector_index_reports_a_stale_index(caplog, index, warns):
+    # 500 lists suit 500k rows, 100 are too few
+    client = make_index_client(rows=500_000, **index)
+
+    with caplog.at_level("WARNING", logger=pgvector.log.name):
+        client.ensure_vector_index()
+
+    assert ("reindex-vectors" in caplog.text) == warns
+    # An existing index is never rebuilt on startup
+    assert not any("CREATE INDEX" in sql for sql, _ in client.session.statements)
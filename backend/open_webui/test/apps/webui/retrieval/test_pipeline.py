@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from open_webui.retrieval.pipeline import (
+    FileProcessingPipeline,
+    iter_batches,
+    split_documents_lazily,
+)
+
+
+def make_task(name, content):
+    return {
+        "filename": name,
+        "content_type": "text/plain",
+        "file_path": None,
+        "content": content,
+        "metadata": {"name": name},
+    }
+
+
+def embed(docs):
+    if any("bad embedding" in doc.page_content for doc in docs):
+        raise ValueError("embedding failed")
+    return [[float(len(doc.page_content))] for doc in docs]
+
+
+def test_run_keeps_order_and_isolates_failures():
+    pipeline = FileProcessingPipeline(workers=0, concurrency=3)
+    tasks = [
+        make_task("a.txt", "first file"),
+        make_task("b.txt", "bad embedding"),
+        make_task("c.txt", None),
+        make_task("d.txt", "fourth<br/>file"),
+    ]
+
+    def fetch(task):
+        if task["filename"] == "c.txt":
+            raise FileNotFoundError("c.txt")
+        return task
+
+    progress = []
+    results = pipeline.run(
+        tasks,
+        loader_config={"engine": ""},
+        splitter_config=None,
+        embed=embed,
+        fetch=fetch,
+        on_progress=progress.append,
+    )
+
+    assert results[0]["text_content"] == "first file"
+    assert results[0]["embeddings"] == [[10.0]]
+    assert str(results[1]["error"]) == "embedding failed"
+    assert isinstance(results[2]["error"], FileNotFoundError)
+    assert results[3]["docs"][0].page_content == "fourth\nfile"
+    assert results[3]["docs"][0].metadata == {"name": "d.txt"}
+    assert sorted(progress) == [1, 2, 3, 4]
+
+
+def test_progress_errors_abort_the_batch():
+    pipeline = FileProcessingPipeline(workers=0, concurrency=1)
+    started = []
+    lock = threading.Lock()
+
+    def counting_embed(docs):
+        with lock:
+            started.append(docs[0].metadata["name"])
+        return embed(docs)
+
+    def on_progress(completed):
+        raise InterruptedError()
+
+    tasks = [make_task(f"{idx}.txt", "content") for idx in range(20)]
+    with pytest.raises(InterruptedError):
+        pipeline.run(
+            tasks,
+            loader_config={"engine": ""},
+            splitter_config=None,
+            embed=counting_embed,
+            on_progress=on_progress,
+        )
+    assert len(started) < len(tasks)
+
+
+def test_split_documents_lazily_keeps_file_offsets():
+    class LineSplitter:
+        def split_documents(self, docs):
+            chunks = []
+            for doc in docs:
+                start = 0
+                for line in doc.page_content.splitlines(keepends=True):
+                    chunks.append(
+                        Document(
+                            page_content=line,
+                            metadata={**doc.metadata, "start_index": start},
+                        )
+                    )
+                    start += len(line)
+            return chunks
+
+    windows = [
+        Document(page_content="ab\ncd\n", metadata={"start_index": 0}),
+        Document(page_content="ef\n", metadata={"start_index": 6}),
+    ]
+    chunks = list(split_documents_lazily(iter(windows), LineSplitter()))
+
+    assert [chunk.page_content for chunk in chunks] == ["ab\n", "cd\n", "ef\n"]
+    assert [chunk.metadata["start_index"] for chunk in chunks] == [0, 3, 6]
+
+
+def test_iter_batches():
+    assert list(iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(iter_batches([], 2)) == []
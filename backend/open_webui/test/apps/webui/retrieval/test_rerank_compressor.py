@@ -0,0 +1,59 @@
+from langchain_core.documents import Document
+
+from open_webui.retrieval import utils
+from open_webui.retrieval.utils import RerankCompressor, fit_stored_vector
+
+
+class MockVectorDB:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def get_vectors(self, collection_name, ids):
+        return {id: self.vectors[id] for id in ids if id in self.vectors}
+
+
+def test_fit_stored_vector():
+    assert fit_stored_vector([0.1, 0.2, 0.3], 3) == [0.1, 0.2, 0.3]
+    assert fit_stored_vector([0.1, 0.2, 0.3, 0.0, 0.0], 3) == [0.1, 0.2, 0.3]
+    # Stored with another embedding model
+    assert fit_stored_vector([0.1, 0.2, 0.3, 0.4], 3) is None
+    assert fit_stored_vector([0.1, 0.2], 3) is None
+    assert fit_stored_vector(None, 3) is None
+
+
+def test_get_document_embeddings_reuses_padded_vectors(monkeypatch):
+    monkeypatch.setattr(
+        utils,
+        "VECTOR_DB_CLIENT",
+        MockVectorDB(
+            {
+                # Zero-padded to the pgvector column size
+                "a": [1.0, 0.0, 0.5] + [0.0] * 1533,
+                # Stored with a larger embedding model
+                "b": [0.5] * 1536,
+            }
+        ),
+    )
+    embedded = []
+
+    def embedding_function(texts, prefix=None):
+        embedded.extend(texts)
+        return [[0.0, 1.0, 0.0] for _ in texts]
+
+    compressor = RerankCompressor(
+        embedding_function=embedding_function,
+        top_n=3,
+        reranking_function=None,
+        r_score=0.0,
+        collection_name="docs",
+    )
+    documents = [
+        Document(id="a", page_content="a"),
+        Document(id="b", page_content="b"),
+        Document(id="c", page_content="c"),
+    ]
+
+    embeddings = compressor.get_document_embeddings(documents, 3)
+
+    assert embeddings == [[1.0, 0.0, 0.5], [0.0, 1.0, 0.0], [0.0, 1.0, 0.0]]
+    assert embedded == ["b", "c"]
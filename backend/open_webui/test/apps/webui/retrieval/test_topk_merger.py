@@ -0,0 +1,85 @@
+from open_webui.retrieval.utils import TopKMerger, merge_and_sort_query_results
+
+
+def make_result(distances, documents, ids=None):
+    result = {
+        "distances": [distances],
+        "documents": [documents],
+        "metadatas": [[{"source": document} for document in documents]],
+    }
+    if ids is not None:
+        result["ids"] = [ids]
+    return result
+
+
+def test_keeps_best_k():
+    merger = TopKMerger(2)
+    merger.add_result(make_result([0.1, 0.9, 0.5], ["a", "b", "c"]))
+    result = merger.get_result()
+    assert result["documents"] == [["b", "c"]]
+    assert result["distances"] == [[0.9, 0.5]]
+    assert result["metadatas"] == [[{"source": "b"}, {"source": "c"}]]
+
+
+def test_merges_and_dedupes_results():
+    result = merge_and_sort_query_results(
+        [
+            make_result([0.4, 0.8], ["a", "b"], ids=["1", "2"]),
+            make_result([0.6, 0.7], ["a", "c"], ids=["1", "3"]),
+        ],
+        k=3,
+    )
+    # "a" is kept once, with its best distance
+    assert result["documents"] == [["b", "c", "a"]]
+    assert result["distances"] == [[0.8, 0.7, 0.6]]
+
+
+def test_dedupes_by_document_without_ids():
+    result = merge_and_sort_query_results(
+        [make_result([0.2], ["a"]), make_result([0.3], ["a"])], k=5
+    )
+    assert result["documents"] == [["a"]]
+    assert result["distances"] == [[0.3]]
+
+
+def test_ties_keep_earlier_results():
+    merger = TopKMerger(2)
+    merger.add_result(make_result([0.5, 0.5, 0.5], ["a", "b", "c"]))
+    assert merger.get_result()["documents"] == [["a", "b"]]
+
+
+def test_worse_duplicate_is_ignored():
+    merger = TopKMerger(2)
+    merger.add(0.9, "a", {"version": 1}, id="1")
+    merger.add(0.1, "a", {"version": 2}, id="1")
+    result = merger.get_result()
+    assert result["distances"] == [[0.9]]
+    assert result["metadatas"] == [[{"version": 1}]]
+
+
+def test_update_of_evicted_key():
+    merger = TopKMerger(2)
+    merger.add(0.1, "a", {}, id="1")
+    merger.add(0.5, "b", {}, id="2")
+    merger.add(0.6, "c", {}, id="3")  # evicts "a"
+    assert merger.get_result()["documents"] == [["c", "b"]]
+
+    # "a" comes back with a better distance and evicts "b"
+    merger.add(0.9, "a", {}, id="1")
+    result = merger.get_result()
+    assert result["documents"] == [["a", "c"]]
+    assert result["distances"] == [[0.9, 0.6]]
+
+    # An evicted key that is still not good enough stays out
+    merger.add(0.2, "b", {}, id="2")
+    assert merger.get_result()["documents"] == [["a", "c"]]
+
+
+def test_non_positive_k_and_invalid_documents():
+    merger = TopKMerger(0)
+    merger.add(0.9, "a", {})
+    assert merger.get_result()["documents"] == [[]]
+
+    merger = TopKMerger(2)
+    merger.add(0.9, None, {})
+    assert merger.get_result()["documents"] == [[]]
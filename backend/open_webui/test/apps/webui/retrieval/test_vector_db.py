@@ -0,0 +1,230 @@
+from typing import Optional
+
+import numpy as np
+
+from open_webui.retrieval import utils
+from open_webui.retrieval.vector.main import (
+    GetResult,
+    SearchResult,
+    VectorDBBase,
+    merge_search_results,
+)
+
+
+class MemoryVectorDB(VectorDBBase):
+    """Collections as lists of (id, text, vector, metadata), searched exhaustively."""
+
+    def __init__(self, collections: dict, multi_vector: bool = False):
+        self.collections = collections
+        self.MULTI_VECTOR_SEARCH = multi_vector
+        self.searches = []
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    def insert(self, collection_name, items):
+        self.collections.setdefault(collection_name, []).extend(
+            (item["id"], item["text"], item["vector"], item["metadata"])
+            for item in items
+        )
+
+    def upsert(self, collection_name, items):
+        self.delete(collection_name, ids=[item["id"] for item in items])
+        self.insert(collection_name, items)
+
+    def search(self, collection_name, vectors, limit) -> Optional[SearchResult]:
+        self.searches.append((collection_name, len(vectors)))
+        if collection_name == "broken":
+            raise ConnectionError("unreachable")
+
+        items = self.collections.get(collection_name, [])
+        result = SearchResult(ids=[], distances=[], documents=[], metadatas=[])
+        for vector in vectors if self.MULTI_VECTOR_SEARCH else vectors[:1]:
+            scored = sorted(
+                items,
+                key=lambda item: -float(np.dot(item[2], vector)),
+            )[:limit]
+            result.ids.append([item[0] for item in scored])
+            result.distances.append([float(np.dot(item[2], vector)) for item in scored])
+            result.documents.append([item[1] for item in scored])
+            result.metadatas.append([item[3] for item in scored])
+        return result
+
+    def query(self, collection_name, filter, limit=None):
+        return None
+
+    def get(self, collection_name) -> Optional[GetResult]:
+        items = self.collections.get(collection_name)
+        if items is None:
+            return None
+        return GetResult(
+            ids=[[item[0] for item in items]],
+            documents=[[item[1] for item in items]],
+            metadatas=[[item[3] for item in items]],
+        )
+
+    def delete(self, collection_name, ids=None, filter=None):
+        self.collections[collection_name] = [
+            item
+            for item in self.collections.get(collection_name, [])
+            if item[0] not in ids
+        ]
+
+    def reset(self):
+        self.collections = {}
+
+
+def make_collections():
+    return {
+        "a": [
+            ("a1", "apples", [1.0, 0.0], {"source": "a"}),
+            ("a2", "pears", [0.6, 0.8], {"source": "a"}),
+        ],
+        "b": [
+            ("b1", "bananas", [0.0, 1.0], {"source": "b"}),
+            ("b2", "cherries", [0.8, 0.6], {"source": "b"}),
+        ],
+    }
+
+
+def test_merge_search_results_keeps_best_per_vector():
+    results = [
+        SearchResult(
+            ids=[["a1", "a2"], ["a2"]],
+            distances=[[0.9, 0.5], [0.4]],
+            documents=[["x", "y"], ["y"]],
+            metadatas=[[{}, {}], [{}]],
+        ),
+        None,
+        SearchResult(
+            ids=[["b1"]],
+            distances=[[0.7]],
+            documents=[["z"]],
+            metadatas=[[{}]],
+        ),
+    ]
+
+    merged = merge_search_results(results, num_vectors=2, limit=2)
+    assert merged.ids == [["a1", "b1"], ["a2"]]
+    assert merged.distances == [[0.9, 0.7], [0.4]]
+
+
+def test_search_collections_merges_across_collections():
+    for multi_vector in [False, True]:
+        db = MemoryVectorDB(make_collections(), multi_vector=multi_vector)
+        result = db.search_collections(
+            ["a", "b", "broken"], [[1.0, 0.0], [0.0, 1.0]], limit=2
+        )
+
+        # Failing collections are skipped
+        assert result.ids == [["a1", "b2"], ["b1", "a2"]]
+        if multi_vector:
+            # One search per collection with all vectors
+            assert sorted(db.searches) == [("a", 2), ("b", 2), ("broken", 2)]
+        else:
+            assert len(db.searches) == 6
+
+
+def test_search_collections_without_collections_or_vectors():
+    db = MemoryVectorDB(make_collections())
+    assert db.search_collections([], [[1.0, 0.0]], limit=2) is None
+    assert db.search_collections(["a"], [], limit=2) is None
+
+
+def test_query_collection_embeds_once_and_merges(monkeypatch):
+    db = MemoryVectorDB(make_collections(), multi_vector=True)
+    monkeypatch.setattr(utils, "VECTOR_DB_CLIENT", db)
+    calls = []
+
+    def embedding_function(queries, prefix=None):
+        calls.append(queries)
+        return [[1.0, 0.0] if "apple" in query else [0.0, 1.0] for query in queries]
+
+    result = utils.query_collection(
+        ["a", "b", None], ["apple pie", "banana bread"], embedding_function, k=3
+    )
+
+    assert calls == [["apple pie", "banana bread"]]
+    # Best score of every chunk over both queries, deduplicated; the results
+    # of the first query win ties
+    assert result["documents"] == [["apples", "bananas", "cherries"]]
+    assert result["distances"] == [[1.0, 1.0, 0.8]]
+
+
+class VectorMemoryVectorDB(MemoryVectorDB):
+    """Returns the stored vectors, except for ids in `missing`."""
+
+    def __init__(self, collections: dict, missing=()):
+        super().__init__(collections)
+        self.missing = set(missing)
+        self.lookups = []
+
+    def get_vectors(self, collection_name, ids):
+        self.lookups.append(list(ids))
+        return {
+            item[0]: item[2]
+            for item in self.collections.get(collection_name, [])
+            if item[0] in ids and item[0] not in self.missing
+        }
+
+
+def make_large_collection(size: int) -> list:
+    return [
+        (f"id{idx}", f"doc {idx}", [float(idx)], {"idx": idx}) for idx in range(size)
+    ]
+
+
+def test_iter_items_batches():
+    db = MemoryVectorDB({"c": make_large_collection(5)})
+
+    batches = list(db.iter_items("c", batch_size=2))
+
+    assert [batch.ids[0] for batch in batches] == [
+        ["id0", "id1"],
+        ["id2", "id3"],
+        ["id4"],
+    ]
+    assert batches[2].documents == [["doc 4"]]
+    assert batches[2].metadatas == [[{"idx": 4}]]
+    # Vectors are only looked up when asked for
+    assert batches[0].vectors is None
+
+
+def test_iter_items_fields():
+    db = VectorMemoryVectorDB({"c": make_large_collection(3)}, missing={"id1"})
+
+    batches = list(db.iter_items("c", batch_size=2, fields=("vectors",)))
+
+    assert db.lookups == [["id0", "id1"], ["id2"]]
+    assert batches[0].vectors == [[[0.0], None]]
+    assert batches[1].vectors == [[[2.0]]]
+    assert batches[0].documents is None
+    assert batches[0].metadatas is None
+
+    # Backends without stored vectors leave every vector empty
+    batch = next(
+        MemoryVectorDB(make_collections()).iter_items("a", fields=("vectors",))
+    )
+    assert batch.vectors == [[None, None]]
+
+
+def test_iter_items_of_missing_or_empty_collections():
+    db = MemoryVectorDB({"empty": []})
+    assert list(db.iter_items("empty")) == []
+    assert list(db.iter_items("missing")) == []
+
+
+def test_get_all_items_from_collections(monkeypatch):
+    collections = make_collections()
+    collections["c"] = make_large_collection(1500)
+    monkeypatch.setattr(utils, "VECTOR_DB_CLIENT", MemoryVectorDB(collections))
+
+    result = utils.get_all_items_from_collections(["a", None, "missing", "c"])
+
+    assert result["ids"][0][:3] == ["a1", "a2", "id0"]
+    assert len(result["ids"][0]) == 1502
+    assert result["documents"][0][-1] == "doc 1499"
+    assert result["metadatas"][0][-1] == {"idx": 1499}
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+from test.util.abstract_integration_test import AbstractPostgresTest
+
+
+def item(name, user_id="1", access_control=None):
+    return SimpleNamespace(name=name, user_id=user_id, access_control=access_control)
+
+
+class TestAccessControl(AbstractPostgresTest):
+    def setup_class(cls):
+        super().setup_class()
+        from open_webui.models.groups import GroupForm, GroupUpdateForm, Groups
+
+        cls.groups = Groups
+        cls.group_form = GroupForm
+        cls.group_update_form = GroupUpdateForm
+
+    def setup_method(self):
+        super().setup_method()
+        group = self.groups.insert_new_group(
+            "1", self.group_form(name="team", description="")
+        )
+        self.groups.update_group_by_id(
+            group.id,
+            self.group_update_form(name="team", description="", user_ids=["2"]),
+        )
+        self.group_id = group.id
+
+        self.group_lookups = []
+        get_groups_by_member_id = self.groups.get_groups_by_member_id
+
+        def counting_get_groups_by_member_id(user_id):
+            self.group_lookups.append(user_id)
+            return get_groups_by_member_id(user_id)
+
+        self.groups.get_groups_by_member_id = counting_get_groups_by_member_id
+
+    def teardown_method(self):
+        from open_webui.internal.db import Session
+        from open_webui.models.groups import Group
+
+        del self.groups.get_groups_by_member_id
+        Session.query(Group).delete()
+        Session.commit()
+        self.groups.invalidate_cache()
+        super().teardown_method()
+
+    def make_items(self):
+        return [
+            item("own", user_id="2", access_control={}),
+            item("public"),
+            item("private", access_control={}),
+            item(
+                "group-read",
+                access_control={"read": {"group_ids": [self.group_id]}},
+            ),
+            item(
+                "user-write",
+                access_control={"read": {}, "write": {"user_ids": ["2"]}},
+            ),
+            item(
+                "group-write",
+                access_control={"write": {"group_ids": [self.group_id]}},
+            ),
+        ]
+
+    def test_filter_by_access_loads_groups_once(self):
+        from open_webui.utils.access_control import filter_by_access
+
+        readable = filter_by_access("2", self.make_items(), "read")
+        assert [item.name for item in readable] == ["own", "public", "group-read"]
+        assert self.group_lookups == ["2"]
+
+        writable = filter_by_access("2", self.make_items(), "write")
+        assert [item.name for item in writable] == ["own", "user-write", "group-write"]
+
+        # Other users only see what is shared with everyone
+        readable = filter_by_access("3", self.make_items(), "read")
+        assert [item.name for item in readable] == ["public"]
+
+    def test_filter_by_access_skips_groups_without_access_control(self):
+        from open_webui.utils.access_control import filter_by_access
+
+        items = [item("own", user_id="2", access_control={}), item("public")]
+        assert len(filter_by_access("2", items, "read")) == 2
+        assert self.group_lookups == []
+
+    def test_has_access_with_precomputed_groups(self):
+        from open_webui.utils.access_control import get_user_group_ids, has_access
+
+        user_group_ids = get_user_group_ids("2")
+        assert user_group_ids == {self.group_id}
+        self.group_lookups.clear()
+
+        for item in self.make_items()[1:]:
+            for type in ["read", "write"]:
+                assert has_access(
+                    "2", type, item.access_control, user_group_ids
+                ) == has_access("2", type, item.access_control)
+        # Only the calls without user_group_ids on items with access control
+        assert self.group_lookups == ["2"] * 8
@@ -0,0 +1,101 @@
+import asyncio
+
+from test.util.abstract_integration_test import AbstractPostgresTest
+
+
+def make_chat() -> dict:
+    return {
+        "title": "Chat",
+        "history": {
+            "currentId": "m1",
+            "messages": {"m1": {"id": "m1", "content": "Hello"}},
+        },
+    }
+
+
+class TestChatWriteBuffer(AbstractPostgresTest):
+    def setup_class(cls):
+        super().setup_class()
+        from open_webui.models.chats import ChatForm, Chats
+        from open_webui.utils.chat_buffer import ChatWriteBuffer
+
+        cls.chats = Chats
+        cls.chat_form = ChatForm
+        cls.buffer_class = ChatWriteBuffer
+
+    def setup_method(self):
+        super().setup_method()
+        self.buffer = self.buffer_class(flush_interval=60, max_updates=100)
+        self.chats.pending_writes_flusher = self.buffer.flush_chats
+        self.chat = self.chats.insert_new_chat("1", self.chat_form(chat=make_chat()))
+
+    def teardown_method(self):
+        self.chats.pending_writes_flusher = None
+        super().teardown_method()
+
+    def get_message(self, chat) -> dict:
+        return chat.chat["history"]["messages"]["m1"]
+
+    def test_updates_are_coalesced(self):
+        async def update():
+            await self.buffer.append_message_content(self.chat.id, "m1", " world")
+            await self.buffer.append_message_content(self.chat.id, "m1", "!")
+            await self.buffer.add_message_status(
+                self.chat.id, "m1", {"description": "Searching"}
+            )
+
+        asyncio.run(update())
+        assert len(self.buffer.entries) == 1
+        assert self.buffer.get_stats()["updates"] == 3
+
+        assert self.buffer.flush(self.chat.id, "m1")
+        assert not self.buffer.entries
+        message = self.get_message(self.chats._get_chat_by_id(self.chat.id))
+        assert message["content"] == "Hello world!"
+        assert message["statusHistory"] == [{"description": "Searching"}]
+
+    def test_reads_flush_pending_updates(self):
+        asyncio.run(
+            self.buffer.upsert_message(self.chat.id, "m1", {"content": "Buffered"})
+        )
+
+        assert self.get_message(self.chats.get_chat_by_id(self.chat.id)) == {
+            "id": "m1",
+            "content": "Buffered",
+        }
+        assert not self.buffer.entries
+
+        asyncio.run(self.buffer.upsert_message(self.chat.id, "m1", {"done": True}))
+        chats = self.chats.get_chats_by_user_id("1")
+        assert self.get_message(chats[0])["done"] is True
+        assert not self.buffer.entries
+
+    def test_direct_writes_land_after_pending_updates(self):
+        asyncio.run(
+            self.buffer.upsert_message(self.chat.id, "m1", {"content": "Buffered"})
+        )
+
+        # e.g. the non-stream save path
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            self.chat.id, "m1", {"content": "Direct"}
+        )
+        assert not self.buffer.entries
+        self.buffer.flush_all()
+        assert (
+            self.get_message(self.chats.get_chat_by_id(self.chat.id))["content"]
+            == "Direct"
+        )
+
+    def test_max_updates_flushes(self):
+        self.buffer.max_updates = 2
+
+        async def update():
+            await self.buffer.upsert_message(self.chat.id, "m1", {"content": "a"})
+            await self.buffer.upsert_message(self.chat.id, "m1", {"content": "b"})
+
+        asyncio.run(update())
+        assert not self.buffer.entries
+        self.chats.pending_writes_flusher = None
+        assert (
+            self.get_message(self.chats.get_chat_by_id(self.chat.id))["content"] == "b"
+        )
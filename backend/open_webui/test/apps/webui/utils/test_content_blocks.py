@@ -0,0 +1,112 @@
+import random
+import re
+
+import pytest
+
+from open_webui.utils.content_blocks import (
+    ContentBlockSerializer,
+    ContentTagParser,
+    serialize_content_blocks,
+)
+
+REASONING_TAGS = [("think", "/think"), ("reasoning", "/reasoning")]
+SOLUTION_TAGS = [("|begin_of_solution|", "|end_of_solution|")]
+
+RESPONSE = (
+    "Intro text <br> with a > sign\n"
+    "<think>\nFirst thought\nsecond <b>line</b>\n</think>\n\n"
+    "Answer part one.\n"
+    '<reasoning duration="3">more\nreasoning</reasoning>'
+    "\n<|begin_of_solution|>42<|end_of_solution|> done."
+)
+
+
+def split_deltas(text: str, seed: int) -> list[str]:
+    # Random split points, so that tags get split across deltas
+    rng = random.Random(seed)
+    deltas, start = [], 0
+    while start < len(text):
+        end = start + rng.randint(1, 6)
+        deltas.append(text[start:end])
+        start = end
+    return deltas
+
+
+def replay(deltas: list[str], incremental: bool) -> tuple[list[dict], list[str]]:
+    parser = ContentTagParser(incremental=incremental)
+    serializer = ContentBlockSerializer()
+
+    content = ""
+    content_blocks = [{"type": "text", "content": ""}]
+    serialized = []
+    for value in deltas:
+        content = f"{content}{value}"
+        content_blocks[-1]["content"] = content_blocks[-1]["content"] + value
+
+        content, content_blocks, _ = parser.handle(
+            "reasoning", REASONING_TAGS, content, content_blocks
+        )
+        content, content_blocks, _ = parser.handle(
+            "solution", SOLUTION_TAGS, content, content_blocks
+        )
+
+        output = serializer.serialize(content_blocks)
+        assert output == serialize_content_blocks(content_blocks)
+        serialized.append(output)
+    return content_blocks, serialized
+
+
+def strip_timing(blocks: list[dict]) -> list[dict]:
+    return [
+        {
+            key: value
+            for key, value in block.items()
+            if key not in ("started_at", "ended_at", "duration")
+        }
+        for block in blocks
+    ]
+
+
+def strip_durations(content: str) -> str:
+    return re.sub(r"\d+ second|duration=\"\d+\"", "", content)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_parser_matches_full_parser(seed):
+    deltas = split_deltas(RESPONSE, seed)
+    incremental_blocks, incremental_serialized = replay(deltas, incremental=True)
+    full_blocks, full_serialized = replay(deltas, incremental=False)
+
+    assert strip_timing(incremental_blocks) == strip_timing(full_blocks)
+    # Reasoning durations depend on wall time, compare everything else
+    assert [strip_durations(output) for output in incremental_serialized] == [
+        strip_durations(output) for output in full_serialized
+    ]
+
+
+def test_parser_splits_blocks():
+    blocks, _ = replay(split_deltas(RESPONSE, 0), incremental=True)
+    assert [block["type"] for block in blocks] == [
+        "text",
+        "reasoning",
+        "text",
+        "reasoning",
+        "solution",
+        "text",
+    ]
+    assert blocks[1]["content"] == "First thought\nsecond <b>line</b>"
+    assert blocks[3]["attributes"] == {"duration": "3"}
+    assert blocks[4]["content"] == "42"
+
+
+def test_serializer_restarts_when_blocks_change():
+    serializer = ContentBlockSerializer()
+    blocks = [
+        {"type": "text", "content": "one"},
+        {"type": "text", "content": "two"},
+    ]
+    assert serializer.serialize(blocks) == serialize_content_blocks(blocks)
+
+    blocks = [{"type": "text", "content": "three"}, blocks[1]]
+    assert serializer.serialize(blocks) == serialize_content_blocks(blocks)
+    assert serializer.serialize([]) == ""
@@ -0,0 +1,118 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from open_webui.utils.http_sessions import ClientSessionRegistry, ResponseStream
+
+
+async def start_server():
+    async def ok(request):
+        return web.json_response({"ok": True})
+
+    async def stream(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for idx in range(100):
+            await response.write(f"line {idx}\n".encode())
+            await asyncio.sleep(0.01)
+        return response
+
+    async def broken(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b"line 0\n")
+        await asyncio.sleep(0.05)
+        request.transport.close()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/ok", ok)
+    app.router.add_get("/stream", stream)
+    app.router.add_get("/broken", broken)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def run(test):
+    async def main():
+        runner, base_url = await start_server()
+        registry = ClientSessionRegistry(limit=1)
+        try:
+            await asyncio.wait_for(test(registry, base_url), timeout=10)
+        finally:
+            await registry.close()
+            await runner.cleanup()
+
+    asyncio.run(main())
+
+
+def test_sessions_are_shared_per_upstream():
+    async def test(registry, base_url):
+        session = registry.get_session(f"{base_url}/ok")
+        assert registry.get_session(f"{base_url}/other?x=1") is session
+        assert registry.get_session("http://other:1234/ok") is not session
+
+        for _ in range(3):
+            async with session.get(f"{base_url}/ok") as response:
+                assert await response.json() == {"ok": True}
+
+        stats = registry.get_stats()[base_url]
+        assert stats["requests"] == 3
+        assert stats["connections_created"] == 1
+        assert stats["connections_reused"] == 2
+
+        await registry.close()
+        assert registry.get_session(base_url) is not session
+
+    run(test)
+
+
+@pytest.mark.parametrize(
+    "ending", ["complete", "upstream_error", "cancel", "background"]
+)
+def test_response_stream_releases_its_connection(ending):
+    async def test(registry, base_url):
+        session = registry.get_session(base_url)
+        response = await session.get(
+            f"{base_url}/{'broken' if ending == 'upstream_error' else 'stream'}"
+        )
+        stream = ResponseStream(response)
+
+        async def consume():
+            async for chunk in stream:
+                pass
+
+        if ending == "complete":
+            await consume()
+        elif ending == "upstream_error":
+            with pytest.raises(aiohttp.ClientPayloadError):
+                await consume()
+        elif ending == "cancel":
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        else:
+            # Not read to the end, e.g. the client went away: released by the
+            # background task of the StreamingResponse
+            async for chunk in stream:
+                break
+            await stream.release()
+
+        assert stream.released
+        await stream.release()
+
+        # The pool holds a single connection, so this only completes if the
+        # stream gave it back
+        async with session.get(f"{base_url}/ok") as response:
+            assert await response.json() == {"ok": True}
+
+    run(test)
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from open_webui.utils import load_balancer
+from open_webui.utils.load_balancer import UpstreamLoadBalancer, UpstreamResponseStream
+
+URLS = ["http://a:11434/api/chat", "http://b:11434/api/chat", "http://c:11434/api/chat"]
+
+
+class MockContent:
+    def __init__(self, lines: list[bytes], error: Exception = None):
+        self.lines = lines
+        self.error = error
+
+    async def __aiter__(self):
+        for line in self.lines:
+            await asyncio.sleep(0)
+            yield line
+        if self.error:
+            raise self.error
+
+
+class MockResponse:
+    def __init__(self, content: MockContent):
+        self.content = content
+        self.releases = 0
+
+    def release(self):
+        self.releases += 1
+
+
+@pytest.fixture
+def balancer(monkeypatch):
+    balancer = UpstreamLoadBalancer(
+        strategy="least_requests", max_failures=2, ejection_time=60
+    )
+    monkeypatch.setattr(load_balancer, "UPSTREAM_BALANCER", balancer)
+    return balancer
+
+
+def test_least_requests(balancer):
+    balancer.on_request_start(URLS[0])
+    balancer.on_request_start(URLS[0])
+    balancer.on_request_start(URLS[1])
+    assert balancer.select(URLS) == 2
+
+    balancer.on_request_start(URLS[2])
+    balancer.on_request_start(URLS[2])
+    assert balancer.select(URLS) == 1
+
+    balancer.on_request_end(URLS[0])
+    balancer.on_request_end(URLS[0])
+    assert balancer.select(URLS) == 0
+
+
+def test_ewma(balancer):
+    balancer.strategy = "ewma"
+    balancer.on_response(URLS[0], 2.0, success=True)
+    balancer.on_response(URLS[1], 0.5, success=True)
+    balancer.on_response(URLS[2], 1.0, success=True)
+    assert balancer.select(URLS) == 1
+
+    # Weighted by the requests in flight
+    balancer.on_request_start(URLS[1])
+    balancer.on_request_start(URLS[1])
+    assert balancer.select(URLS) == 2
+
+
+def test_failing_upstreams_are_ejected(balancer):
+    balancer.on_response(URLS[0], None, success=False)
+    balancer.on_response(URLS[0], None, success=False)
+    balancer.on_request_start(URLS[1])
+    balancer.on_request_start(URLS[2])
+    assert all(balancer.select(URLS) != 0 for _ in range(20))
+    assert balancer.get_stats()["upstreams"]["http://a:11434"]["ejected"]
+
+    # Fails open when every candidate is ejected
+    assert balancer.select(URLS[:1]) == 0
+    for url in URLS[1:]:
+        balancer.on_response(url, None, success=False)
+        balancer.on_response(url, None, success=False)
+    assert balancer.select(URLS) in range(3)
+
+
+def test_single_url():
+    assert UpstreamLoadBalancer().select(URLS[:1]) == 0
+
+
+@pytest.mark.parametrize("ending", ["complete", "upstream_error", "cancel"])
+def test_stream_releases_in_flight_slot(balancer, ending):
+    async def test():
+        response = MockResponse(
+            MockContent(
+                [b"a\n", b"b\n"] * 50,
+                error=ConnectionError() if ending == "upstream_error" else None,
+            )
+        )
+        balancer.on_request_start(URLS[0])
+        stream = UpstreamResponseStream(URLS[0], response)
+
+        async def consume():
+            async for line in stream:
+                if ending == "cancel":
+                    await asyncio.sleep(1)
+
+        task = asyncio.create_task(consume())
+        if ending == "complete":
+            await task
+        elif ending == "upstream_error":
+            with pytest.raises(ConnectionError):
+                await task
+        else:
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        # The background task of the StreamingResponse releases it again
+        await stream.release()
+        assert response.releases == 1
+
+    balancer.on_request_start(URLS[1])
+    asyncio.run(test())
+    stats = balancer.get_stats()["upstreams"]
+    assert stats["http://a:11434"]["in_flight"] == 0
+    assert stats["http://b:11434"]["in_flight"] == 1
@@ -0,0 +1,99 @@
+import asyncio
+from types import SimpleNamespace
+
+from open_webui.utils.model_catalog import ModelCatalog
+
+
+class MockRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        return True
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+def make_catalog(redis=None) -> ModelCatalog:
+    catalog = ModelCatalog(ttl=60)
+    catalog.redis = redis
+    return catalog
+
+
+def test_concurrent_cold_requests_share_one_fetch():
+    catalog = make_catalog()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [{"id": "a"}]
+
+    async def main():
+        return await asyncio.gather(
+            *[catalog.get_models(fetch, build=lambda models: models) for _ in range(5)]
+        )
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result == [{"id": "a"}] for result in results)
+
+
+def test_shared_base_models_restore_model_maps():
+    redis = MockRedis()
+    calls = []
+
+    async def fetch_into(state):
+        calls.append(1)
+        state.OLLAMA_MODELS = {"llama3:latest": {"model": "llama3:latest", "urls": [0]}}
+        state.OPENAI_MODELS = {"gpt-4o": {"id": "gpt-4o", "urls": [1]}}
+        return [{"id": "llama3:latest"}, {"id": "gpt-4o"}]
+
+    state = SimpleNamespace(OLLAMA_MODELS={}, OPENAI_MODELS={})
+    models = asyncio.run(
+        make_catalog(redis).get_models(
+            lambda: fetch_into(state), build=lambda models: models, state=state
+        )
+    )
+    assert len(models) == 2
+
+    # Another worker serves the shared catalog without fetching it, and still
+    # knows which connection serves each model
+    other_state = SimpleNamespace(OLLAMA_MODELS={}, OPENAI_MODELS={})
+    models = asyncio.run(
+        make_catalog(redis).get_models(
+            lambda: fetch_into(other_state),
+            build=lambda models: models,
+            state=other_state,
+        )
+    )
+    assert len(models) == 2
+    assert len(calls) == 1
+    assert other_state.OLLAMA_MODELS == state.OLLAMA_MODELS
+    assert other_state.OPENAI_MODELS == state.OPENAI_MODELS
+
+
+def test_invalidate_base_models_refetches():
+    catalog = make_catalog()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return [{"id": str(len(calls))}]
+
+    assert asyncio.run(catalog.get_models(fetch, build=lambda m: m)) == [{"id": "1"}]
+    assert asyncio.run(catalog.get_models(fetch, build=lambda m: m)) == [{"id": "1"}]
+
+    catalog.invalidate(base_models=True)
+    assert asyncio.run(catalog.get_models(fetch, build=lambda m: m)) == [{"id": "2"}]
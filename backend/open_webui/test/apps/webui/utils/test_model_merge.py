@@ -0,0 +1,84 @@
+from open_webui.models.models import ModelModel
+from open_webui.utils.models import merge_custom_models
+
+
+def custom_model(id, base_model_id=None, is_active=True, **meta) -> ModelModel:
+    return ModelModel(
+        id=id,
+        user_id="1",
+        base_model_id=base_model_id,
+        name=f"Custom {id}",
+        params={},
+        meta=meta,
+        is_active=is_active,
+        updated_at=0,
+        created_at=0,
+    )
+
+
+def base_models() -> list[dict]:
+    return [
+        {"id": "gpt-4o", "name": "gpt-4o", "owned_by": "openai"},
+        {"id": "llama3:8b", "name": "llama3:8b", "owned_by": "ollama"},
+        {"id": "llama3:70b", "name": "llama3:70b", "owned_by": "ollama"},
+        {"id": "mistral", "name": "mistral", "owned_by": "openai"},
+        {
+            "id": "pipe.model",
+            "name": "pipe",
+            "owned_by": "openai",
+            "pipe": {"type": "pipe"},
+        },
+    ]
+
+
+def test_overrides_rename_and_hide_base_models():
+    models = merge_custom_models(
+        base_models(),
+        [
+            custom_model("gpt-4o", actionIds=["action"]),
+            # Matches every Ollama tag of the model
+            custom_model("llama3"),
+            custom_model("mistral", is_active=False),
+        ],
+    )
+
+    by_id = {model["id"]: model for model in models}
+    assert list(by_id) == ["gpt-4o", "llama3:8b", "llama3:70b", "pipe.model"]
+    assert by_id["gpt-4o"]["name"] == "Custom gpt-4o"
+    assert by_id["gpt-4o"]["action_ids"] == ["action"]
+    assert by_id["llama3:8b"]["name"] == by_id["llama3:70b"]["name"] == "Custom llama3"
+
+
+def test_presets_take_owner_and_pipe_of_their_base_model():
+    models = merge_custom_models(
+        base_models(),
+        [
+            custom_model("assistant", base_model_id="llama3", filterIds=["filter"]),
+            custom_model("piped", base_model_id="pipe.model"),
+            custom_model("orphan", base_model_id="missing"),
+            custom_model("inactive", base_model_id="gpt-4o", is_active=False),
+            # Presets are not added twice, nor over a base model
+            custom_model("assistant", base_model_id="gpt-4o"),
+            custom_model("gpt-4o", base_model_id="mistral"),
+        ],
+    )
+
+    presets = {model["id"]: model for model in models if model.get("preset")}
+    assert list(presets) == ["assistant", "piped", "orphan"]
+    assert presets["assistant"]["owned_by"] == "ollama"
+    assert presets["assistant"]["filter_ids"] == ["filter"]
+    assert presets["piped"]["pipe"] == {"type": "pipe"}
+    assert presets["orphan"]["owned_by"] == "openai"
+    assert "pipe" not in presets["orphan"]
+    assert len(models) == len(base_models()) + 3
+
+
+def test_presets_can_be_overridden_and_hidden():
+    models = merge_custom_models(
+        base_models(),
+        [
+            custom_model("assistant", base_model_id="gpt-4o"),
+            custom_model("assistant", is_active=False),
+        ],
+    )
+    assert "assistant" not in [model["id"] for model in models]
@@ -0,0 +1,118 @@
+"""
+Replays a 20k-token streamed response through the content block tag handler and
+serializer, once with the code replaced by utils/content_blocks.py (kept in
+legacy_content_blocks.py) and once with the incremental parser/serializer, and
+reports CPU time per token.
+
+    python -m open_webui.test.benchmarks.bench_content_blocks [--tokens 20000]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from open_webui.utils.content_blocks import (
+    ContentBlockSerializer,
+    ContentTagParser,
+    serialize_content_blocks,
+)
+from open_webui.test.benchmarks.legacy_content_blocks import (
+    legacy_serialize_content_blocks,
+    legacy_tag_content_handler,
+)
+
+REASONING_TAGS = [
+    ("think", "/think"),
+    ("thinking", "/thinking"),
+    ("reason", "/reason"),
+    ("reasoning", "/reasoning"),
+    ("thought", "/thought"),
+    ("Thought", "/Thought"),
+    ("|begin_of_thought|", "|end_of_thought|"),
+]
+SOLUTION_TAGS = [("|begin_of_solution|", "|end_of_solution|")]
+
+WORDS = (
+    "the model considers a few options before answering and then writes "
+    "a careful explanation with `code`, lists, > quotes and **markdown** "
+).split()
+
+
+def generate_stream(tokens: int, seed: int = 0) -> list[str]:
+    """A reasoning model response: ~60% of the tokens inside <think>...</think>."""
+    rng = random.Random(seed)
+
+    def words(count):
+        deltas = []
+        for idx in range(count):
+            delta = f" {rng.choice(WORDS)}"
+            if idx % 17 == 16:
+                delta += "\n"
+            deltas.append(delta)
+        return deltas
+
+    reasoning = int(tokens * 0.6)
+    return [
+        "<th",
+        "ink>\n",
+        *words(reasoning),
+        "\n</thi",
+        "nk>\n\n",
+        *words(tokens - reasoning - 4),
+    ]
+
+
+def replay(deltas: list[str], legacy: bool) -> tuple[float, str]:
+    if legacy:
+        handle = legacy_tag_content_handler
+        serialize = legacy_serialize_content_blocks
+    else:
+        handle = ContentTagParser().handle
+        serialize = ContentBlockSerializer().serialize
+
+    content = ""
+    content_blocks = [{"type": "text", "content": ""}]
+    serialized = ""
+
+    start = time.process_time()
+    for value in deltas:
+        content = f"{content}{value}"
+        content_blocks[-1]["content"] = content_blocks[-1]["content"] + value
+
+        content, content_blocks, _ = handle(
+            "reasoning", REASONING_TAGS, content, content_blocks
+        )
+        content, content_blocks, _ = handle(
+            "solution", SOLUTION_TAGS, content, content_blocks
+        )
+
+        serialized = serialize(content_blocks)
+    elapsed = time.process_time() - start
+
+    assert serialized == serialize_content_blocks(content_blocks)
+    return elapsed, serialized
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=20000)
+    args = parser.parse_args()
+
+    deltas = generate_stream(args.tokens)
+
+    before, before_content = replay(deltas, legacy=True)
+    after, after_content = replay(deltas, legacy=False)
+    # Reasoning durations depend on wall time, compare everything else
+    assert re.sub(r"\d+ second|duration=\"\d+\"", "", before_content) == re.sub(
+        r"\d+ second|duration=\"\d+\"", "", after_content
+    ), "serialized output differs"
+
+    print(f"tokens: {len(deltas)}")
+    print(f"previous:     {before:.3f}s ({before / len(deltas) * 1e6:.1f}us/token)")
+    print(f"incremental:  {after:.3f}s ({after / len(deltas) * 1e6:.1f}us/token)")
+    print(f"speedup:      {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
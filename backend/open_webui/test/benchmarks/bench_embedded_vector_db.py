@@ -0,0 +1,104 @@
+"""
+Measures recall@k and search latency of the embedded vector store on a
+synthetic collection of clustered embeddings: exact search over float32 and
+float16 segments and, when hnswlib is installed, the HNSW graph with several
+ef_search. Recall is against the exact top k computed with NumPy.
+
+Runs without any service, in a temporary directory:
+
+    python -m open_webui.test.benchmarks.bench_embedded_vector_db [--chunks 100000] [--dimensions 384] [--queries 200] [--k 10]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from open_webui.retrieval.vector.dbs import embedded
+from open_webui.retrieval.vector.dbs.embedded import EmbeddedClient
+
+
+def generate_vectors(
+    rng: np.random.Generator, count: int, centers: np.ndarray
+) -> np.ndarray:
+    # Embeddings cluster by topic: noisy copies of a few hundred centers
+    vectors = centers[rng.integers(len(centers), size=count)]
+    vectors = vectors + rng.normal(scale=0.5, size=vectors.shape).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(256, args.dimensions)).astype(np.float32)
+    vectors = generate_vectors(rng, args.chunks, centers)
+    queries = generate_vectors(rng, args.queries, centers)
+
+    # Exact top k by cosine similarity
+    truth = []
+    for start in range(0, len(queries), 50):
+        scores = queries[start : start + 50] @ vectors.T
+        truth.extend(np.argsort(-scores, axis=1)[:, : args.k])
+
+    ids = [str(idx) for idx in range(args.chunks)]
+    items = [
+        {"id": id, "text": id, "vector": vector, "metadata": {}}
+        for id, vector in zip(ids, vectors)
+    ]
+
+    def run(name: str, client: EmbeddedClient):
+        hits = 0
+        latencies = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = client.search("bench", [query.tolist()], args.k)
+            latencies.append(time.perf_counter() - start)
+            hits += len(set(result.ids[0]) & {ids[idx] for idx in expected})
+
+        latencies = np.array(latencies) * 1000
+        print(
+            f"{name:<24} recall@{args.k}: {hits / (len(queries) * args.k):.3f}  "
+            f"p50: {np.percentile(latencies, 50):6.2f}ms  "
+            f"p95: {np.percentile(latencies, 95):6.2f}ms"
+        )
+
+    def build(dtype: str, graph: bool) -> EmbeddedClient:
+        embedded.ENABLE_EMBEDDED_VECTOR_DB_HNSW = graph
+        embedded.EMBEDDED_VECTOR_DB_HNSW_MIN_SIZE = 0
+        client = EmbeddedClient(tempfile.mkdtemp(), dtype)
+
+        start = time.perf_counter()
+        client.insert("bench", items)
+        print(f"{dtype} inserted in {time.perf_counter() - start:.1f}s")
+        return client
+
+    print(f"{args.chunks} chunks, {args.dimensions} dimensions, {args.queries} queries")
+    for dtype in ("float32", "float16"):
+        client = build(dtype, graph=False)
+        try:
+            run(f"  exact {dtype}", client)
+        finally:
+            client.reset()
+
+    if embedded.hnswlib is None:
+        print("hnswlib is not installed, skipping HNSW")
+        return
+
+    client = build("float32", graph=True)
+    try:
+        for ef_search in (0, 100, 200):
+            embedded.EMBEDDED_VECTOR_DB_HNSW_EF_SEARCH = ef_search
+            run(f"  hnsw ef_search={ef_search or 'max(40, k)'}", client)
+    finally:
+        client.reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Ingests 200 mixed documents (text, markdown, source code, CSV, HTML, PDF) with
+the local content extraction engine, once file after file as
+`process_files_batch` used to and once with the staged
+`FileProcessingPipeline`, and reports the time. Embedding is simulated with a
+fixed per-request latency standing in for a remote embedding engine.
+
+    python -m open_webui.test.benchmarks.bench_ingestion_pipeline [--files 200] [--workers 4] [--latency 0.05]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import time
+
+from open_webui.retrieval.pipeline import FileProcessingPipeline, parse_file
+
+WORDS = (
+    "retrieval augmented generation embeds documents into vectors and searches "
+    "them by similarity before the language model answers the question with "
+    "the most relevant chunks of every knowledge base attached to the chat"
+).split()
+
+
+def generate_text(rng: random.Random, paragraphs: int) -> list[str]:
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) + "."
+        for _ in range(paragraphs)
+    ]
+
+
+def write_pdf(path: str, pages: list[str]):
+    # Minimal PDF with one Helvetica text line per page
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, None]
+    objects[2] = "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    kids = []
+    for text in pages:
+        text = text.replace("(", "").replace(")", "")
+        stream = f"BT /F1 8 Tf 20 800 Td ({text[:1000]}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    content = "%PDF-1.4\n"
+    offsets = []
+    for idx, obj in enumerate(objects):
+        offsets.append(len(content))
+        content += f"{idx + 1} 0 obj\n{obj}\nendobj\n"
+    xref = len(content)
+    content += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    content += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    content += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+
+    with open(path, "w", encoding="latin-1") as f:
+        f.write(content)
+
+
+def generate_files(directory: str, count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    kinds = ["txt", "md", "py", "csv", "html", "pdf"]
+
+    tasks = []
+    for idx in range(count):
+        kind = kinds[idx % len(kinds)]
+        filename = f"doc-{idx}.{kind}"
+        path = os.path.join(directory, filename)
+        paragraphs = generate_text(rng, rng.randint(5, 40))
+
+        if kind == "pdf":
+            write_pdf(path, paragraphs)
+        else:
+            with open(path, "w") as f:
+                if kind == "md":
+                    f.write(
+                        "\n\n".join(
+                            f"## Section {i}\n\n{p}" for i, p in enumerate(paragraphs)
+                        )
+                    )
+                elif kind == "py":
+                    f.write(
+                        "\n\n".join(
+                            f'def f{i}():\n    """{p}"""\n    return {i}\n'
+                            for i, p in enumerate(paragraphs)
+                        )
+                    )
+                elif kind == "csv":
+                    f.write("id,text\n")
+                    f.write("\n".join(f'{i},"{p}"' for i, p in enumerate(paragraphs)))
+                elif kind == "html":
+                    f.write(
+                        "<html><body>"
+                        + "".join(f"<p>{p}</p>" for p in paragraphs)
+                        + "</body></html>"
+                    )
+                else:
+                    f.write("\n\n".join(paragraphs))
+
+        tasks.append(
+            {
+                "filename": filename,
+                "content_type": None,
+                "file_path": path,
+                "content": None,
+                "metadata": {"name": filename, "file_id": str(idx), "source": filename},
+            }
+        )
+    return tasks
+
+
+def get_embed(latency: float, dimensions: int = 384):
+    def embed(docs) -> list:
+        # One request per file, like a remote embedding engine
+        time.sleep(latency)
+        return [
+            [b / 255 for b in hashlib.sha256(doc.page_content.encode()).digest()]
+            * (dimensions // 32)
+            for doc in docs
+        ]
+
+    return embed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=min(os.cpu_count() or 1, 4))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    loader_config = {"engine": "", "PDF_EXTRACT_IMAGES": False}
+    splitter_config = {
+        "text_splitter": "character",
+        "chunk_size": 1000,
+        "chunk_overlap": 100,
+        "encoding_name": "cl100k_base",
+    }
+    embed = get_embed(args.latency)
+
+    with tempfile.TemporaryDirectory() as directory:
+        tasks = generate_files(directory, args.files)
+
+        start = time.perf_counter()
+        sequential_chunks = 0
+        for task in tasks:
+            _, docs = parse_file(task, loader_config, splitter_config)
+            sequential_chunks += len(embed(docs))
+        sequential = time.perf_counter() - start
+
+        pipeline = FileProcessingPipeline(
+            workers=args.workers, concurrency=args.concurrency
+        )
+        # Worker start-up is paid once per server process, not per batch
+        pipeline.run(tasks[:1], loader_config, splitter_config, embed)
+
+        start = time.perf_counter()
+        results = pipeline.run(tasks, loader_config, splitter_config, embed)
+        pipelined = time.perf_counter() - start
+        pipeline.shutdown()
+
+    errors = [result["error"] for result in results if "error" in result]
+    pipeline_chunks = sum(len(r["embeddings"]) for r in results if "error" not in r)
+    assert not errors, errors
+    assert pipeline_chunks == sequential_chunks
+
+    print(
+        f"{args.files} files, {sequential_chunks} chunks, "
+        f"{args.workers} workers, {args.latency * 1000:.0f}ms embedding latency"
+    )
+    print(f"sequential: {sequential:.2f}s")
+    print(f"pipeline:   {pipelined:.2f}s ({sequential / pipelined:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
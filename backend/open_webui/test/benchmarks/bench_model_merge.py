@@ -0,0 +1,164 @@
+"""
+Merges 2k custom models into 5k base models, once with the previous nested-scan
+merge and once with the indexed `merge_custom_models`, and reports the time.
+
+    python -m open_webui.test.benchmarks.bench_model_merge [--base 5000] [--custom 2000]
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from open_webui.utils.models import merge_custom_models
+
+
+@dataclass
+class Meta:
+    actionIds: list = field(default_factory=list)
+    filterIds: list = field(default_factory=list)
+
+    def model_dump(self):
+        return {"actionIds": self.actionIds, "filterIds": self.filterIds}
+
+
+@dataclass
+class CustomModel:
+    id: str
+    name: str
+    base_model_id: Optional[str]
+    is_active: bool
+    meta: Meta
+    created_at: int = 0
+
+    def model_dump(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "base_model_id": self.base_model_id,
+            "is_active": self.is_active,
+            "meta": self.meta.model_dump(),
+        }
+
+
+def generate_models(base: int, custom: int, seed: int = 0):
+    rng = random.Random(seed)
+
+    base_models = []
+    for idx in range(base):
+        if idx % 2:
+            base_models.append(
+                {"id": f"model-{idx}:{rng.choice(['7b', '13b'])}", "owned_by": "ollama"}
+            )
+        else:
+            base_models.append({"id": f"gpt-{idx}", "owned_by": "openai"})
+
+    custom_models = []
+    for idx in range(custom):
+        base_model = rng.choice(base_models)["id"]
+        if idx % 4 == 0:
+            # Override of a base model, occasionally hiding it
+            custom_models.append(
+                CustomModel(
+                    id=base_model.split(":")[0],
+                    name=f"Custom {idx}",
+                    base_model_id=None,
+                    is_active=idx % 16 != 0,
+                    meta=Meta(actionIds=["action"]),
+                )
+            )
+        else:
+            custom_models.append(
+                CustomModel(
+                    id=f"preset-{idx}",
+                    name=f"Preset {idx}",
+                    base_model_id=base_model,
+                    is_active=True,
+                    meta=Meta(filterIds=["filter"]),
+                )
+            )
+
+    return base_models, custom_models
+
+
+def merge_custom_models_nested(models: list[dict], custom_models: list) -> list[dict]:
+    """The previous merge: a full scan of the models per custom model."""
+    for custom_model in custom_models:
+        if custom_model.base_model_id is None:
+            for model in list(models):
+                if custom_model.id == model["id"] or (
+                    model.get("owned_by") == "ollama"
+                    and custom_model.id == model["id"].split(":")[0]
+                ):
+                    if custom_model.is_active:
+                        model["name"] = custom_model.name
+                        model["info"] = custom_model.model_dump()
+                        model["action_ids"] = model["info"]["meta"].get("actionIds", [])
+                        model["filter_ids"] = model["info"]["meta"].get("filterIds", [])
+                    else:
+                        models.remove(model)
+
+        elif custom_model.is_active and (
+            custom_model.id not in [model["id"] for model in models]
+        ):
+            owned_by = "openai"
+            pipe = None
+
+            for model in models:
+                if (
+                    custom_model.base_model_id == model["id"]
+                    or custom_model.base_model_id == model["id"].split(":")[0]
+                ):
+                    owned_by = model.get("owned_by", "unknown owner")
+                    if "pipe" in model:
+                        pipe = model["pipe"]
+                    break
+
+            meta = custom_model.meta.model_dump()
+            models.append(
+                {
+                    "id": f"{custom_model.id}",
+                    "name": custom_model.name,
+                    "object": "model",
+                    "created": custom_model.created_at,
+                    "owned_by": owned_by,
+                    "info": custom_model.model_dump(),
+                    "preset": True,
+                    **({"pipe": pipe} if pipe is not None else {}),
+                    "action_ids": meta["actionIds"],
+                    "filter_ids": meta["filterIds"],
+                }
+            )
+
+    return models
+
+
+def run(merge, base_models, custom_models) -> tuple[float, list[dict]]:
+    models = [{**model} for model in base_models]
+
+    start = time.perf_counter()
+    models = merge(models, custom_models)
+    return time.perf_counter() - start, models
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base", type=int, default=5000)
+    parser.add_argument("--custom", type=int, default=2000)
+    args = parser.parse_args()
+
+    base_models, custom_models = generate_models(args.base, args.custom)
+
+    before, before_models = run(merge_custom_models_nested, base_models, custom_models)
+    after, after_models = run(merge_custom_models, base_models, custom_models)
+    assert before_models == after_models, "merged models differ"
+
+    print(f"base models: {len(base_models)}, custom models: {len(custom_models)}")
+    print(f"nested scan: {before * 1000:.1f}ms")
+    print(f"indexed:     {after * 1000:.1f}ms")
+    print(f"speedup:     {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Measures recall@k and search latency of the pgvector index strategies on a
+synthetic collection of clustered embeddings: ivfflat with derived lists
+and several probes, HNSW with several ef_search, each with and without the
+halfvec index. Recall is against the exact top k computed with NumPy.
+
+Needs a local Postgres database with the vector extension; the benchmark
+rebuilds the document_chunk vector index, so use a scratch database:
+
+    PGVECTOR_DB_URL=postgresql://... python -m open_webui.test.benchmarks.bench_pgvector_index [--chunks 100000] [--queries 200] [--k 10]
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from open_webui.retrieval.vector.dbs import pgvector
+from open_webui.retrieval.vector.dbs.pgvector import VECTOR_LENGTH, PgvectorClient
+
+
+def generate_vectors(
+    rng: np.random.Generator, count: int, centers: np.ndarray
+) -> np.ndarray:
+    # Embeddings cluster by topic: noisy copies of a few hundred centers
+    vectors = centers[rng.integers(len(centers), size=count)]
+    vectors = vectors + rng.normal(scale=0.5, size=vectors.shape).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(256, VECTOR_LENGTH)).astype(np.float32)
+    vectors = generate_vectors(rng, args.chunks, centers)
+    queries = generate_vectors(rng, args.queries, centers)
+
+    # Exact top k by cosine similarity
+    truth = []
+    for start in range(0, len(queries), 50):
+        scores = queries[start : start + 50] @ vectors.T
+        truth.extend(np.argsort(-scores, axis=1)[:, : args.k])
+
+    client = PgvectorClient()
+    collection_name = f"bench-{uuid.uuid4().hex}"
+    ids = [str(idx) for idx in range(args.chunks)]
+    client.insert(
+        collection_name,
+        [
+            {"id": id, "text": id, "vector": vector, "metadata": {}}
+            for id, vector in zip(ids, vectors)
+        ],
+    )
+
+    def run(name: str):
+        hits = 0
+        latencies = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = client.search(collection_name, [query.tolist()], args.k)
+            latencies.append(time.perf_counter() - start)
+            hits += len(set(result.ids[0]) & {ids[idx] for idx in expected})
+
+        latencies = np.array(latencies) * 1000
+        print(
+            f"{name:<36} recall@{args.k}: {hits / (len(queries) * args.k):.3f}  "
+            f"p50: {np.percentile(latencies, 50):6.1f}ms  "
+            f"p95: {np.percentile(latencies, 95):6.1f}ms"
+        )
+
+    print(f"{args.chunks} chunks, {VECTOR_LENGTH} dimensions, {args.queries} queries")
+    try:
+        for halfvec in (False, True):
+            pgvector.PGVECTOR_INDEX_HALFVEC = halfvec
+            suffix = " halfvec" if halfvec else ""
+
+            pgvector.PGVECTOR_INDEX_TYPE = "ivfflat"
+            start = time.perf_counter()
+            client.reindex()
+            print(
+                f"ivfflat{suffix} (lists={client.ivfflat_lists}) "
+                f"built in {time.perf_counter() - start:.1f}s"
+            )
+            for probes in (1, 0, 4 * round(np.sqrt(client.ivfflat_lists))):
+                pgvector.PGVECTOR_IVFFLAT_PROBES = probes
+                run(f"  probes={probes or 'sqrt(lists)'}")
+
+            pgvector.PGVECTOR_INDEX_TYPE = "hnsw"
+            start = time.perf_counter()
+            client.reindex()
+            print(f"hnsw{suffix} built in {time.perf_counter() - start:.1f}s")
+            for ef_search in (0, 100, 200):
+                pgvector.PGVECTOR_HNSW_EF_SEARCH = ef_search
+                run(f"  ef_search={ef_search or 'max(40, k)'}")
+    finally:
+        client.delete_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
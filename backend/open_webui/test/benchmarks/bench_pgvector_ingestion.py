@@ -0,0 +1,133 @@
+"""
+Inserts and then upserts (re-indexing, every row conflicts) a knowledge base
+of 30k chunks into pgvector, with the previous ORM path (`bulk_save_objects`,
+one SELECT per upserted item) and with `PgvectorClient` using multi-row
+INSERT ... ON CONFLICT statements and binary COPY, and reports the time.
+
+Needs a Postgres database with the vector extension:
+
+    PGVECTOR_DB_URL=postgresql://... python -m open_webui.test.benchmarks.bench_pgvector_ingestion [--chunks 30000] [--batch-size 1000]
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from open_webui.retrieval.vector.dbs import pgvector
+from open_webui.retrieval.vector.dbs.pgvector import (
+    VECTOR_LENGTH,
+    DocumentChunk,
+    PgvectorClient,
+)
+
+
+def generate_items(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "text": f"chunk {idx} " + "lorem ipsum dolor sit amet " * 30,
+            "vector": [rng.uniform(-1, 1) for _ in range(VECTOR_LENGTH)],
+            "metadata": {"file_id": str(idx // 100), "name": f"doc-{idx // 100}.pdf"},
+        }
+        for idx in range(count)
+    ]
+
+
+def orm_insert(client: PgvectorClient, collection_name: str, items: list[dict]):
+    client.session.bulk_save_objects(
+        [
+            DocumentChunk(
+                id=item["id"],
+                vector=client.adjust_vector_length(list(item["vector"])),
+                collection_name=collection_name,
+                text=item["text"],
+                vmetadata=item["metadata"],
+            )
+            for item in items
+        ]
+    )
+    client.session.commit()
+
+
+def orm_upsert(client: PgvectorClient, collection_name: str, items: list[dict]):
+    for item in items:
+        vector = client.adjust_vector_length(list(item["vector"]))
+        existing = (
+            client.session.query(DocumentChunk)
+            .filter(DocumentChunk.id == item["id"])
+            .first()
+        )
+        if existing:
+            existing.vector = vector
+            existing.text = item["text"]
+            existing.vmetadata = item["metadata"]
+            existing.collection_name = collection_name
+        else:
+            client.session.add(
+                DocumentChunk(
+                    id=item["id"],
+                    vector=vector,
+                    collection_name=collection_name,
+                    text=item["text"],
+                    vmetadata=item["metadata"],
+                )
+            )
+    client.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=30000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    pgvector.PGVECTOR_INSERT_BATCH_SIZE = args.batch_size
+    client = PgvectorClient()
+    items = generate_items(args.chunks)
+
+    def run(name: str, insert, upsert):
+        collection_name = f"bench-{uuid.uuid4().hex}"
+        try:
+            start = time.perf_counter()
+            insert(client, collection_name, items)
+            inserted = time.perf_counter() - start
+
+            start = time.perf_counter()
+            upsert(client, collection_name, items)
+            upserted = time.perf_counter() - start
+
+            rows = (
+                client.session.query(DocumentChunk)
+                .filter_by(collection_name=collection_name)
+                .count()
+            )
+            assert rows == len(items)
+        finally:
+            client.delete_collection(collection_name)
+
+        print(f"{name:<8} insert: {inserted:6.2f}s  upsert: {upserted:6.2f}s")
+
+    def with_method(method: str):
+        def insert(client, collection_name, items):
+            pgvector.PGVECTOR_INSERT_METHOD = method
+            client.insert(collection_name, items)
+
+        def upsert(client, collection_name, items):
+            pgvector.PGVECTOR_INSERT_METHOD = method
+            client.upsert(collection_name, items)
+
+        return insert, upsert
+
+    print(
+        f"{args.chunks} chunks, {VECTOR_LENGTH} dimensions, "
+        f"batches of {args.batch_size} rows"
+    )
+    run("orm", orm_insert, orm_upsert)
+    run("values", *with_method("values"))
+    run("copy", *with_method("copy"))
+
+
+if __name__ == "__main__":
+    main()
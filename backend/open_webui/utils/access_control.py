@@ -4,7 +4,12 @@ from open_webui.models.groups import Groups
 
 
 from open_webui.config import DEFAULT_USER_PERMISSIONS
+from open_webui.env import USER_CACHE_TTL
 import json
+import time
+
+# (user_id, default permissions) -> (expires_at, groups version, permissions)
+PERMISSIONS_CACHE: Dict[tuple, tuple] = {}
 
 
 def fill_missing_permissions(
@@ -53,10 +58,20 @@ def get_permissions(
                     )  # Use the most permissive value (True > False)
         return permissions
 
+    # Serialized once: the cache key and the deep copy to build upon
+    serialized_default_permissions = json.dumps(default_permissions, sort_keys=True)
+
+    cache_key = (user_id, serialized_default_permissions)
+    groups_version = Groups.version if USER_CACHE_TTL > 0 else 0
+    if USER_CACHE_TTL > 0:
+        entry = PERMISSIONS_CACHE.get(cache_key)
+        if entry and entry[0] > time.monotonic() and entry[1] == groups_version:
+            return json.loads(entry[2])
+
     user_groups = Groups.get_groups_by_member_id(user_id)
 
     # Deep copy default permissions to avoid modifying the original dict
-    permissions = json.loads(json.dumps(default_permissions))
+    permissions = json.loads(serialized_default_permissions)
 
     # Combine permissions from all user groups
     for group in user_groups:
@@ -66,6 +81,15 @@ def get_permissions(
     # Ensure all fields from default_permissions are present and filled in
     permissions = fill_missing_permissions(permissions, default_permissions)
 
+    if USER_CACHE_TTL > 0:
+        if len(PERMISSIONS_CACHE) > 10000:
+            PERMISSIONS_CACHE.clear()
+        PERMISSIONS_CACHE[cache_key] = (
+            time.monotonic() + USER_CACHE_TTL,
+            groups_version,
+            json.dumps(permissions),
+        )
+
     return permissions
 
 
@@ -107,16 +131,25 @@ def has_permission(
     return get_permission(default_permissions, permission_hierarchy)
 
 
+def get_user_group_ids(user_id: str) -> set[str]:
+    return {group.id for group in Groups.get_groups_by_member_id(user_id)}
+
+
 def has_access(
     user_id: str,
     type: str = "write",
     access_control: Optional[dict] = None,
+    user_group_ids: Optional[set[str]] = None,
 ) -> bool:
+    """
+    Pass `user_group_ids` (see get_user_group_ids) when checking many resources
+    for the same user to avoid looking up the user's groups for each of them.
+    """
     if access_control is None:
         return type == "read"
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
-    user_group_ids = [group.id for group in user_groups]
+    if user_group_ids is None:
+        user_group_ids = get_user_group_ids(user_id)
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
     permitted_user_ids = permission_access.get("user_ids", [])
@@ -126,6 +159,35 @@ def has_access(
     )
 
 
+def filter_by_access(
+    user_id: str,
+    items: list,
+    type: str = "write",
+    get_access_control=lambda item: item.access_control,
+    get_owner_id=lambda item: item.user_id,
+) -> list:
+    """
+    Return the items owned by or accessible to the user, loading the user's
+    groups once for the whole list.
+    """
+    user_group_ids = None
+
+    filtered_items = []
+    for item in items:
+        if get_owner_id(item) == user_id:
+            filtered_items.append(item)
+            continue
+
+        access_control = get_access_control(item)
+        if access_control is not None and user_group_ids is None:
+            user_group_ids = get_user_group_ids(user_id)
+
+        if has_access(user_id, type, access_control, user_group_ids):
+            filtered_items.append(item)
+
+    return filtered_items
+
+
 # Get all users with access to a resource
 def get_users_with_access(
     type: str = "write", access_control: Optional[dict] = None
@@ -6,6 +6,7 @@ import hmac
 import hashlib
 import requests
 import os
+import time
 
 
 from datetime import datetime, timedelta
@@ -16,6 +17,7 @@ from typing import Optional, Union, List, Dict
 from opentelemetry import trace
 
 from open_webui.models.users import Users
+from open_webui.utils.cache import TTLCache
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import (
@@ -23,6 +25,7 @@ from open_webui.env import (
     TRUSTED_SIGNATURE_KEY,
     STATIC_DIR,
     SRC_LOG_LEVELS,
+    USER_LAST_ACTIVE_UPDATE_INTERVAL,
 )
 
 from fastapi import BackgroundTasks, Depends, HTTPException, Request, Response, status
@@ -36,6 +39,10 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["OAUTH"])
 
 SESSION_SECRET = WEBUI_SECRET_KEY
+
+# user_id -> time of the last last_active_at update issued by this worker; an
+# entry only matters for one interval, so it expires after it
+LAST_ACTIVE_UPDATES = TTLCache(max_size=10000, ttl=USER_LAST_ACTIVE_UPDATE_INTERVAL)
 ALGORITHM = "HS256"
 
 ##############
@@ -155,6 +162,17 @@ def get_http_authorization_cred(auth_header: Optional[str]):
         return None
 
 
+def should_update_last_active(user) -> bool:
+    """Throttle last_active_at writes to one per user per interval."""
+    now = time.time()
+    last_active_at = max(user.last_active_at or 0, LAST_ACTIVE_UPDATES.get(user.id, 0))
+    if now - last_active_at < USER_LAST_ACTIVE_UPDATE_INTERVAL:
+        return False
+
+    LAST_ACTIVE_UPDATES.set(user.id, now)
+    return True
+
+
 def get_current_user(
     request: Request,
     background_tasks: BackgroundTasks,
@@ -218,7 +236,7 @@ def get_current_user(
         )
 
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = Users.get_user_by_id(data["id"], cached=True)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -235,7 +253,7 @@ def get_current_user(
 
             # Refresh the user's last active timestamp asynchronously
             # to prevent blocking the request
-            if background_tasks:
+            if background_tasks and should_update_last_active(user):
                 background_tasks.add_task(Users.update_user_last_active_by_id, user.id)
         return user
     else:
@@ -262,7 +280,8 @@ def get_current_user_by_api_key(api_key: str):
             current_span.set_attribute("client.user.role", user.role)
             current_span.set_attribute("client.auth.type", "api_key")
 
-        Users.update_user_last_active_by_id(user.id)
+        if should_update_last_active(user):
+            Users.update_user_last_active_by_id(user.id)
 
     return user
 
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.redis import get_redis_connection
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class TTLCache:
+    """
+    Bounded in-process cache: least recently used entries are evicted beyond
+    `max_size`, and entries expire `ttl` seconds after they were set (never
+    with `ttl=None`). Safe to share between threads.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.entries: OrderedDict[Hashable, tuple[Optional[float], Any]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.entries[key]
+                return default
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            entry = self.entries.pop(key, None)
+        return entry[1] if entry is not None else default
+
+    def pop_matching(self, predicate: Callable[[Hashable], bool]):
+        """Remove the entries whose key matches `predicate`."""
+        with self.lock:
+            for key in [key for key in self.entries if predicate(key)]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class CacheGeneration:
+    """
+    Counter that invalidates per-worker caches: writers `bump` it and cached
+    entries remember the generation they were read at, so an entry from an older
+    generation is a miss. With Redis configured the counter is shared and a
+    write made by any worker invalidates the caches of all of them; `name`
+    scopes it (e.g. to a single user), otherwise there is one counter for the
+    whole process.
+    """
+
+    # Named counters are only compared against short-lived cache entries
+    NAMED_KEY_TTL = 24 * 60 * 60
+
+    def __init__(
+        self,
+        key: str,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = [],
+    ):
+        self.key = key
+        self.redis = (
+            get_redis_connection(redis_url, redis_sentinels, decode_responses=True)
+            if redis_url
+            else None
+        )
+        self.generation = 0
+
+    def get(self, name: Optional[str] = None) -> int:
+        if self.redis:
+            try:
+                return int(
+                    self.redis.get(f"{self.key}:{name}" if name else self.key) or 0
+                )
+            except Exception as e:
+                log.warning(f"Error reading cache generation {self.key}: {e}")
+        return self.generation
+
+    def bump(self, name: Optional[str] = None):
+        self.generation += 1
+        if self.redis:
+            try:
+                if name:
+                    key = f"{self.key}:{name}"
+                    self.redis.incr(key)
+                    self.redis.expire(key, self.NAMED_KEY_TTL)
+                else:
+                    self.redis.incr(self.key)
+            except Exception as e:
+                log.warning(f"Error bumping cache generation {self.key}: {e}")
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    CHAT_SAVE_BUFFER_FLUSH_INTERVAL,
+    CHAT_SAVE_BUFFER_MAX_UPDATES,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class ChatWriteBuffer:
+    """
+    Write-behind buffer for chat message updates.
+
+    Updates for the same (chat_id, message_id) are merged in memory and written
+    to the chat row in a single read-modify-write once the entry is older than
+    `flush_interval` seconds, has accumulated `max_updates` updates, or is
+    flushed explicitly (end of a stream, shutdown). The chat model flushes the
+    entries of a chat before reading or writing it, so reads see buffered
+    updates and direct writes land after them.
+
+    Entries live in the memory of one worker: a chat written through another
+    worker while updates are buffered here is overwritten by the next flush.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, max_updates: int = 50):
+        self.flush_interval = flush_interval
+        self.max_updates = max_updates
+
+        # (chat_id, message_id) -> {"message", "status_history", "updates", "created_at"}
+        self.entries: dict[tuple[str, str], dict] = {}
+        # Chats are flushed from request threads too; held while an entry is
+        # written so that no update is merged into an entry being written
+        self.lock = threading.RLock()
+        self.task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "updates": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "flush_latency_total": 0.0,
+            "flush_latency_max": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval > 0
+
+    def _get_entry(self, chat_id: str, message_id: str) -> dict:
+        key = (chat_id, message_id)
+        if key not in self.entries:
+            self.entries[key] = {
+                "message": {},
+                "status_history": [],
+                "updates": 0,
+                "created_at": time.monotonic(),
+            }
+        return self.entries[key]
+
+    async def _after_update(self, chat_id: str, message_id: str, entry: dict):
+        with self.lock:
+            entry["updates"] += 1
+            self.stats["updates"] += 1
+            updates = entry["updates"]
+
+        if not self.enabled or updates >= self.max_updates:
+            self.flush(chat_id, message_id)
+        else:
+            self.start()
+
+    async def upsert_message(self, chat_id: str, message_id: str, message: dict):
+        with self.lock:
+            entry = self._get_entry(chat_id, message_id)
+            entry["message"] = {**entry["message"], **message}
+        await self._after_update(chat_id, message_id, entry)
+
+    async def append_message_content(self, chat_id: str, message_id: str, content: str):
+        with self.lock:
+            entry = self._get_entry(chat_id, message_id)
+            if "content" not in entry["message"]:
+                # Writes the entry first, the content is read back after
+                message = Chats.get_message_by_id_and_message_id(chat_id, message_id)
+                if not message:
+                    # Nothing to append to, mirror the unbuffered behaviour
+                    entry = self.entries.get((chat_id, message_id))
+                    if entry and not entry["message"] and not entry["status_history"]:
+                        self.entries.pop((chat_id, message_id), None)
+                    return
+                entry = self._get_entry(chat_id, message_id)
+                entry["message"]["content"] = message.get("content", "")
+
+            entry["message"]["content"] += content
+        await self._after_update(chat_id, message_id, entry)
+
+    async def add_message_status(self, chat_id: str, message_id: str, status: dict):
+        with self.lock:
+            entry = self._get_entry(chat_id, message_id)
+            entry["status_history"].append(status)
+        await self._after_update(chat_id, message_id, entry)
+
+    def flush(self, chat_id: str, message_id: str) -> bool:
+        with self.lock:
+            # Pop before writing, the chat reads done by the write flush the
+            # chat's entries again
+            entry = self.entries.pop((chat_id, message_id), None)
+            if entry is None:
+                return True
+            return self._write(chat_id, message_id, entry)
+
+    def _write(self, chat_id: str, message_id: str, entry: dict) -> bool:
+        start = time.perf_counter()
+        try:
+            message = entry["message"]
+            if entry["status_history"]:
+                existing = Chats.get_message_by_id_and_message_id(chat_id, message_id)
+                if existing:
+                    message = {
+                        **message,
+                        "statusHistory": [
+                            *existing.get("statusHistory", []),
+                            *entry["status_history"],
+                        ],
+                    }
+
+            if message:
+                Chats.upsert_message_to_chat_by_id_and_message_id(
+                    chat_id, message_id, message
+                )
+            return True
+        except Exception as e:
+            self.stats["flush_errors"] += 1
+            log.exception(f"Error flushing message {message_id} of chat {chat_id}: {e}")
+            return False
+        finally:
+            latency = time.perf_counter() - start
+            self.stats["flushes"] += 1
+            self.stats["flush_latency_total"] += latency
+            self.stats["flush_latency_max"] = max(
+                self.stats["flush_latency_max"], latency
+            )
+
+    def flush_chats(self, chat_ids: list[str]) -> set[str]:
+        """Write the entries of `chat_ids`, return the ids of the chats written."""
+        chat_ids = set(chat_ids)
+        flushed = set()
+        with self.lock:
+            for key in [key for key in self.entries if key[0] in chat_ids]:
+                self.flush(*key)
+                flushed.add(key[0])
+        return flushed
+
+    def flush_all(self):
+        with self.lock:
+            for key in list(self.entries.keys()):
+                self.flush(*key)
+
+    def flush_expired(self):
+        now = time.monotonic()
+        with self.lock:
+            for key, entry in list(self.entries.items()):
+                if now - entry["created_at"] >= self.flush_interval:
+                    self.flush(*key)
+
+    async def periodic_flush(self):
+        try:
+            while self.entries:
+                await asyncio.sleep(self.flush_interval)
+                self.flush_expired()
+        finally:
+            self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.periodic_flush())
+
+    async def shutdown(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+        self.flush_all()
+
+    def get_stats(self) -> dict:
+        flushes = self.stats["flushes"]
+        return {
+            "pending": len(self.entries),
+            "updates": self.stats["updates"],
+            "flushes": flushes,
+            "flush_errors": self.stats["flush_errors"],
+            "flush_latency_avg": (
+                self.stats["flush_latency_total"] / flushes if flushes else 0.0
+            ),
+            "flush_latency_max": self.stats["flush_latency_max"],
+        }
+
+
+CHAT_WRITE_BUFFER = ChatWriteBuffer(
+    flush_interval=CHAT_SAVE_BUFFER_FLUSH_INTERVAL,
+    max_updates=CHAT_SAVE_BUFFER_MAX_UPDATES,
+)
+
+if CHAT_WRITE_BUFFER.enabled:
+    Chats.pending_writes_flusher = CHAT_WRITE_BUFFER.flush_chats
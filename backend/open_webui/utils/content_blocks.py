@@ -0,0 +1,419 @@
+import html
+import json
+import re
+import time
+
+####################
+# Content block serialization
+####################
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def get_reasoning_display_content(reasoning_content):
+    return "\n".join(
+        (f"> {line}" if not line.startswith(">") else line)
+        for line in reasoning_content.splitlines()
+    )
+
+
+def serialize_content_block(content, block, raw=False, reasoning_display_content=None):
+    """
+    Append the serialization of a single block to `content` (the serialization of
+    all preceding blocks) and return the result.
+    """
+    if block["type"] == "text":
+        content = f"{content}{block['content'].strip()}\n"
+    elif block["type"] == "tool_calls":
+        attributes = block.get("attributes", {})
+
+        tool_calls = block.get("content", [])
+        results = block.get("results", [])
+
+        if results:
+
+            tool_calls_display_content = ""
+            for tool_call in tool_calls:
+
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_result = None
+                tool_result_files = None
+                for result in results:
+                    if tool_call_id == result.get("tool_call_id", ""):
+                        tool_result = result.get("content", None)
+                        tool_result_files = result.get("files", None)
+                        break
+
+                if tool_result:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                else:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+        else:
+            tool_calls_display_content = ""
+
+            for tool_call in tool_calls:
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+
+    elif block["type"] == "reasoning":
+        reasoning_duration = block.get("duration", None)
+
+        if raw:
+            content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+        else:
+            if reasoning_display_content is None:
+                reasoning_display_content = get_reasoning_display_content(
+                    block["content"]
+                )
+
+            if reasoning_duration is not None:
+                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        content_stripped, original_whitespace = split_content_and_whitespace(content)
+        if is_opening_code_block(content_stripped):
+            # Remove trailing backticks that would open a new block
+            content = content_stripped.rstrip("`").rstrip() + original_whitespace
+        else:
+            # Keep content as is - either closing backticks or no backticks
+            content = content_stripped + original_whitespace
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        content = f"{content}{block['type']}: {block_content}\n"
+
+    return content
+
+
+def serialize_content_blocks(content_blocks, raw=False):
+    content = ""
+
+    for block in content_blocks:
+        content = serialize_content_block(content, block, raw=raw)
+
+    return content.strip()
+
+
+class ContentBlockSerializer:
+    """
+    Incremental `serialize_content_blocks` for the streaming response path.
+
+    While streaming, only the last block of `content_blocks` is mutated; every
+    block before it is final. The serialization of those preceding blocks is
+    cached (keyed by block identity) so each call only serializes the last block,
+    and the quoted display content of a streaming reasoning block is extended line
+    by line instead of being rebuilt from scratch.
+    """
+
+    def __init__(self):
+        self.prefix_blocks = []
+        self.prefix_content = ""
+
+        self.reasoning_block = None
+        self.reasoning_length = 0
+        self.reasoning_display_content = ""
+
+    def _get_prefix_content(self, blocks):
+        cached = len(self.prefix_blocks)
+        if cached > len(blocks) or any(
+            a is not b for a, b in zip(self.prefix_blocks, blocks)
+        ):
+            # Blocks were removed or replaced, start over
+            cached = 0
+            self.prefix_content = ""
+
+        content = self.prefix_content
+        for block in blocks[cached:]:
+            content = serialize_content_block(content, block)
+
+        self.prefix_blocks = list(blocks)
+        self.prefix_content = content
+        return content
+
+    def _get_reasoning_display_content(self, block):
+        text = block["content"]
+        if (
+            self.reasoning_block is not block
+            or len(text) < self.reasoning_length
+            or (self.reasoning_length and text[self.reasoning_length - 1] != "\n")
+        ):
+            self.reasoning_block = block
+            self.reasoning_length = 0
+            self.reasoning_display_content = ""
+
+        # Lines followed by "\n" are final and only need to be quoted once
+        tail = text[self.reasoning_length :]
+        end = tail.rfind("\n") + 1
+        if end:
+            self.reasoning_display_content = "\n".join(
+                filter(
+                    None,
+                    [
+                        self.reasoning_display_content,
+                        get_reasoning_display_content(tail[:end]),
+                    ],
+                )
+            )
+            self.reasoning_length += end
+
+        return "\n".join(
+            filter(
+                None,
+                [
+                    self.reasoning_display_content,
+                    get_reasoning_display_content(tail[end:]),
+                ],
+            )
+        )
+
+    def serialize(self, content_blocks):
+        if not content_blocks:
+            return ""
+
+        content = self._get_prefix_content(content_blocks[:-1])
+
+        block = content_blocks[-1]
+        content = serialize_content_block(
+            content,
+            block,
+            reasoning_display_content=(
+                self._get_reasoning_display_content(block)
+                if block["type"] == "reasoning"
+                else None
+            ),
+        )
+
+        return content.strip()
+
+
+####################
+# Streaming tag detection
+####################
+
+
+def extract_attributes(tag_content):
+    """Extract attributes from a tag if they exist."""
+    attributes = {}
+    if not tag_content:  # Ensure tag_content is not None
+        return attributes
+    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+    for key, value in matches:
+        attributes[key] = value
+    return attributes
+
+
+class ContentTagParser:
+    """
+    Detects start/end tags (e.g. <think>...</think>) in streamed content and splits
+    the content into typed blocks.
+
+    Only the part of the last block that arrived since the previous call (plus the
+    few characters a tag split across two deltas may start in) is scanned, so the
+    cost per delta no longer grows with the length of the response.
+    """
+
+    def __init__(self, incremental=True):
+        self.incremental = incremental
+        # content_type -> (block, number of characters of the block already scanned)
+        self.scanned = {}
+
+    def _get_scanned_length(self, content_type, block, text):
+        """Return how much of `text` was already scanned for `content_type` tags."""
+        scanned_block, length = self.scanned.get(content_type, (None, 0))
+        self.scanned[content_type] = (block, len(text))
+
+        if not self.incremental or scanned_block is not block or length > len(text):
+            return 0
+        return length
+
+    def handle(self, content_type, tags, content, content_blocks):
+        end_flag = False
+
+        if content_blocks[-1]["type"] == "text":
+            block = content_blocks[-1]
+            text = block["content"]
+
+            length = self._get_scanned_length(content_type, block, text)
+
+            # A start tag contains no ">" before its end and at most one line break
+            # (right after the tag name), so a tag completed by the new content
+            # cannot start before these positions.
+            start = (
+                max(
+                    0,
+                    text.rfind(">", 0, length) + 1,
+                    text.rfind("\n", 0, length)
+                    - max(len(start_tag) for start_tag, _ in tags)
+                    - 2,
+                )
+                if length
+                else 0
+            )
+
+            for start_tag, end_tag in tags:
+                # Match start tag e.g., <tag> or <tag attr="value">
+                start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
+                match = re.compile(start_tag_pattern).search(text, start)
+                if match:
+                    attr_content = (
+                        match.group(1) if match.group(1) else ""
+                    )  # Ensure it's not None
+                    attributes = extract_attributes(
+                        attr_content
+                    )  # Extract attributes safely
+
+                    # Capture everything before and after the matched tag
+                    before_tag = text[: match.start()]  # Content before opening tag
+                    after_tag = text[match.end() :]  # Content after opening tag
+
+                    # Keep only the content before the tag in the current text block
+                    block["content"] = before_tag
+
+                    if not block["content"]:
+                        content_blocks.pop()
+
+                    # Append the new block
+                    content_blocks.append(
+                        {
+                            "type": content_type,
+                            "start_tag": start_tag,
+                            "end_tag": end_tag,
+                            "attributes": attributes,
+                            "content": "",
+                            "started_at": time.time(),
+                        }
+                    )
+
+                    if after_tag:
+                        content_blocks[-1]["content"] = after_tag
+                        self.handle(content_type, tags, after_tag, content_blocks)
+
+                    break
+        elif content_blocks[-1]["type"] == content_type:
+            block = content_blocks[-1]
+            start_tag = block["start_tag"]
+            end_tag = block["end_tag"]
+            # Match end tag e.g., </tag>
+            end_tag_pattern = rf"<{re.escape(end_tag)}>"
+
+            text = block["content"]
+            length = self._get_scanned_length(content_type, block, text)
+
+            # Only an end tag overlapping the new content can be a new match
+            start = max(0, length - len(end_tag) - 1) if length else 0
+
+            # Check if the content has the end tag
+            if re.compile(end_tag_pattern).search(text, start):
+                end_flag = True
+
+                block_content = block["content"]
+                # Strip start and end tags from the content
+                start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+                block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+                end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+                split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+                # Content inside the tag
+                block_content = split_content[0].strip() if split_content else ""
+
+                # Leftover content (everything after `</tag>`)
+                leftover_content = (
+                    split_content[1].strip() if len(split_content) > 1 else ""
+                )
+
+                if block_content:
+                    block["content"] = block_content
+                    block["ended_at"] = time.time()
+                    block["duration"] = int(block["ended_at"] - block["started_at"])
+
+                    # Reset the content_blocks by appending a new text block
+                    if content_type != "code_interpreter":
+                        if leftover_content:
+
+                            content_blocks.append(
+                                {
+                                    "type": "text",
+                                    "content": leftover_content,
+                                }
+                            )
+                        else:
+                            content_blocks.append(
+                                {
+                                    "type": "text",
+                                    "content": "",
+                                }
+                            )
+
+                else:
+                    # Remove the block if content is empty
+                    content_blocks.pop()
+
+                    if leftover_content:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": leftover_content,
+                            }
+                        )
+                    else:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": "",
+                            }
+                        )
+
+                # Clean processed content
+                content = re.sub(
+                    rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
+                    "",
+                    content,
+                    flags=re.DOTALL,
+                )
+
+        return content, content_blocks, end_flag
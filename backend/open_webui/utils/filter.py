@@ -1,6 +1,7 @@
 import inspect
 import logging
 
+from open_webui.utils.cache import TTLCache
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.models.functions import Functions
 from open_webui.env import SRC_LOG_LEVELS
@@ -22,6 +23,90 @@ def get_function_module(request, function_id):
     return function_module
 
 
+####################
+# Valves cache
+####################
+
+# Filters run for every streamed chunk, so validated valves and resolved handlers
+# are cached in-process. Entries are keyed by a per-function version that
+# routers/functions.py bumps whenever a function or its valves change, and by the
+# function's updated_at so updates made through other workers are picked up too.
+FUNCTION_VERSIONS = {}
+VALVES_CACHE = {}
+HANDLER_CACHE = {}
+
+# User valves live in the user's settings and carry no version of their own, so
+# they expire; one entry per (function, user) is bounded to the active users
+USER_VALVES_CACHE_TTL = 10
+USER_VALVES_CACHE_SIZE = 1000
+USER_VALVES_CACHE = TTLCache(max_size=USER_VALVES_CACHE_SIZE, ttl=USER_VALVES_CACHE_TTL)
+
+
+def invalidate_function_cache(function_id: str):
+    FUNCTION_VERSIONS[function_id] = FUNCTION_VERSIONS.get(function_id, 0) + 1
+
+    VALVES_CACHE.pop(function_id, None)
+    USER_VALVES_CACHE.pop_matching(lambda key: key[0] == function_id)
+    for key in [key for key in HANDLER_CACHE if key[0] == function_id]:
+        HANDLER_CACHE.pop(key, None)
+
+
+def get_function_valves(function, function_module):
+    version = (FUNCTION_VERSIONS.get(function.id, 0), function.updated_at)
+
+    cached = VALVES_CACHE.get(function.id)
+    if cached and cached[0] == version and cached[1] is function_module:
+        return cached[2]
+
+    valves = Functions.get_function_valves_by_id(function.id)
+    valves = function_module.Valves(**(valves if valves else {}))
+
+    VALVES_CACHE[function.id] = (version, function_module, valves)
+    return valves
+
+
+def get_function_user_valves(function_id, function_module, user_id):
+    version = FUNCTION_VERSIONS.get(function_id, 0)
+
+    cached = USER_VALVES_CACHE.get((function_id, user_id))
+    if cached and cached[0] == version and cached[1] is function_module:
+        return cached[2]
+
+    user_valves = function_module.UserValves(
+        **Functions.get_user_valves_by_id_and_user_id(function_id, user_id)
+    )
+
+    USER_VALVES_CACHE.set(
+        (function_id, user_id), (version, function_module, user_valves)
+    )
+    return user_valves
+
+
+def get_filter_handler(function_id, function_module, filter_type):
+    """Return the filter's handler for `filter_type` and its parameter names."""
+    cached = HANDLER_CACHE.get((function_id, filter_type))
+    if cached and cached[0] is function_module:
+        return cached[1], cached[2]
+
+    handler = getattr(function_module, filter_type, None)
+    parameters = set(inspect.signature(handler).parameters) if handler else set()
+
+    HANDLER_CACHE[(function_id, filter_type)] = (function_module, handler, parameters)
+    return handler, parameters
+
+
+def get_filter_functions_by_type(request, filter_functions, filter_type):
+    """Return the filters that define a handler for `filter_type`."""
+    return [
+        function
+        for function in filter_functions
+        if function
+        and get_filter_handler(
+            function.id, get_function_module(request, function.id), filter_type
+        )[0]
+    ]
+
+
 def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
     def get_priority(function_id):
         function = Functions.get_function_by_id(function_id)
@@ -67,7 +152,9 @@ async def process_filter_functions(
 
         function_module = get_function_module(request, filter_id)
         # Prepare handler function
-        handler = getattr(function_module, filter_type, None)
+        handler, parameters = get_filter_handler(
+            filter_id, function_module, filter_type
+        )
         if not handler:
             continue
 
@@ -77,15 +164,10 @@ async def process_filter_functions(
 
         # Apply valves to the function
         if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
-            function_module.valves = function_module.Valves(
-                **(valves if valves else {})
-            )
+            function_module.valves = get_function_valves(function, function_module)
 
         try:
             # Prepare parameters
-            sig = inspect.signature(handler)
-
             params = {"body": form_data}
             if filter_type == "stream":
                 params = {"event": form_data}
@@ -96,17 +178,15 @@ async def process_filter_functions(
                     **extra_params,
                     "__id__": filter_id,
                 }.items()
-                if k in sig.parameters
+                if k in parameters
             }
 
             # Handle user parameters
-            if "__user__" in sig.parameters:
+            if "__user__" in parameters:
                 if hasattr(function_module, "UserValves"):
                     try:
-                        params["__user__"]["valves"] = function_module.UserValves(
-                            **Functions.get_user_valves_by_id_and_user_id(
-                                filter_id, params["__user__"]["id"]
-                            )
+                        params["__user__"]["valves"] = get_function_user_valves(
+                            filter_id, function_module, params["__user__"]["id"]
                         )
                     except Exception as e:
                         log.exception(f"Failed to get user values: {e}")
@@ -0,0 +1,164 @@
+import logging
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def get_base_url(url: str) -> str:
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+class ClientSessionRegistry:
+    """
+    App-lifetime aiohttp client sessions, one per upstream base URL, so requests
+    to the same Ollama/OpenAI backend reuse pooled keep-alive connections instead
+    of paying a new TCP/TLS handshake each time.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        ttl_dns_cache: Optional[int] = 300,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+
+        self.sessions: dict[str, aiohttp.ClientSession] = {}
+        self.stats: dict[str, dict] = {}
+
+    def _get_trace_config(self, base_url: str) -> aiohttp.TraceConfig:
+        stats = self.stats.setdefault(
+            base_url,
+            {
+                "requests": 0,
+                "errors": 0,
+                "connections_created": 0,
+                "connections_reused": 0,
+            },
+        )
+
+        async def on_request_start(session, context, params):
+            stats["requests"] += 1
+
+        async def on_request_exception(session, context, params):
+            stats["errors"] += 1
+
+        async def on_connection_create_end(session, context, params):
+            stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            stats["connections_reused"] += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        base_url = get_base_url(url)
+
+        session = self.sessions.get(base_url)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=self.ttl_dns_cache != 0,
+                ttl_dns_cache=self.ttl_dns_cache or None,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                trust_env=True,
+                trace_configs=[self._get_trace_config(base_url)],
+            )
+            self.sessions[base_url] = session
+
+        return session
+
+    async def close(self):
+        for base_url, session in list(self.sessions.items()):
+            try:
+                await session.close()
+            except Exception as e:
+                log.warning(f"Error closing client session for {base_url}: {e}")
+        self.sessions = {}
+
+    def get_stats(self) -> dict:
+        return {
+            base_url: {
+                **stats,
+                "open": base_url in self.sessions
+                and not self.sessions[base_url].closed,
+            }
+            for base_url, stats in self.stats.items()
+        }
+
+
+CLIENT_SESSIONS = ClientSessionRegistry(
+    limit=AIOHTTP_CLIENT_POOL_LIMIT,
+    limit_per_host=AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    keepalive_timeout=AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    ttl_dns_cache=AIOHTTP_CLIENT_DNS_CACHE_TTL,
+)
+
+
+def get_client_session(url: str) -> aiohttp.ClientSession:
+    return CLIENT_SESSIONS.get_session(url)
+
+
+async def release_response(response: Optional[aiohttp.ClientResponse]):
+    """Return the connection of a (fully read) response to the pool."""
+    if response:
+        response.release()
+
+
+class ResponseStream:
+    """
+    Body of a streamed aiohttp response for a StreamingResponse. The response
+    is released exactly once: when the stream ends, fails or is cancelled, or
+    when `release` runs as the background task of the StreamingResponse,
+    whichever comes first. Otherwise a stream abandoned mid-body would hold its
+    pooled connection until garbage collection.
+    """
+
+    def __init__(self, response: aiohttp.ClientResponse):
+        self.response = response
+        self.released = False
+
+    def __aiter__(self):
+        return self._iter_content()
+
+    async def _iter_content(self):
+        try:
+            async for chunk in self.response.content:
+                yield chunk
+        finally:
+            await self.release()
+
+    async def release(self):
+        if self.released:
+            return
+        self.released = True
+        await self._release()
+
+    async def _release(self):
+        await release_response(self.response)
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from fastapi import FastAPI, Request
+
+from open_webui.env import JOB_QUEUE_STALE_TIMEOUT, JOB_QUEUE_WORKERS, SRC_LOG_LEVELS
+from open_webui.models.jobs import JobModel, JobResponse, Jobs
+from open_webui.models.users import Users
+from open_webui.socket.main import emit_to_user
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class JobContext:
+    """Handed to job handlers to report progress and honour cancellation."""
+
+    def __init__(self, queue: "JobQueue", job: JobModel):
+        self.queue = queue
+        self.job = job
+
+    def set_progress(self, completed: int, total: int, **kwargs):
+        job = Jobs.update_job_progress(
+            self.job.id, {"completed": completed, "total": total, **kwargs}
+        )
+        if job:
+            self.queue.emit_threadsafe(job)
+
+    def raise_if_cancelled(self):
+        if Jobs.is_cancel_requested(self.job.id):
+            raise JobCancelledError()
+
+
+class JobQueue:
+    """
+    Persistent queue for long-running ingestion work (file processing,
+    knowledge base reindexing) so it doesn't run inside HTTP requests.
+
+    Jobs are rows in the `job` table. Each process polls for pending jobs of
+    the types it has handlers for and claims them atomically, so several
+    workers/replicas can share the queue. Handlers are synchronous and run in
+    a thread pool of `workers` threads; they receive a `JobContext` for
+    progress updates and cooperative cancellation. Status changes are pushed
+    to the job owner as "job-events" socket events.
+
+    Running jobs are heartbeated; jobs of a process that died are queued again
+    after `stale_timeout` seconds. On shutdown the queue stops claiming jobs and
+    waits for the running ones: their handler threads can't be interrupted, and
+    running a job again while it is still running would duplicate its work.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        stale_timeout: int = 300,
+        poll_interval: float = 2.0,
+    ):
+        self.workers = workers
+        self.stale_timeout = stale_timeout
+        self.poll_interval = poll_interval
+
+        self.worker_id = str(uuid.uuid4())
+        self.handlers: dict[str, Callable] = {}
+        self.running: dict[str, asyncio.Task] = {}
+
+        self.app: Optional[FastAPI] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+
+    def handler(self, type: str):
+        """
+        Register the handler of a job type:
+        `handler(request, data, user, context) -> Optional[dict]`
+        """
+
+        def decorator(func: Callable):
+            self.handlers[type] = func
+            return func
+
+        return decorator
+
+    def enqueue(self, user_id: str, type: str, data: dict) -> JobModel:
+        if type not in self.handlers:
+            raise ValueError(f"Unknown job type: {type}")
+
+        job = Jobs.insert_new_job(user_id, type, data)
+        if self.loop and self.wakeup:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        return job
+
+    def cancel(self, id: str) -> Optional[JobModel]:
+        job = Jobs.cancel_job_by_id(id)
+        if job and job.status == "cancelled":
+            self.emit_threadsafe(job)
+        return job
+
+    async def emit(self, job: JobModel):
+        try:
+            await emit_to_user(
+                job.user_id, "job-events", JobResponse(**job.model_dump()).model_dump()
+            )
+        except Exception as e:
+            log.debug(f"Error emitting job event: {e}")
+
+    def emit_threadsafe(self, job: JobModel):
+        if self.loop is None:
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self.loop.create_task(self.emit(job))
+        else:
+            asyncio.run_coroutine_threadsafe(self.emit(job), self.loop)
+
+    def _run_handler(self, job: JobModel):
+        user = Users.get_user_by_id(job.user_id)
+        if user is None:
+            raise Exception(f"User {job.user_id} not found")
+
+        request = Request(
+            {"type": "http", "app": self.app, "headers": [], "query_string": b""}
+        )
+        return self.handlers[job.type](
+            request, job.data or {}, user, JobContext(self, job)
+        )
+
+    async def _execute(self, job: JobModel):
+        id = job.id
+        await self.emit(job)
+        try:
+            result = await self.loop.run_in_executor(
+                self.executor, self._run_handler, job
+            )
+            job = await asyncio.to_thread(
+                Jobs.update_job_status, job.id, "completed", result=result
+            )
+        except JobCancelledError:
+            job = await asyncio.to_thread(Jobs.update_job_status, job.id, "cancelled")
+        except Exception as e:
+            log.exception(f"Job {job.id} ({job.type}) failed: {e}")
+            job = await asyncio.to_thread(
+                Jobs.update_job_status,
+                job.id,
+                "failed",
+                error=str(e.detail) if hasattr(e, "detail") else str(e),
+            )
+        finally:
+            self.running.pop(id, None)
+            self.wakeup.set()
+
+        if job:
+            await self.emit(job)
+
+    async def _run(self):
+        last_heartbeat = 0.0
+        while True:
+            self.wakeup.clear()
+            try:
+                now = time.monotonic()
+                if now - last_heartbeat >= self.stale_timeout / 3:
+                    await asyncio.to_thread(Jobs.touch_jobs_by_ids, list(self.running))
+                    requeued = await asyncio.to_thread(
+                        Jobs.requeue_stale_jobs, self.stale_timeout
+                    )
+                    if requeued:
+                        log.warning(f"Requeued {requeued} abandoned jobs")
+                    last_heartbeat = now
+
+                while len(self.running) < self.workers and not self.stopping:
+                    job = await asyncio.to_thread(
+                        Jobs.claim_next_job, self.worker_id, list(self.handlers)
+                    )
+                    if job is None:
+                        break
+                    self.running[job.id] = asyncio.create_task(self._execute(job))
+            except Exception as e:
+                log.exception(f"Error polling the job queue: {e}")
+
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self, app: FastAPI):
+        self.app = app
+        self.loop = asyncio.get_running_loop()
+        self.stopping = False
+        self.wakeup = asyncio.Event()
+
+        if self.workers > 0:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="job-worker"
+            )
+            self.task = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        # Keep polling (and heartbeating the running jobs) until they finished
+        self.stopping = True
+        if self.running:
+            log.info(f"Waiting for {len(self.running)} running jobs to finish")
+            await asyncio.gather(*self.running.values(), return_exceptions=True)
+
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": list(self.running),
+            "types": list(self.handlers),
+        }
+
+
+JOB_QUEUE = JobQueue(workers=JOB_QUEUE_WORKERS, stale_timeout=JOB_QUEUE_STALE_TIMEOUT)
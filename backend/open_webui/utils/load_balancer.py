@@ -0,0 +1,178 @@
+import logging
+import random
+import time
+from typing import Optional
+
+import aiohttp
+
+from open_webui.env import (
+    UPSTREAM_EJECTION_TIME,
+    UPSTREAM_LOAD_BALANCING_STRATEGY,
+    UPSTREAM_MAX_FAILURES,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.http_sessions import (
+    ResponseStream,
+    get_base_url,
+    release_response,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class UpstreamLoadBalancer:
+    """
+    Picks one of several upstream URLs serving the same model.
+
+    Strategies:
+      - "random": uniform random choice (the previous behaviour)
+      - "least_requests": fewest in-flight requests, ties broken randomly
+      - "ewma": lowest EWMA time-to-first-byte, weighted by in-flight requests
+      - "power_of_two": the less loaded of two randomly sampled upstreams
+
+    Upstreams that fail `max_failures` times in a row (connection errors or 5xx)
+    are ejected for `ejection_time` seconds. If every candidate is ejected the
+    balancer fails open and considers all of them.
+
+    State is kept per process, keyed by the upstream base URL.
+    """
+
+    def __init__(
+        self,
+        strategy: str = "least_requests",
+        max_failures: int = 3,
+        ejection_time: float = 30.0,
+        ewma_alpha: float = 0.3,
+    ):
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.ewma_alpha = ewma_alpha
+
+        self.upstreams: dict[str, dict] = {}
+
+    def _get_upstream(self, url: str) -> dict:
+        base_url = get_base_url(url)
+        if base_url not in self.upstreams:
+            self.upstreams[base_url] = {
+                "in_flight": 0,
+                "latency": None,
+                "failures": 0,
+                "ejected_until": 0.0,
+                "requests": 0,
+                "errors": 0,
+            }
+        return self.upstreams[base_url]
+
+    def _is_available(self, upstream: dict, now: float) -> bool:
+        return upstream["ejected_until"] <= now
+
+    def _get_load(self, upstream: dict) -> tuple:
+        return (upstream["in_flight"], upstream["latency"] or 0.0)
+
+    def _get_cost(self, upstream: dict) -> float:
+        # Unmeasured upstreams cost nothing so that they get probed first
+        return (upstream["latency"] or 0.0) * (upstream["in_flight"] + 1)
+
+    def select(self, urls: list[str]) -> int:
+        """Return the index in `urls` of the upstream to send the request to."""
+        if len(urls) <= 1:
+            return 0
+
+        now = time.monotonic()
+        upstreams = [self._get_upstream(url) for url in urls]
+
+        candidates = [
+            idx
+            for idx, upstream in enumerate(upstreams)
+            if self._is_available(upstream, now)
+        ] or list(range(len(urls)))
+
+        if self.strategy == "random" or len(candidates) == 1:
+            return random.choice(candidates)
+
+        if self.strategy == "power_of_two":
+            a, b = random.sample(candidates, 2)
+            return min(a, b, key=lambda idx: self._get_load(upstreams[idx]))
+
+        if self.strategy == "ewma":
+            key = lambda idx: self._get_cost(upstreams[idx])
+        else:
+            key = lambda idx: upstreams[idx]["in_flight"]
+
+        best = min(key(idx) for idx in candidates)
+        return random.choice([idx for idx in candidates if key(idx) == best])
+
+    def on_request_start(self, url: str):
+        upstream = self._get_upstream(url)
+        upstream["in_flight"] += 1
+        upstream["requests"] += 1
+
+    def on_response(self, url: str, latency: Optional[float], success: bool):
+        """Record the outcome of a request once its response headers arrived."""
+        upstream = self._get_upstream(url)
+
+        if success:
+            upstream["failures"] = 0
+            if latency is not None:
+                upstream["latency"] = (
+                    latency
+                    if upstream["latency"] is None
+                    else self.ewma_alpha * latency
+                    + (1 - self.ewma_alpha) * upstream["latency"]
+                )
+        else:
+            upstream["errors"] += 1
+            upstream["failures"] += 1
+            if upstream["failures"] >= self.max_failures:
+                upstream["ejected_until"] = time.monotonic() + self.ejection_time
+                log.warning(
+                    f"Ejecting upstream {get_base_url(url)} for {self.ejection_time}s "
+                    f"after {upstream['failures']} consecutive failures"
+                )
+
+    def on_request_end(self, url: str):
+        upstream = self._get_upstream(url)
+        upstream["in_flight"] = max(upstream["in_flight"] - 1, 0)
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "strategy": self.strategy,
+            "upstreams": {
+                base_url: {
+                    "in_flight": upstream["in_flight"],
+                    "latency": upstream["latency"],
+                    "requests": upstream["requests"],
+                    "errors": upstream["errors"],
+                    "ejected": not self._is_available(upstream, now),
+                }
+                for base_url, upstream in self.upstreams.items()
+            },
+        }
+
+
+UPSTREAM_BALANCER = UpstreamLoadBalancer(
+    strategy=UPSTREAM_LOAD_BALANCING_STRATEGY,
+    max_failures=UPSTREAM_MAX_FAILURES,
+    ejection_time=UPSTREAM_EJECTION_TIME,
+)
+
+
+async def release_upstream_response(
+    url: str, response: Optional[aiohttp.ClientResponse]
+):
+    await release_response(response)
+    UPSTREAM_BALANCER.on_request_end(url)
+
+
+class UpstreamResponseStream(ResponseStream):
+    """Streamed upstream response that also frees its in-flight slot on release."""
+
+    def __init__(self, url: str, response: aiohttp.ClientResponse):
+        super().__init__(response)
+        self.url = url
+
+    async def _release(self):
+        await release_upstream_response(self.url, self.response)
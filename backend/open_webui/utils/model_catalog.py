@@ -0,0 +1,256 @@
+import asyncio
+import copy
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from open_webui.env import (
+    MODELS_CACHE_TTL,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class ModelCatalog:
+    """
+    Stale-while-revalidate cache for the model catalog.
+
+    The base models (function models plus the Ollama/OpenAI fan-out) are cached
+    for `ttl` seconds; once stale they keep being served while a single refresh
+    runs in the background, so only a cold cache waits on the upstreams, and
+    concurrent requests on a cold cache wait on the same fan-out. With Redis
+    configured the base models are shared between workers and only one worker
+    refreshes them at a time. The catalog is shared by all users, so `fetch`
+    must not depend on the user that triggered it.
+
+    The merged catalog (custom models, arena models, actions, filters) is built
+    per worker from the base models and rebuilt whenever they change or the
+    catalog is invalidated by model/function CRUD. Callers get their own copy
+    and are free to modify it.
+
+    Fetching the base models also fills the per-connection model maps on the
+    app state (`SHARED_STATE_KEYS`) that the routers use to pick an upstream.
+    They are shared along with the base models and restored on the workers that
+    load them from Redis instead of fetching them.
+    """
+
+    BASE_MODELS_KEY = "open-webui:models:base"
+    GENERATION_KEY = "open-webui:models:generation"
+    REFRESH_LOCK_KEY = "open-webui:models:refresh_lock"
+    SHARED_STATE_KEYS = ("OLLAMA_MODELS", "OPENAI_MODELS")
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = [],
+    ):
+        self.ttl = ttl
+        self.redis = (
+            get_redis_connection(redis_url, redis_sentinels, decode_responses=True)
+            if redis_url
+            else None
+        )
+
+        self.generation = 0
+        self.base_models: Optional[list] = None
+        self.base_models_generation = 0
+        self.base_models_updated_at = 0.0
+
+        self.models: Optional[list] = None
+        self.models_key: Optional[tuple] = None
+
+        self.load_task: Optional[asyncio.Task] = None
+        self.refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get_generation(self) -> int:
+        if self.redis:
+            try:
+                return int(self.redis.get(self.GENERATION_KEY) or 0)
+            except Exception as e:
+                log.warning(f"Error reading model catalog generation: {e}")
+        return self.generation
+
+    def invalidate(self, base_models: bool = False):
+        """
+        Mark the catalog as changed. The merged catalog is rebuilt on next access
+        and the base models are refreshed in the background; with `base_models`
+        the next access of this worker waits for a fresh fan-out instead (e.g.
+        after the connection settings changed).
+        """
+        if self.redis:
+            try:
+                self.generation = int(self.redis.incr(self.GENERATION_KEY))
+            except Exception as e:
+                log.warning(f"Error invalidating model catalog: {e}")
+                self.generation += 1
+        else:
+            self.generation += 1
+
+        if base_models:
+            self.base_models = None
+            # A fan-out already in flight may predate the change, don't join it
+            self.load_task = None
+            if self.redis:
+                try:
+                    self.redis.delete(self.BASE_MODELS_KEY)
+                except Exception as e:
+                    log.warning(f"Error invalidating model catalog: {e}")
+
+    def _load_shared_base_models(self, state=None):
+        try:
+            value = self.redis.get(self.BASE_MODELS_KEY)
+        except Exception as e:
+            log.warning(f"Error reading model catalog from redis: {e}")
+            return
+
+        if value:
+            shared = json.loads(value)
+            if shared["updated_at"] > self.base_models_updated_at:
+                self.base_models = shared["models"]
+                self.base_models_generation = shared["generation"]
+                self.base_models_updated_at = shared["updated_at"]
+
+                if state is not None:
+                    for key, value in shared.get("state", {}).items():
+                        setattr(state, key, value)
+
+    async def refresh_base_models(
+        self, fetch: Callable[[], Awaitable[list]], generation: int, state=None
+    ) -> list:
+        base_models = await fetch()
+        if not base_models:
+            # Nothing reachable (yet), don't pin an empty catalog for a whole ttl
+            return base_models
+
+        self.base_models = base_models
+        self.base_models_generation = generation
+        self.base_models_updated_at = time.time()
+
+        if self.redis:
+            try:
+                self.redis.set(
+                    self.BASE_MODELS_KEY,
+                    json.dumps(
+                        {
+                            "models": base_models,
+                            "generation": generation,
+                            "updated_at": self.base_models_updated_at,
+                            "state": {
+                                key: getattr(state, key)
+                                for key in self.SHARED_STATE_KEYS
+                                if state is not None and hasattr(state, key)
+                            },
+                        }
+                    ),
+                )
+            except Exception as e:
+                log.warning(f"Error writing model catalog to redis: {e}")
+
+        return base_models
+
+    async def _load_base_models(
+        self, fetch: Callable[[], Awaitable[list]], generation: int, state=None
+    ) -> list:
+        try:
+            return await self.refresh_base_models(fetch, generation, state)
+        finally:
+            if self.load_task is asyncio.current_task():
+                self.load_task = None
+
+    async def _background_refresh(
+        self, fetch: Callable[[], Awaitable[list]], generation: int, state=None
+    ):
+        try:
+            if self.redis and not self.redis.set(
+                self.REFRESH_LOCK_KEY, "1", nx=True, ex=max(int(self.ttl), 30)
+            ):
+                # Another worker is already refreshing
+                return
+
+            try:
+                await self.refresh_base_models(fetch, generation, state)
+            finally:
+                if self.redis:
+                    self.redis.delete(self.REFRESH_LOCK_KEY)
+        except Exception as e:
+            log.exception(f"Error refreshing model catalog: {e}")
+        finally:
+            self.refresh_task = None
+
+    async def get_base_models(
+        self,
+        fetch: Callable[[], Awaitable[list]],
+        generation: Optional[int] = None,
+        state=None,
+    ) -> list:
+        if not self.enabled:
+            return await fetch()
+
+        if generation is None:
+            generation = self.get_generation()
+        if self.redis:
+            self._load_shared_base_models(state)
+
+        if self.base_models is None:
+            if self.load_task is None:
+                self.load_task = asyncio.create_task(
+                    self._load_base_models(fetch, generation, state)
+                )
+            # Shielded so that a cancelled request doesn't cancel the fan-out
+            # other requests are waiting on
+            return await asyncio.shield(self.load_task)
+
+        stale = (
+            time.time() - self.base_models_updated_at >= self.ttl
+            or self.base_models_generation < generation
+        )
+        if stale and self.refresh_task is None:
+            self.refresh_task = asyncio.create_task(
+                self._background_refresh(fetch, generation, state)
+            )
+
+        return self.base_models
+
+    async def get_models(
+        self,
+        fetch: Callable[[], Awaitable[list]],
+        build: Callable[[list], list],
+        state=None,
+    ) -> list:
+        """
+        Return a copy of the merged catalog, rebuilding it with `build` (which
+        receives a copy of the base models) only when the base models or the
+        generation changed since the last build. `state` is the app state whose
+        `SHARED_STATE_KEYS` are filled by `fetch`.
+        """
+        if not self.enabled:
+            return build(await fetch())
+
+        generation = self.get_generation()
+        base_models = await self.get_base_models(fetch, generation, state)
+
+        key = (self.base_models_updated_at, generation)
+        if self.models is None or self.models_key != key:
+            self.models = build(copy.deepcopy(base_models))
+            self.models_key = key
+
+        return copy.deepcopy(self.models)
+
+
+MODEL_CATALOG = ModelCatalog(
+    ttl=MODELS_CACHE_TTL,
+    redis_url=REDIS_URL,
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
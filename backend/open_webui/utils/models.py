@@ -15,13 +15,18 @@ from open_webui.models.models import Models
 
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.access_control import has_access
+from open_webui.utils.model_catalog import MODEL_CATALOG
 
 
 from open_webui.config import (
     DEFAULT_ARENA_MODEL,
 )
 
-from open_webui.env import SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
+from open_webui.env import (
+    ENABLE_FORWARD_USER_INFO_HEADERS,
+    SRC_LOG_LEVELS,
+    GLOBAL_LOG_LEVEL,
+)
 from open_webui.models.users import UserModel
 
 
@@ -61,9 +66,124 @@ async def get_all_base_models(request: Request, user: UserModel = None):
     return models
 
 
+def merge_custom_models(models: list[dict], custom_models: list) -> list[dict]:
+    """
+    Apply custom models to the base models: overrides (no base_model_id) rename
+    or hide the matching base models, presets are appended with the owner/pipe
+    of their base model.
+    """
+    # Models indexed by id and by colon-stripped id, each entry holding
+    # (position, model) in list order so the first match can be found
+    models_by_id = {}
+    models_by_base_id = {}
+    removed = set()
+
+    def add_model(position, model):
+        models_by_id.setdefault(model["id"], []).append((position, model))
+        models_by_base_id.setdefault(model["id"].split(":")[0], []).append(
+            (position, model)
+        )
+
+    def get_models(index, key):
+        return [
+            (position, model)
+            for position, model in index.get(key, [])
+            if id(model) not in removed
+        ]
+
+    for position, model in enumerate(models):
+        add_model(position, model)
+
+    for custom_model in custom_models:
+        if custom_model.base_model_id is None:
+            matches = {
+                id(model): model
+                for _, model in get_models(models_by_id, custom_model.id)
+            }
+            # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
+            matches.update(
+                {
+                    id(model): model
+                    for _, model in get_models(models_by_base_id, custom_model.id)
+                    if model.get("owned_by") == "ollama"
+                }
+            )
+
+            for model in matches.values():
+                if custom_model.is_active:
+                    model["name"] = custom_model.name
+                    model["info"] = custom_model.model_dump()
+
+                    # Set action_ids and filter_ids
+                    action_ids = []
+                    filter_ids = []
+
+                    if "info" in model and "meta" in model["info"]:
+                        action_ids.extend(model["info"]["meta"].get("actionIds", []))
+                        filter_ids.extend(model["info"]["meta"].get("filterIds", []))
+
+                    model["action_ids"] = action_ids
+                    model["filter_ids"] = filter_ids
+                else:
+                    removed.add(id(model))
+
+        elif custom_model.is_active and not get_models(models_by_id, custom_model.id):
+            owned_by = "openai"
+            pipe = None
+
+            action_ids = []
+            filter_ids = []
+
+            base_models = get_models(models_by_id, custom_model.base_model_id)[:1]
+            base_models += get_models(models_by_base_id, custom_model.base_model_id)[:1]
+            if base_models:
+                _, base_model = min(base_models, key=lambda item: item[0])
+                owned_by = base_model.get("owned_by", "unknown owner")
+                if "pipe" in base_model:
+                    pipe = base_model["pipe"]
+
+            if custom_model.meta:
+                meta = custom_model.meta.model_dump()
+
+                if "actionIds" in meta:
+                    action_ids.extend(meta["actionIds"])
+
+                if "filterIds" in meta:
+                    filter_ids.extend(meta["filterIds"])
+
+            model = {
+                "id": f"{custom_model.id}",
+                "name": custom_model.name,
+                "object": "model",
+                "created": custom_model.created_at,
+                "owned_by": owned_by,
+                "info": custom_model.model_dump(),
+                "preset": True,
+                **({"pipe": pipe} if pipe is not None else {}),
+                "action_ids": action_ids,
+                "filter_ids": filter_ids,
+            }
+            add_model(len(models), model)
+            models.append(model)
+
+    return [model for model in models if id(model) not in removed]
+
+
 async def get_all_models(request, user: UserModel = None):
-    models = await get_all_base_models(request, user=user)
+    if ENABLE_FORWARD_USER_INFO_HEADERS:
+        # The upstreams are told who is asking and may list different models per
+        # user, so their answer can't be shared through the catalog
+        return build_all_models(request, await get_all_base_models(request, user=user))
+
+    # The catalog is shared by all users: fetch it on behalf of none of them
+    return await MODEL_CATALOG.get_models(
+        fetch=lambda: get_all_base_models(request),
+        build=lambda models: build_all_models(request, models),
+        state=request.app.state,
+    )
 
+
+def build_all_models(request, models: list[dict]) -> list[dict]:
     # If there are no models, return an empty list
     if len(models) == 0:
         return []
@@ -106,93 +226,20 @@ async def get_all_models(request, user: UserModel = None):
     global_action_ids = [
         function.id for function in Functions.get_global_action_functions()
     ]
-    enabled_action_ids = [
-        function.id
+    enabled_actions = {
+        function.id: function
         for function in Functions.get_functions_by_type("action", active_only=True)
-    ]
+    }
 
     global_filter_ids = [
         function.id for function in Functions.get_global_filter_functions()
     ]
-    enabled_filter_ids = [
-        function.id
+    enabled_filters = {
+        function.id: function
         for function in Functions.get_functions_by_type("filter", active_only=True)
-    ]
-
-    custom_models = Models.get_all_models()
-    for custom_model in custom_models:
-        if custom_model.base_model_id is None:
-            for model in models:
-                if custom_model.id == model["id"] or (
-                    model.get("owned_by") == "ollama"
-                    and custom_model.id
-                    == model["id"].split(":")[
-                        0
-                    ]  # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
-                ):
-                    if custom_model.is_active:
-                        model["name"] = custom_model.name
-                        model["info"] = custom_model.model_dump()
-
-                        # Set action_ids and filter_ids
-                        action_ids = []
-                        filter_ids = []
-
-                        if "info" in model and "meta" in model["info"]:
-                            action_ids.extend(
-                                model["info"]["meta"].get("actionIds", [])
-                            )
-                            filter_ids.extend(
-                                model["info"]["meta"].get("filterIds", [])
-                            )
-
-                        model["action_ids"] = action_ids
-                        model["filter_ids"] = filter_ids
-                    else:
-                        models.remove(model)
-
-        elif custom_model.is_active and (
-            custom_model.id not in [model["id"] for model in models]
-        ):
-            owned_by = "openai"
-            pipe = None
-
-            action_ids = []
-            filter_ids = []
+    }
 
-            for model in models:
-                if (
-                    custom_model.base_model_id == model["id"]
-                    or custom_model.base_model_id == model["id"].split(":")[0]
-                ):
-                    owned_by = model.get("owned_by", "unknown owner")
-                    if "pipe" in model:
-                        pipe = model["pipe"]
-                    break
-
-            if custom_model.meta:
-                meta = custom_model.meta.model_dump()
-
-                if "actionIds" in meta:
-                    action_ids.extend(meta["actionIds"])
-
-                if "filterIds" in meta:
-                    filter_ids.extend(meta["filterIds"])
-
-            models.append(
-                {
-                    "id": f"{custom_model.id}",
-                    "name": custom_model.name,
-                    "object": "model",
-                    "created": custom_model.created_at,
-                    "owned_by": owned_by,
-                    "info": custom_model.model_dump(),
-                    "preset": True,
-                    **({"pipe": pipe} if pipe is not None else {}),
-                    "action_ids": action_ids,
-                    "filter_ids": filter_ids,
-                }
-            )
+    models = merge_custom_models(models, Models.get_all_models())
 
     # Process action_ids to get the actions
     def get_action_items_from_module(function, module):
@@ -250,20 +297,17 @@ async def get_all_models(request, user: UserModel = None):
         action_ids = [
             action_id
             for action_id in list(set(model.pop("action_ids", []) + global_action_ids))
-            if action_id in enabled_action_ids
+            if action_id in enabled_actions
         ]
         filter_ids = [
             filter_id
             for filter_id in list(set(model.pop("filter_ids", []) + global_filter_ids))
-            if filter_id in enabled_filter_ids
+            if filter_id in enabled_filters
         ]
 
         model["actions"] = []
         for action_id in action_ids:
-            action_function = Functions.get_function_by_id(action_id)
-            if action_function is None:
-                raise Exception(f"Action not found: {action_id}")
-
+            action_function = enabled_actions[action_id]
             function_module = get_function_module_by_id(action_id)
             model["actions"].extend(
                 get_action_items_from_module(action_function, function_module)
@@ -271,10 +315,7 @@ async def get_all_models(request, user: UserModel = None):
 
         model["filters"] = []
         for filter_id in filter_ids:
-            filter_function = Functions.get_function_by_id(filter_id)
-            if filter_function is None:
-                raise Exception(f"Filter not found: {filter_id}")
-
+            filter_function = enabled_filters[filter_id]
             function_module = get_function_module_by_id(filter_id)
 
             if getattr(function_module, "toggle", None):